@@ -0,0 +1,165 @@
+"""
+Benchmark for LogParser on large guidance logs.
+
+Parses each log file with LogParser.parse_log_file and reports lines/s, MB/s and
+the time that rate implies for a 1 GB log. Without log files, a synthetic log with
+every tag the parser knows is generated first.
+
+The bulk (memory-mapped, per-channel regex) path is timed after the line parser,
+then LogIndex: the index pass and reading one channel of the first session.
+With --workers N the parallel parser runs as well on logs large enough for it
+(PARALLEL_MIN_BYTES_BULK) and its speedup over serial bulk parsing is reported.
+
+Usage:
+    python bench_log_parser.py [--workers N] [log_file ...]
+    python bench_log_parser.py [--workers N] --generate SIZE_MB [path]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from log_parser import PARALLEL_MIN_BYTES_BULK, LogIndex, LogParser
+
+
+def _frame_lines(rng, frame):
+    def v():
+        return f"{rng.uniform(-50, 50):.4f}"
+
+    return [
+        f"Frame Number: {frame}",
+        f"Interceptor Location: ({v()}, {v()}, {v()})",
+        f"Altitude: {v()}",
+        f"Relative Altitude: {v()}",
+        f"Attitude (R,P,Y): ({v()}, {v()}, {v()})",
+        f"Velocity: [{v()}, {v()}, {v()}]",
+        f"Target Location: ({v()}, {v()}, {v()})",
+        f"Target Altitude: {v()}",
+        f"Target Velocity: Vx: {v()}, Vy: {v()}, Vz: {v()}",
+        f"Distance to target: {v()}",
+        f"Speed: {v()}",
+        f"Angular Velocity: [{v()}, {v()}, {v()}]",
+        f"Linear Velocity: [{v()}, {v()}, {v()}]",
+        f"Virtual Pixel X: {v()}, Virtual Pixel Y: {v()}, Depth: {v()}",
+        f"Depth Virtual: {v()}",
+        f"Pixel errors: ({v()}, {v()})",
+        f"Virtual Pixel errors: ({v()}, {v()})",
+        f"Desired Acceleration (initial): [{v()}, {v()}, {v()}]",
+        f"Accel Desired (final): [{v()}, {v()}, {v()}]",
+        f"XYZPseudoFrame: [ {rng.uniform(-1, 1):.3e} {v()}  {v()} ]",
+        f"Target Heading New: {v()}",
+        f"Error ACC: {v()}",
+        f"Virtual East Acceleration: {v()}",
+        f"Virtual Down Acceleration: {v()}",
+        f"Control Commands - Pitch: {v()}, Yaw: {v()}, Roll: {v()}, Thrust: {v()}",
+        f"[BS_THROTTLE] thr={v()}, alt_err={v()}m, rate_err={v()}m/s, a_cmd={v()}",
+        f"[BS_ROLL] phi={v()}deg, east_err={v()}m, vel_err={v()}m/s, a_lat={v()}",
+        f"[BS_LEVANT] rate_hat={v()}m/s, accel_hat={v()}m/s2",
+        f"[BS_ROLL_LEVANT] vel_hat={v()}m/s, accel_hat={v()}m/s2",
+        f"[LEVANT_ALT_OUT] next_state=[{v()}, {v()}, {v()}, {v()}]",
+        f"[BS_STATE] drone_alt={v()}m, target_alt={v()}m, drone_vz={v()}m/s, drone_az={v()}m/s2",
+        f"Error Old XY: {rng.uniform(-1, 1):.3e}",
+        f"Error Old Z: {v()}",
+        f"[BS_ACCEL_MEAS] raw_imu=[{v()}, {v()}, {v()}]",
+    ]
+
+
+def generate_log(path, size_mb, frames_per_session=3000, seed=0):
+    """
+    Write a synthetic guidance log of about `size_mb` megabytes to `path`.
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    target_bytes = size_mb * 1024 * 1024
+    written = 0
+
+    with open(path, 'w') as f:
+        def write(message):
+            nonlocal now, written
+            now += timedelta(milliseconds=rng.randint(1, 5))
+            line = f"{now:%Y-%m-%d %H:%M:%S},{now.microsecond // 1000:03d} - INFO - {message}\n"
+            f.write(line)
+            written += len(line)
+
+        while written < target_bytes:
+            write("Drone Mode: GUIDED")
+            for frame in range(frames_per_session):
+                for message in _frame_lines(rng, frame):
+                    write(message)
+                if written >= target_bytes:
+                    break
+            write("Drone Mode: LOITER")
+
+
+def timed_parse(path, workers, bulk=False):
+    start = time.perf_counter()
+    sessions = LogParser.parse_log_file(path, workers=workers, bulk=bulk)
+    return sessions, time.perf_counter() - start
+
+
+def bench(path, workers=1):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        n_lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+    sessions, elapsed = timed_parse(path, 1)
+
+    frames = sum(len(session["frame_number"]) for session in sessions)
+    print(f"{os.path.basename(path)}: {size / 1e6:.1f} MB, {n_lines:,} lines, "
+          f"{len(sessions)} sessions, {frames:,} frames")
+    print(f"  parse:     {elapsed:8.2f} s")
+    print(f"  rate:      {n_lines / elapsed:10,.0f} lines/s  {size / 1e6 / elapsed:6.1f} MB/s")
+    print(f"  per GB:    {elapsed * 1e9 / size:8.1f} s")
+
+    _, bulk = timed_parse(path, 1, bulk=True)
+    print(f"  bulk:      {bulk:8.2f} s ({elapsed / bulk:.2f}x)")
+
+    start = time.perf_counter()
+    log_index = LogIndex(path)
+    indexed = time.perf_counter() - start
+    if log_index.sessions:
+        log_index.sessions[0]["altitude"]
+    first_channel = time.perf_counter() - start - indexed
+    log_index.close()
+    print(f"  index:     {indexed:8.2f} s, then {first_channel * 1e3:.1f} ms for one channel")
+
+    if workers != 1:
+        if size < PARALLEL_MIN_BYTES_BULK:
+            print(f"  parallel:  skipped, bulk parsing stays serial below "
+                  f"{PARALLEL_MIN_BYTES_BULK / 1e6:.0f} MB")
+            return
+        _, parallel = timed_parse(path, workers, bulk=True)
+        print(f"  parallel:  {parallel:8.2f} s bulk with {workers or os.cpu_count()} workers "
+              f"({bulk / parallel:.2f}x over serial bulk)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LogParser.parse_log_file")
+    parser.add_argument("paths", nargs="*", help="Log files to parse")
+    parser.add_argument("--generate", type=float, metavar="SIZE_MB",
+                        help="Generate a synthetic log of this size first")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Also time the parallel parser with this many processes (0 = all CPUs)")
+    args = parser.parse_args()
+    workers = args.workers or None
+
+    paths = args.paths
+    size_mb = args.generate
+    if size_mb is None and not paths:
+        size_mb = 100
+    if size_mb is not None:
+        if not paths:
+            paths = [os.path.join(tempfile.gettempdir(), f"bench_guidance_{size_mb:g}mb.log")]
+        if args.generate is not None or not os.path.exists(paths[0]):
+            print(f"Generating {size_mb:g} MB log at {paths[0]}...")
+            generate_log(paths[0], size_mb)
+
+    for path in paths:
+        bench(path, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Import-time regression check for the log tooling.
+
+Each module is imported in a fresh interpreter, best of --repeat runs. The check
+fails (exit status 1) if a module pulls in a package it must not load, or if its
+import costs more than its budget on top of importing numpy, which every module
+needs anyway. Measuring against numpy keeps the budgets meaningful on slow and
+fast machines alike.
+
+Usage:
+    python check_import_time.py [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+# module -> (packages it must not import, budget in ms over numpy)
+CHECKS = {
+    "log_parser": (("matplotlib", "tkinter", "plot", "log_alignment"), 100),
+    "log_alignment": (("matplotlib", "tkinter", "plot", "log_parser"), 50),
+    "log_corpus": (("matplotlib", "tkinter", "plot"), 100),
+    "plot": (("matplotlib.pyplot", "matplotlib.figure", "matplotlib.backends.backend_agg",
+              "matplotlib.backends.backend_tkagg", "tkinter", "log_corpus"), None),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1e3, "modules": list(sys.modules)}}))
+"""
+
+
+def import_time(module, repeat):
+    """
+    :return: (best import time in ms, modules loaded by the import)
+    """
+    best, modules = float("inf"), []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", PROBE.format(module=module)],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        if probe["ms"] < best:
+            best, modules = probe["ms"], probe["modules"]
+    return best, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import times of the log tooling")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module; the fastest counts")
+    args = parser.parse_args()
+
+    baseline, _ = import_time("numpy", args.repeat)
+    print(f"{'numpy':<15}{baseline:8.1f} ms")
+
+    failed = False
+    for module, (forbidden, budget_ms) in CHECKS.items():
+        elapsed, modules = import_time(module, args.repeat)
+        loaded = [package for package in forbidden
+                  if any(name == package or name.startswith(package + ".") for name in modules)]
+        problems = []
+        if loaded:
+            problems.append("imports " + ", ".join(loaded))
+        if budget_ms is not None and elapsed - baseline > budget_ms:
+            problems.append(f"{elapsed - baseline:.1f} ms over numpy, budget {budget_ms} ms")
+        failed |= bool(problems)
+        print(f"{module:<15}{elapsed:8.1f} ms  {'FAIL: ' + '; '.join(problems) if problems else 'ok'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Time alignment of parsed log sessions.
+
+Channels are logged at different, irregular rates, each with its record times in
+a "<channel>_time" column (POSIX seconds, see log_parser.LogParser). resample() maps a
+channel onto any time base with searchsorted/interp, and SessionAligner lines up
+a set of channels on a common base and caches the aligned frames per session, so
+derived quantities such as relative_position_error() are one numpy pass over a
+whole flight.
+
+Methods:
+    nearest  value of the closest record in time
+    linear   linear interpolation between the neighbouring records
+    zoh      zero-order hold: the last record at or before each time
+Times outside a channel's recorded span give NaN rather than extrapolating.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+METHODS = ("nearest", "linear", "zoh")
+
+# Aligned frames a SessionAligner keeps before dropping the least recently used
+ALIGN_CACHE_FRAMES = 64
+
+EARTH_RADIUS_M = 6378137.0
+
+
+def resample(times, values, base, method="linear"):
+    """
+    Resample the records (times, values) at the times in `base`.
+
+    :param times: Record times, shape (n,). NaN times are dropped.
+    :param values: Records, shape (n,), (n, k) or a structured array of n rows.
+    :param base: Times to resample at, shape (m,).
+    :param method: One of METHODS.
+    :return: float64 array of shape (m,) or (m, k); structured input gives a
+        structured float64 array with the same fields.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown resampling method: {method}")
+    base = np.asarray(base, dtype=np.float64)
+    values = np.asarray(values)
+    fields = values.dtype.names
+    if fields:
+        columns = np.stack([values[field].astype(np.float64) for field in fields], axis=-1)
+    else:
+        columns = values.astype(np.float64).reshape(len(values), values.shape[1] if values.ndim > 1 else 1)
+
+    times = np.asarray(times, dtype=np.float64)
+    keep = ~np.isnan(times)
+    times, columns = times[keep], columns[keep]
+    if len(times) > 1 and np.any(np.diff(times) < 0):
+        order = np.argsort(times, kind='stable')
+        times, columns = times[order], columns[order]
+
+    result = np.full((len(base), columns.shape[1]), np.nan)
+    if len(times):
+        inside = (base >= times[0]) & (base <= times[-1])
+        at = base[inside]
+        if method == "linear":
+            for column in range(columns.shape[1]):
+                result[inside, column] = np.interp(at, times, columns[:, column])
+        else:
+            right = np.searchsorted(times, at, side='right')
+            if method == "zoh":
+                index = right - 1
+            else:
+                left = np.maximum(right - 1, 0)
+                right = np.minimum(right, len(times) - 1)
+                index = np.where(at - times[left] <= times[right] - at, left, right)
+            result[inside] = columns[index]
+
+    if fields:
+        dtype = np.dtype([(field, np.float64) for field in fields])
+        return np.ascontiguousarray(result).view(dtype).reshape(-1)
+    return result.reshape(-1) if values.ndim == 1 else result
+
+
+def uniform_base(session, channels, rate):
+    """
+    Evenly spaced times at `rate` Hz over the span where all `channels` have records.
+    """
+    first, last = -np.inf, np.inf
+    for name in channels:
+        times = session[name + "_time"]
+        times = times[~np.isnan(times)]
+        if not len(times):
+            return np.empty(0)
+        first, last = max(first, times.min()), min(last, times.max())
+    if last < first:
+        return np.empty(0)
+    return first + np.arange(int(np.floor((last - first) * rate)) + 1) / rate
+
+
+class SessionAligner:
+    """
+    Aligns channels of sessions on a common time base and caches the results.
+
+    Frames are cached per session, channel set, base and method. They are
+    recomputed when a channel of the session grows (follow mode) and evicted in
+    LRU order beyond max_frames.
+    """
+
+    def __init__(self, max_frames=ALIGN_CACHE_FRAMES):
+        self.max_frames = max_frames
+        self._frames = OrderedDict()  # key -> (session, frame)
+
+    def align(self, session, channels, base=None, method="linear"):
+        """
+        Resample `channels` of a session onto one time base.
+
+        :param channels: Channel names; each needs a "<channel>_time" column.
+        :param base: Channel name whose record times are the base, a rate in Hz
+            for a uniform base over the common span, or None for the first channel.
+        :return: Dict with "time" (the base) and each channel resampled at it.
+        """
+        channels = tuple(channels)
+        if base is None:
+            base = channels[0]
+        sources = channels + ((base,) if isinstance(base, str) else ())
+        lengths = tuple(len(session[name + "_time"]) for name in sources)
+        key = (id(session), channels, base, method, lengths)
+
+        cached = self._frames.get(key)
+        if cached is not None and cached[0] is session:
+            self._frames.move_to_end(key)
+            return cached[1]
+
+        if isinstance(base, str):
+            times = session[base + "_time"]
+        else:
+            times = uniform_base(session, channels, base)
+        frame = {"time": times}
+        for name in channels:
+            frame[name] = resample(session[name + "_time"], session[name], times, method)
+
+        self._frames[key] = (session, frame)
+        while len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return frame
+
+    def clear(self):
+        self._frames.clear()
+
+
+def relative_position_error(session, aligner=None, method="linear"):
+    """
+    Target position relative to the interceptor, with the target resampled at the
+    interceptor's record times. Locations are (lat, lon, alt); the horizontal
+    offset uses a local flat-earth approximation.
+
+    :return: (times, error) with error an (n, 3) array of (north, east, up) metres.
+    """
+    if aligner is None:
+        aligner = SessionAligner()
+    frame = aligner.align(session, ("interceptor_location", "target_location"), method=method)
+    interceptor = frame["interceptor_location"]
+    target = frame["target_location"]
+
+    lat = np.radians(interceptor[:, 0])
+    north = np.radians(target[:, 0] - interceptor[:, 0]) * EARTH_RADIUS_M
+    east = np.radians(target[:, 1] - interceptor[:, 1]) * EARTH_RADIUS_M * np.cos(lat)
+    up = target[:, 2] - interceptor[:, 2]
+    return frame["time"], np.column_stack((north, east, up))
@@ -0,0 +1,248 @@
+"""
+SQLite index of per-session summaries across a directory of guidance logs.
+
+LogCorpus.update() scans log files and stores one row per GUIDED session:
+file, byte range, start time, duration, frames, minimum distance to target, RMS
+altitude error (drone minus target altitude, the target resampled at the
+drone's record times), maximum speed and the channels the session logged. A
+file is re-read only when its size or mtime changed, and rows of deleted files
+are dropped, so updating a corpus of hundreds of logs costs a stat per file.
+Sessions are read through a LogIndex, which parses only the summarized channels.
+
+Usage:
+    python log_corpus.py [--db PATH] [--workers N] [--where SQL] [log_file_or_dir ...]
+
+Example:
+    python log_corpus.py --where "min_distance < 2"
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from log_alignment import resample
+from log_parser import LOG_DIR, LogIndex
+
+
+# Bump when the summary columns change; older databases are rebuilt
+CORPUS_VERSION = 1
+
+DEFAULT_CORPUS_DB = os.path.join(os.path.expanduser("~"), ".cache", "log_plotter", "corpus.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    session INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    start_time REAL,
+    duration_s REAL,
+    frames INTEGER NOT NULL,
+    min_distance REAL,
+    rms_altitude_error REAL,
+    max_speed REAL,
+    channels TEXT NOT NULL,
+    PRIMARY KEY (path, session)
+);
+CREATE INDEX IF NOT EXISTS sessions_min_distance ON sessions (min_distance);
+"""
+
+SESSION_COLUMNS = ("path", "session", "start_offset", "end_offset", "start_time", "duration_s",
+                   "frames", "min_distance", "rms_altitude_error", "max_speed", "channels")
+
+
+def _finite(value):
+    """A float for SQLite, or None for NaN."""
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def _reduce(values, reduce):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    return float(reduce(values)) if len(values) else None
+
+
+def summarize_session(session):
+    """
+    Summary of one session from a LogIndex.
+
+    :return: Dict with the sessions columns except path and session.
+    """
+    altitude_error = None
+    if len(session["altitude"]) and len(session["target_altitude"]):
+        target = resample(session["target_altitude_time"], session["target_altitude"],
+                          session["altitude_time"])
+        altitude_error = _reduce(session["altitude"] - target, lambda error: np.sqrt(np.mean(error ** 2)))
+
+    speed = session["speed"]
+    if not len(speed):
+        speed = session["velocity_norm"]
+
+    return {
+        "start_offset": session.start,
+        "end_offset": session.end,
+        "start_time": _finite(session.start_time),
+        "duration_s": _finite(session.end_time - session.start_time),
+        "frames": len(session["frame_number"]),
+        "min_distance": _reduce(session["distance_to_target"], np.min),
+        "rms_altitude_error": altitude_error,
+        "max_speed": _reduce(speed, np.max),
+        "channels": ",".join(session.marked_channels()),
+    }
+
+
+def summarize_log(log_file_path):
+    """Summaries of every GUIDED session of a log, in file order."""
+    log_index = LogIndex(log_file_path)
+    try:
+        summaries = []
+        for session in log_index.sessions:
+            summaries.append(summarize_session(session))
+            session.unload()  # Only the summary is kept
+        return summaries
+    finally:
+        log_index.close()
+
+
+class LogCorpus:
+    """
+    Session summaries of many logs in one SQLite database.
+
+    Query with SQL conditions on the sessions columns, e.g.
+    corpus.query("min_distance < ? AND channels LIKE '%bs_state%'", (2.0,)).
+    """
+
+    def __init__(self, db_path=None):
+        """
+        :param db_path: SQLite file, ~/.cache/log_plotter/corpus.sqlite by default.
+        """
+        self.db_path = db_path or DEFAULT_CORPUS_DB
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != CORPUS_VERSION:
+            with self._db:
+                self._db.execute("DROP TABLE IF EXISTS sessions")
+                self._db.execute("DROP TABLE IF EXISTS files")
+                self._db.execute(f"PRAGMA user_version = {CORPUS_VERSION}")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def update(self, paths=(LOG_DIR,), workers=1):
+        """
+        Index new and changed logs and drop the rows of logs that no longer exist.
+
+        :param paths: Log files and directories of *.log files.
+        :param workers: Processes summarizing changed logs; None uses all CPUs.
+        :return: (logs indexed, logs unchanged, logs removed)
+        """
+        logs = {}  # Absolute path -> os.stat_result
+        directories = []
+        for path in paths:
+            if os.path.isdir(path):
+                directories.append(os.path.abspath(path))
+                found = glob.glob(os.path.join(path, "*.log"))
+            else:
+                found = [path]
+            for log_path in found:
+                logs[os.path.abspath(log_path)] = os.stat(log_path)
+
+        known = {row["path"]: (row["size"], row["mtime_ns"])
+                 for row in self._db.execute("SELECT path, size, mtime_ns FROM files")}
+        changed = sorted(path for path, stat in logs.items()
+                         if known.get(path) != (stat.st_size, stat.st_mtime_ns))
+        removed = [path for path in known
+                   if path not in logs and os.path.dirname(path) in directories]
+
+        if workers == 1 or len(changed) < 2:
+            summaries = map(summarize_log, changed)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            summaries = executor.map(summarize_log, changed)
+        try:
+            for path, sessions in zip(changed, summaries):
+                stat = logs[path]
+                with self._db:  # One transaction per log: an interrupted update keeps whole logs
+                    self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+                    self._db.execute("INSERT INTO files VALUES (?, ?, ?)",
+                                     (path, stat.st_size, stat.st_mtime_ns))
+                    self._db.executemany(
+                        f"INSERT INTO sessions VALUES ({', '.join('?' * len(SESSION_COLUMNS))})",
+                        [tuple(dict(summary, path=path, session=index)[column] for column in SESSION_COLUMNS)
+                         for index, summary in enumerate(sessions)])
+        finally:
+            if workers != 1 and len(changed) >= 2:
+                executor.shutdown()
+
+        with self._db:
+            self._db.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+        return len(changed), len(logs) - len(changed), len(removed)
+
+    def query(self, where=None, params=(), order_by="path, session"):
+        """
+        Session summaries matching an SQL condition.
+
+        :param where: Condition on the sessions columns, with ? placeholders. It is
+            pasted into the SQL as is, so it must come from the user of the corpus,
+            never from log contents or other untrusted input.
+        :param params: Values for the placeholders; pass values here rather than
+            formatting them into `where`.
+        :param order_by: ORDER BY clause, pasted in like `where`.
+        :return: List of sqlite3.Row with the sessions columns.
+        """
+        sql = "SELECT * FROM sessions"
+        if where:
+            sql += f" WHERE {where}"
+        return self._db.execute(f"{sql} ORDER BY {order_by}", params).fetchall()
+
+
+def format_summary(row):
+    """One line describing a session row, for listings. Times are UTC, like the log's."""
+    def number(value, fmt):
+        return "-" if value is None else format(value, fmt)
+
+    started = "-"
+    if row["start_time"] is not None:
+        # parse_timestamps reads log times as UTC; local time would shift them
+        started = datetime.fromtimestamp(row["start_time"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return (f"{os.path.basename(row['path'])} test {row['session'] + 1}: {started}, "
+            f"{number(row['duration_s'], '.1f')} s, {row['frames']} frames, "
+            f"min dist {number(row['min_distance'], '.2f')} m, "
+            f"RMS alt err {number(row['rms_altitude_error'], '.2f')} m, "
+            f"max speed {number(row['max_speed'], '.2f')} m/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index guidance logs and query session summaries")
+    parser.add_argument("paths", nargs="*", help="Log files and directories (default: output/logs)")
+    parser.add_argument("--db", help="SQLite database (default: ~/.cache/log_plotter/corpus.sqlite)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes summarizing changed logs (0 = all CPUs)")
+    parser.add_argument("--where", help="SQL condition on the session columns, e.g. \"min_distance < 2\"")
+    args = parser.parse_args()
+
+    corpus = LogCorpus(args.db)
+    try:
+        indexed, unchanged, removed = corpus.update(args.paths or [LOG_DIR], workers=args.workers or None)
+        print(f"Indexed {indexed} log(s), {unchanged} unchanged, {removed} removed")
+        for row in corpus.query(args.where):
+            print(format_summary(row))
+    finally:
+        corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1322 @@
+"""
+Parser and data model for visual guidance logs.
+
+LogParser turns the GUIDED mode sessions of a log into dicts of numpy arrays,
+one per channel plus a "<channel>_time" column of record times. SessionCache,
+LogIndex/LazySession, LogLoader and LogFollower load those sessions from a
+cache, lazily, in worker processes, or while the log grows. The module only
+needs numpy, so scripts and worker processes can import it without matplotlib
+or Tk; plot.py re-exports its names.
+"""
+
+import array
+import hashlib
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import re
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# Where the guidance stack writes its logs
+LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "output", "logs")
+
+# Value patterns shared by several log tags
+NUM = r'([\d\.\-]+)'
+TRIPLE_PAREN = re.compile(r'\(' + r',\s*'.join([NUM] * 3) + r'\)')
+TRIPLE_BRACKET = re.compile(r'\[' + r',\s*'.join([NUM] * 3) + r'\]')
+PAIR_PAREN = re.compile(r'\(' + NUM + r',\s*' + NUM + r'\)')
+
+
+class LogTag:
+    """
+    One kind of data line: the marker that identifies it, the precompiled pattern
+    for its values, and the session channel(s) the values are stored in.
+    """
+
+    __slots__ = ("marker", "head", "pattern", "channels", "convert", "excludes", "prefix",
+                 "timestamped", "time_key", "bulk_pattern")
+
+    def __init__(self, marker, pattern, channels, excludes=(), prefix="", timestamped=False):
+        """
+        :param marker: Substring that identifies the line, e.g. "Frame Number:".
+        :param pattern: Regex string or compiled pattern for the values.
+        :param channels: Channel name for all values, or a tuple with one channel per value.
+        :param excludes: Substrings that disqualify a line containing the marker.
+        :param prefix: Required start of the line, if any.
+        :param timestamped: Also store the line's timestamp in "timestamps".
+        """
+        self.marker = marker
+        end = marker.index(']' if marker.startswith('[') else ':') + 1
+        self.head = marker[:end]
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.channels = (channels,) if isinstance(channels, str) else channels
+        self.convert = int if CHANNELS[self.channels[0]][0] == 'q' else float
+        self.excludes = excludes
+        self.prefix = prefix
+        self.timestamped = timestamped
+        self.time_key = self.channels[0] + "_time"  # Parse storage of the record timestamps
+        self.bulk_pattern = self._compile_bulk_pattern()
+
+    def accepts(self, line):
+        if not line.startswith(self.prefix):
+            return False
+        for word in self.excludes:
+            if word in line:
+                return False
+        return True
+
+    def extract(self, data, match, line):
+        # Convert every value before storing so a bad one leaves no partial row
+        values = list(map(self.convert, match.groups()))
+        if len(self.channels) == 1:
+            data[self.channels[0]].extend(values)
+        else:
+            for channel, value in zip(self.channels, values):
+                data[channel].append(value)
+        timestamp_str, sep, _ = line.partition(' - ')
+        data[self.time_key].append(timestamp_str)
+        if self.timestamped and sep:
+            data["timestamps"].append(timestamp_str)
+
+    def _compile_bulk_pattern(self):
+        """
+        Bytes pattern that finds this tag's lines in a whole block of log text.
+
+        The pattern starts with the marker literal, which lets the regex engine skip
+        through the block quickly, and a lookbehind then requires the marker to start
+        a message: right after ' - ', or at the start of a line without the
+        "<timestamp> - " prefix. Values are captured as in self.pattern, with
+        \\s narrowed so no match crosses a line. Prefix, excludes and the
+        "timestamps" strings need the whole line and are handled by parse_block_bulk.
+        """
+        values = self.pattern.pattern.replace(r'\s', r'[^\S\n]')
+        marker = re.escape(self.marker)
+        pattern = marker + '(?:(?<= - ' + marker + ')|(?<=^' + marker + '))'
+        # Value patterns that repeat the end of the marker continue right after it
+        for start in range(len(self.marker)):
+            if (start == 0 or self.marker[start - 1] == ' ') and values.startswith(self.marker[start:]):
+                pattern += values[len(self.marker) - start:]
+                break
+        else:
+            pattern += r'[^\n]*?' + values
+        return re.compile(pattern.encode(), re.MULTILINE)
+
+
+# Session channel layout: name -> (array typecode, columns). Columns is None for
+# a scalar series, a row width for vectors, or field names for structured rows.
+CHANNELS = {
+    "frame_number": ('q', None),
+    "interceptor_location": ('d', 3),
+    "target_location": ('d', 3),
+    "altitude": ('d', None),
+    "target_altitude": ('d', None),
+    "attitude": ('d', 3),  # Roll, Pitch, Yaw in degrees
+    "velocity": ('d', 3),
+    "target_velocity": ('d', 3),
+    "angular_velocity": ('d', 3),
+    "linear_velocity": ('d', 3),
+    "distance_to_target": ('d', None),
+    "speed": ('d', None),
+    "pixel_errors": ('d', 2),
+    "virtual_pixel_errors": ('d', 2),
+    "pixel_x": ('d', None),
+    "pixel_y": ('d', None),
+    "depth": ('d', None),
+    "depth_virtual": ('d', None),
+    "desired_accel_initial": ('d', 3),
+    "desired_accel_final": ('d', 3),
+    "xyz_pseudo": ('d', 3),
+    "control_commands": ('d', 4),  # Pitch, Yaw, Roll, Thrust
+    "bs_throttle": ('d', ('thr', 'alt_err', 'rate_err', 'a_cmd')),
+    "bs_roll": ('d', ('phi', 'east_err', 'vel_err', 'a_lat')),
+    "bs_levant": ('d', ('rate_hat', 'accel_hat')),  # Levant differentiator for throttle
+    # Levant altitude state: altitude, outer rate, inner rate and acceleration estimates
+    "levant_alt_state": ('d', ('z1_a', 'z1_r', 'z2_r', 'z2_a')),
+    "bs_roll_levant": ('d', ('vel_hat', 'accel_hat')),  # Levant differentiator for roll
+    "bs_state": ('d', ('drone_alt', 'target_alt', 'drone_vz', 'drone_az')),  # Backstepping state data
+    "error_acc": ('d', None),
+    "virtual_east_accel": ('d', None),
+    "virtual_down_accel": ('d', None),
+    "target_heading": ('d', None),
+    "error_old_xy": ('d', None),
+    "error_old_z": ('d', None),
+    "raw_imu": ('d', 3),  # Raw IMU accelerometer data [x, y, z]
+}
+
+# Structured dtypes for the channels with named fields
+CHANNEL_DTYPES = {
+    name: np.dtype([(field, np.float64) for field in columns])
+    for name, (typecode, columns) in CHANNELS.items()
+    if isinstance(columns, tuple)
+}
+
+# Lines that can start or end a GUIDED session
+DRONE_MODE_PATTERN = re.compile(rb'Drone Mode:')
+
+# Below this file size parse_log_file stays serial; process startup would dominate
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+# The same for the bulk parser, which is fast enough that sending chunks to workers
+# and their results back cost as much as it saves on logs of a few tens of MB
+PARALLEL_MIN_BYTES_BULK = 64 * 1024 * 1024
+
+# Bump when the parsed session layout or contents change so stale cache entries are ignored
+CACHE_VERSION = 4
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3
+# Bytes hashed at each end of a log for the cache fingerprint
+FINGERPRINT_BYTES = 1024 * 1024
+
+# Bytes of the log scanned per numpy pass while indexing a session
+INDEX_BLOCK_BYTES = 64 * 1024 * 1024
+# Parsed session data a LogIndex keeps before unloading least recently used sessions
+SESSION_MEMORY_BYTES = 1024 ** 3
+
+# Initial rows allocated per channel by LogFollower
+FOLLOW_MIN_CAPACITY = 1024
+# Bytes of a session handed to one LogLoader worker task
+LOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+# Every data line the parser understands, in the priority order of the old
+# if/elif chain, which still decides between several markers on one line.
+TAGS = (
+    LogTag("Frame Number:", r'Frame Number:\s*(\d+)', "frame_number", timestamped=True),
+    LogTag("Interceptor Location:", TRIPLE_PAREN, "interceptor_location"),
+    LogTag("Altitude:", r'Altitude:\s*([\d\.\-]+)', "altitude",
+           excludes=("Target", "Relative"), prefix="2"),
+    LogTag("Attitude (R,P,Y):", TRIPLE_PAREN, "attitude"),
+    LogTag("Velocity:", TRIPLE_BRACKET, "velocity", excludes=("Target", "Angular", "Linear")),
+    LogTag("Target Location:", TRIPLE_PAREN, "target_location"),
+    LogTag("Target Altitude:", r'Target Altitude:\s*([\d\.\-]+)', "target_altitude"),
+    LogTag("Target Velocity:", r'Vx:\s*([\d\.\-]+),\s*Vy:\s*([\d\.\-]+),\s*Vz:\s*([\d\.\-]+)',
+           "target_velocity"),
+    LogTag("Distance to target:", r'Distance to target:\s*([\d\.\-]+)', "distance_to_target"),
+    LogTag("Speed:", r'Speed:\s*([\d\.\-]+)', "speed"),
+    LogTag("Angular Velocity:", TRIPLE_BRACKET, "angular_velocity"),
+    LogTag("Linear Velocity:", TRIPLE_BRACKET, "linear_velocity"),
+    LogTag("Virtual Pixel X:",
+           r'Virtual Pixel X:\s*([\d\.\-]+),\s*Virtual Pixel Y:\s*([\d\.\-]+),\s*Depth:\s*([\d\.\-]+)',
+           ("pixel_x", "pixel_y", "depth")),
+    LogTag("Depth Virtual:", r'Depth Virtual:\s*([\d\.\-]+)', "depth_virtual"),
+    LogTag("Pixel errors:", PAIR_PAREN, "pixel_errors", excludes=("Virtual",)),
+    LogTag("Virtual Pixel errors:", PAIR_PAREN, "virtual_pixel_errors"),
+    LogTag("Desired Acceleration (initial):", TRIPLE_BRACKET, "desired_accel_initial"),
+    LogTag("Accel Desired (final):", TRIPLE_BRACKET, "desired_accel_final"),
+    LogTag("XYZPseudoFrame:", r'\[\s*([\d\.\-e]+)\s+([\d\.\-e]+)\s+([\d\.\-e]+)\s*\]', "xyz_pseudo"),
+    LogTag("Target Heading New:", r'Target Heading New:\s*([\d\.\-]+)', "target_heading"),
+    LogTag("Error ACC:", r'Error ACC:\s*([\d\.\-]+)', "error_acc"),
+    LogTag("Virtual East Acceleration:", r'Virtual East Acceleration:\s*([\d\.\-]+)',
+           "virtual_east_accel"),
+    LogTag("Virtual Down Acceleration:", r'Virtual Down Acceleration:\s*([\d\.\-]+)',
+           "virtual_down_accel"),
+    LogTag("Control Commands - Pitch:",
+           r'Pitch:\s*([\d\.\-]+),\s*Yaw:\s*([\d\.\-]+),\s*Roll:\s*([\d\.\-]+),\s*Thrust:\s*([\d\.\-]+)',
+           "control_commands"),
+    LogTag("[BS_THROTTLE]",
+           r'thr=([\d\.\-]+),\s*alt_err=([\d\.\-]+)m,\s*rate_err=([\d\.\-]+)m/s,\s*a_cmd=([\d\.\-]+)',
+           "bs_throttle"),
+    LogTag("[BS_ROLL]",
+           r'phi=([\d\.\-]+)deg,\s*east_err=([\d\.\-]+)m,\s*vel_err=([\d\.\-]+)m/s,\s*a_lat=([\d\.\-]+)',
+           "bs_roll", excludes=("LEVANT",)),
+    LogTag("[BS_LEVANT]", r'rate_hat=([\d\.\-]+)m/s,\s*accel_hat=([\d\.\-]+)m/s',
+           "bs_levant"),
+    LogTag("[BS_ROLL_LEVANT]", r'vel_hat=([\d\.\-]+)m/s,\s*accel_hat=([\d\.\-]+)m/s',
+           "bs_roll_levant"),
+    LogTag("[LEVANT_ALT_OUT]", r'next_state=\[' + r',\s*'.join([NUM] * 4) + r'\]',
+           "levant_alt_state"),
+    LogTag("[BS_STATE]",
+           r'drone_alt=([\d\.\-]+)m,\s*target_alt=([\d\.\-]+)m,\s*drone_vz=([\d\.\-]+)m/s,\s*drone_az=([\d\.\-]+)m/s',
+           "bs_state"),
+    LogTag("Error Old XY:", r'Error Old XY:\s*([\d\.\-e]+)', "error_old_xy"),
+    LogTag("Error Old Z:", r'Error Old Z:\s*([\d\.\-e]+)', "error_old_z"),
+    LogTag("[BS_ACCEL_MEAS] raw_imu=", r'raw_imu=\[' + r',\s*'.join([NUM] * 3) + r'\]', "raw_imu"),
+)
+
+TAGS_BY_HEAD = {tag.head: tag for tag in TAGS}
+TAG_BY_CHANNEL = {channel: tag for tag in TAGS for channel in tag.channels}
+
+
+def _earlier_markers(tag):
+    """
+    Pattern for the markers of the tags before `tag` in TAGS, which take priority
+    on a line with both. Markers inside tag's own marker whose tag excludes a word
+    of it (e.g. "Altitude:" in "Target Altitude:") can never take priority and are
+    left out, or every such line would look like it had two markers.
+    """
+    markers = [earlier.marker for earlier in TAGS[:TAGS.index(tag)]
+               if not (earlier.marker in tag.marker
+                       and any(word in tag.marker for word in earlier.excludes))]
+    return re.compile('|'.join(map(re.escape, markers))) if markers else None
+
+
+EARLIER_MARKERS = {tag: _earlier_markers(tag) for tag in TAGS}
+# The last two characters of every head, as character classes: a line where they
+# occur only at its own head cannot hold a second marker
+HEAD_ENDS = re.compile('[' + ''.join(sorted({re.escape(tag.head[-2]) for tag in TAGS})) + ']'
+                       + '[' + ''.join(sorted({re.escape(tag.head[-1]) for tag in TAGS})) + ']')
+
+# Channels computed from another channel: name -> (source channel, function)
+DERIVED_CHANNELS = {
+    "velocity_norm": ("velocity", lambda velocity: np.sqrt(np.einsum('ij,ij->i', velocity, velocity))),
+    "throttle": ("control_commands", lambda commands: commands[:, 3].copy()),
+}
+
+# "<channel>_time" column of every channel: its record timestamps in POSIX seconds
+TIME_KEYS = {name: name + "_time" for name in tuple(CHANNELS) + tuple(DERIVED_CHANNELS)}
+
+# Every key of a finalized session dict, in order. "start_time" is the timestamp
+# of the session's first line, for elapsed-time axes.
+SESSION_KEYS = (tuple(CHANNELS) + ("timestamps",) + tuple(DERIVED_CHANNELS)
+                + tuple(TIME_KEYS.values()) + ("start_time",))
+
+# Log timestamps look like "2025-01-01 12:00:00,004": separator column -> byte
+TIMESTAMP_LEN = 23
+TIMESTAMP_SEPARATORS = {4: b'-', 7: b'-', 10: b' ', 13: b':', 16: b':', 19: b','}
+
+
+def _bytes_to_numbers(fields, typecode):
+    """
+    Convert an (n, k) array of captured byte strings to numbers.
+
+    :return: (values, ok) with the rows that converted and a boolean mask of them.
+        Rows with a malformed number are dropped, like _parse_line skips their lines.
+    """
+    try:
+        return fields.astype(typecode), np.ones(len(fields), dtype=bool)
+    except ValueError:
+        convert = int if typecode == 'q' else float
+        rows = []
+        ok = np.zeros(len(fields), dtype=bool)
+        for i, row in enumerate(fields.tolist()):
+            try:
+                rows.append([convert(value) for value in row])
+            except ValueError:
+                continue
+            ok[i] = True
+        return np.array(rows, dtype=typecode).reshape(-1, fields.shape[1]), ok
+
+
+def parse_timestamps(stamps):
+    """
+    Convert log timestamps (str or bytes, "YYYY-MM-DD HH:MM:SS,mmm") to float64
+    POSIX seconds in one vectorized pass; malformed ones become NaN. Times are
+    taken as UTC, which only matters for absolute values, not for differences.
+    """
+    try:
+        stamps = np.array(stamps, dtype=f'S{TIMESTAMP_LEN}')
+    except UnicodeEncodeError:
+        stamps = np.array([stamp.encode('ascii', 'replace') for stamp in stamps], dtype=f'S{TIMESTAMP_LEN}')
+    chars = np.ascontiguousarray(stamps.reshape(-1)).view(np.uint8).reshape(-1, TIMESTAMP_LEN)
+    digits = chars.astype(np.int32) - ord('0')
+
+    valid = np.ones(len(chars), dtype=bool)
+    for column in range(TIMESTAMP_LEN):
+        if column in TIMESTAMP_SEPARATORS:
+            valid &= chars[:, column] == ord(TIMESTAMP_SEPARATORS[column])
+        else:
+            valid &= (digits[:, column] >= 0) & (digits[:, column] <= 9)
+    digits[~valid] = 0
+
+    def number(first, last):
+        return digits[:, first:last] @ 10 ** np.arange(last - first - 1, -1, -1, dtype=np.int32)
+
+    months = (number(0, 4) - 1970).astype('datetime64[Y]') + np.maximum(number(5, 7) - 1, 0).astype('timedelta64[M]')
+    days = months.astype('datetime64[D]') + np.maximum(number(8, 10) - 1, 0).astype('timedelta64[D]')
+    seconds = (days.astype(np.int64) * 86400 + number(11, 13) * 3600 + number(14, 16) * 60
+               + number(17, 19) + number(20, 23) / 1000.0)
+    return np.where(valid, seconds, np.nan)
+
+
+def _find_heads(data, start, end):
+    """
+    Find where each tag's marker starts a message (follows " - ", or starts a line
+    without a timestamp) in data[start:end], data being a uint8 array of log text
+    that starts a line at `start`, in numpy passes of INDEX_BLOCK_BYTES.
+
+    Also finds the irregular lines, which bulk extraction would read differently
+    from _parse_line: lines with markers at two message heads, and lines with a
+    tag head away from a message head (e.g. "Current Altitude:"), unless the tag's
+    exclude word comes right before it (e.g. "Relative Altitude:").
+
+    :return: (tag -> sorted marker positions, line end positions with `end` as the
+        last one, sorted indices of the irregular lines into the line ends)
+    """
+    markers = {tag: np.frombuffer(tag.marker.encode(), dtype=np.uint8) for tag in TAGS}
+    head_bytes = {tag: np.frombuffer(tag.head.encode(), dtype=np.uint8) for tag in TAGS}
+    head_pairs = {tag: int(head[-2]) << 8 | int(head[-1]) for tag, head in head_bytes.items()}
+    is_head_pair = np.zeros(1 << 16, dtype=bool)
+    is_head_pair[list(head_pairs.values())] = True
+    terminators = sorted({int(head[-1]) for head in head_bytes.values()})
+    found = {tag: [] for tag in TAGS}
+    newlines = []
+    strays = []
+    for block_start in range(start, end, INDEX_BLOCK_BYTES):
+        block_end = min(block_start + INDEX_BLOCK_BYTES, end)
+        block = data[block_start:block_end]
+        block_newlines = np.flatnonzero(block == ord('\n')) + block_start
+        newlines.append(block_newlines)
+        # Separator dashes in this block with a space on both sides
+        lo = max(block_start, 1)
+        hi = min(block_end, end - 1)
+        dash = np.flatnonzero(data[lo:hi] == ord('-')) + lo
+        dash = dash[(data[dash - 1] == ord(' ')) & (data[dash + 1] == ord(' '))]
+        heads = dash[dash + 3 < end] + 2
+        # Starts of lines without a timestamp (timestamps start with a digit, no marker does)
+        line_starts = block_newlines + 1
+        if block_start == start or data[block_start - 1] == ord('\n'):
+            line_starts = np.insert(line_starts, 0, block_start)
+        line_starts = line_starts[line_starts < end - 1]
+        line_starts = line_starts[(data[line_starts] < ord('0')) | (data[line_starts] > ord('9'))]
+        if len(line_starts):
+            heads = np.sort(np.concatenate([heads, line_starts]))
+        # First two bytes of each message narrow the candidates of every tag
+        keys = data[heads].astype(np.uint16) << 8 | data[heads + 1]
+        for tag, marker in markers.items():
+            candidates = heads[keys == (int(marker[0]) << 8 | int(marker[1]))]
+            candidates = candidates[candidates <= end - len(marker)]
+            for i, byte in enumerate(marker[2:], 2):
+                candidates = candidates[data[candidates + i] == byte]
+            found[tag].append(candidates)
+
+        # Head endings in the block that end no head found above (a shorter head
+        # ending there is part of the found one, like "Altitude:" of "Target Altitude:")
+        is_end = block == terminators[0]
+        for terminator in terminators[1:]:
+            is_end |= block == terminator
+        ends = np.flatnonzero(is_end) + block_start
+        ends = ends[ends > start]
+        pairs = data[ends - 1].astype(np.uint16) << 8 | data[ends]
+        keep = is_head_pair[pairs]
+        ends, pairs = ends[keep], pairs[keep]
+        keep = np.ones(len(ends), dtype=bool)
+        for tag, positions in found.items():
+            last = positions[-1] + len(head_bytes[tag]) - 1
+            at = np.searchsorted(ends, last)
+            at = at[at < len(ends)]
+            keep[at[ends[at] == last[:len(at)]]] = False
+        ends, pairs = ends[keep], pairs[keep]
+        # Of those, the ones preceded by the rest of a head are strays
+        for tag, head in head_bytes.items():
+            candidates = ends[pairs == head_pairs[tag]]
+            candidates = candidates[candidates - len(head) + 1 >= start]
+            for i in range(3, len(head) + 1):
+                candidates = candidates[data[candidates - i + 1] == head[-i]]
+            for word in tag.excludes:
+                # "<word> <marker>" always comes with a word that excludes the tag
+                before = np.frombuffer((word + ' ').encode(), dtype=np.uint8)
+                first = candidates - len(head) + 1 - len(before)
+                excluded = first >= start
+                for i, byte in enumerate(before):
+                    excluded[excluded] = data[first[excluded] + i] == byte
+                candidates = candidates[~excluded]
+            strays.append(candidates)
+
+    heads = {tag: np.concatenate(positions) if positions else np.empty(0, dtype=np.intp)
+             for tag, positions in found.items()}
+    newlines = np.append(np.concatenate(newlines) if newlines else np.empty(0, dtype=np.intp), end)
+    # Lines holding a stray head or more than one found head
+    all_heads = np.concatenate(list(heads.values()))
+    heads_per_line = np.bincount(np.searchsorted(newlines, all_heads), minlength=len(newlines))
+    stray_lines = np.searchsorted(newlines, np.concatenate(strays)) if strays else np.empty(0, dtype=np.intp)
+    irregular = np.union1d(np.flatnonzero(heads_per_line > 1), stray_lines)
+    return heads, newlines, irregular
+
+
+def _line_timestamps(data, positions, newlines, start=0):
+    """
+    Timestamp bytes at the start of the lines containing `positions`, with the
+    line ends of data[start:] from _find_heads.
+    """
+    positions = np.asarray(positions, dtype=np.intp)
+    line = np.searchsorted(newlines, positions)
+    starts = np.where(line > 0, newlines[np.maximum(line - 1, 0)] + 1, start)
+    columns = np.minimum(starts[:, None] + np.arange(TIMESTAMP_LEN), len(data) - 1)
+    return np.ascontiguousarray(data[columns]).view(f'S{TIMESTAMP_LEN}').reshape(-1)
+
+
+class LogParser:
+    """Parser for visual guidance log files."""
+    
+    @staticmethod
+    def create_empty_data_dict():
+        """
+        Create the growable per-channel storage used while parsing a session.
+
+        Every channel is a flat typed array.array (vectors and structured rows are
+        stored row after row); finalize_session() turns it into numpy arrays.
+        """
+        data = {name: array.array(typecode) for name, (typecode, columns) in CHANNELS.items()}
+        data["timestamps"] = []
+        for tag in TAGS:
+            data[tag.time_key] = []
+        data["start_time"] = None  # Timestamp string of the first parsed line
+        return data
+
+    @staticmethod
+    def finalize_session(data):
+        """
+        Convert parsing storage from create_empty_data_dict() into the session dict
+        used for plotting: scalar channels become 1-D arrays, vectors (n, width)
+        arrays and named-field channels structured arrays. velocity_norm and
+        throttle are derived from velocity and control_commands. Every channel gets
+        a "<channel>_time" column of record times in POSIX seconds.
+        """
+        session = {name: LogParser.finalize_channel(name, data[name]) for name in CHANNELS}
+        session["timestamps"] = np.array(data["timestamps"], dtype=str)
+        for name, (source, derive) in DERIVED_CHANNELS.items():
+            session[name] = derive(session[source])
+        times = {tag: parse_timestamps(data[tag.time_key]) for tag in TAGS}
+        for name in CHANNELS:
+            session[TIME_KEYS[name]] = times[TAG_BY_CHANNEL[name]]
+        for name, (source, derive) in DERIVED_CHANNELS.items():
+            session[TIME_KEYS[name]] = session[TIME_KEYS[source]]
+        session["start_time"] = parse_timestamps([data["start_time"] or ""])[0]
+        return session
+
+    @staticmethod
+    def finalize_channel(name, values):
+        """Shape the flat values of one channel like finalize_session() does."""
+        typecode, columns = CHANNELS[name]
+        values = np.array(values, dtype=typecode)
+        if isinstance(columns, tuple):
+            values = values.reshape(-1, len(columns)).view(CHANNEL_DTYPES[name]).reshape(-1)
+        elif columns is not None:
+            values = values.reshape(-1, columns)
+        return values
+    
+    @staticmethod
+    def parse_log_file(log_file_path, workers=1, bulk=False):
+        """
+        Parse log file and segment by GUIDED mode sessions.
+        Each session where mode changes to GUIDED is considered a separate test.
+
+        :param workers: Number of processes. 1 parses serially in this process, None
+            uses one per CPU. Parallel parsing splits the sessions into byte-range
+            chunks and gives the same result as the serial parser. Logs smaller
+            than PARALLEL_MIN_BYTES (PARALLEL_MIN_BYTES_BULK for bulk) stay serial.
+        :param bulk: Extract each channel from whole memory-mapped sessions with
+            bytes regexes instead of line by line (see parse_block_bulk).
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 1 and os.path.getsize(log_file_path) >= (PARALLEL_MIN_BYTES_BULK if bulk else PARALLEL_MIN_BYTES):
+            return LogParser._parse_log_file_parallel(log_file_path, workers, bulk)
+        if bulk:
+            if os.path.getsize(log_file_path) == 0:
+                return []
+            with open(log_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return [LogParser.finalize_session(LogParser.parse_block_bulk(mm, start, end))
+                        for start, end in LogParser.find_session_ranges(log_file_path)]
+
+        sessions = []
+        current_session_data = None
+        
+        with open(log_file_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                
+                # Detect mode change to GUIDED (start of a test)
+                if "Drone Mode: GUIDED" in line:
+                    if current_session_data is None:
+                        current_session_data = LogParser.create_empty_data_dict()
+                        sessions.append(current_session_data)
+                
+                # Detect mode change away from GUIDED (end of test)
+                elif "Drone Mode:" in line and "GUIDED" not in line:
+                    current_session_data = None
+                
+                # Parse data only during GUIDED mode
+                if current_session_data is not None:
+                    LogParser._parse_line(line, current_session_data)
+        
+        return [LogParser.finalize_session(data) for data in sessions]
+
+    @staticmethod
+    def find_session_ranges(log_file_path):
+        """
+        Scan for "Drone Mode:" lines and return the (start, end) byte range of every
+        GUIDED session, using the same start and end rules as parse_log_file. A
+        range starts at its GUIDED line and ends before the line that leaves GUIDED.
+        """
+        if os.path.getsize(log_file_path) == 0:
+            return []
+
+        ranges = []
+        start = None
+        line_end = -1
+        with open(log_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for match in DRONE_MODE_PATTERN.finditer(mm):
+                if match.start() < line_end:
+                    continue  # Another "Drone Mode:" on a line already handled
+                line_start = mm.rfind(b'\n', 0, match.start()) + 1
+                line_end = mm.find(b'\n', match.end())
+                if line_end < 0:
+                    line_end = len(mm)
+                line = mm[line_start:line_end]
+
+                if b"Drone Mode: GUIDED" in line:
+                    if start is None:
+                        start = line_start
+                elif b"GUIDED" not in line and start is not None:
+                    ranges.append((start, line_start))
+                    start = None
+
+            if start is not None:
+                ranges.append((start, len(mm)))
+        return ranges
+
+    @staticmethod
+    def concat_sessions(parts):
+        """Join finalized sessions parsed from consecutive pieces of one session."""
+        if len(parts) == 1:
+            return parts[0]
+        return {name: parts[0][name] if name == "start_time" else np.concatenate([part[name] for part in parts])
+                for name in parts[0]}
+
+    @staticmethod
+    def split_session_ranges(log_file_path, ranges, chunk_bytes):
+        """
+        Split session byte ranges on line boundaries into chunks of about chunk_bytes.
+
+        :return: List of (session index, start, end).
+        """
+        chunks = []
+        with open(log_file_path, 'rb') as f:
+            for index, (start, end) in enumerate(ranges):
+                while end - start > chunk_bytes:
+                    f.seek(start + chunk_bytes)
+                    f.readline()  # Split on a line boundary
+                    split = f.tell()
+                    if split >= end:
+                        break
+                    chunks.append((index, start, split))
+                    start = split
+                chunks.append((index, start, end))
+        return chunks
+
+    @staticmethod
+    def _parse_log_file_parallel(log_file_path, workers, bulk=False):
+        ranges = LogParser.find_session_ranges(log_file_path)
+        total = sum(end - start for start, end in ranges)
+        # Several chunks per worker keep the pool busy when session sizes differ
+        min_bytes = PARALLEL_MIN_BYTES_BULK if bulk else PARALLEL_MIN_BYTES
+        chunk_bytes = max(min_bytes // 4, total // (workers * 4) + 1)
+        chunks = LogParser.split_session_ranges(log_file_path, ranges, chunk_bytes)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(LogParser._parse_chunk, [log_file_path] * len(chunks),
+                             [start for _, start, _ in chunks], [end for _, _, end in chunks],
+                             [bulk] * len(chunks))
+            session_parts = [[] for _ in ranges]
+            for (index, _, _), part in zip(chunks, parts):
+                session_parts[index].append(part)
+
+        return [LogParser.concat_sessions(part) for part in session_parts]
+
+    @staticmethod
+    def _parse_chunk(log_file_path, start, end, bulk=False):
+        """Parse the lines in byte range [start, end), all inside one GUIDED session."""
+        with open(log_file_path, 'rb') as f:
+            f.seek(start)
+            raw = f.read(end - start)
+
+        if bulk:
+            return LogParser.finalize_session(LogParser.parse_block_bulk(raw))
+
+        data = LogParser.create_empty_data_dict()
+        # Decode like open(log_file_path, 'r') so lines match the serial parser
+        for line in io.TextIOWrapper(io.BytesIO(raw)):
+            LogParser._parse_line(line.strip(), data)
+        return LogParser.finalize_session(data)
+
+    @staticmethod
+    def parse_block_bulk(buf, start=0, end=None):
+        """
+        Extract every channel from buf[start:end] (bytes or an mmap) in bulk.
+
+        Each tag's bytes pattern runs over the whole block with findall, and the
+        captured fields are converted to numpy in one astype call per channel, so
+        there is no per-line Python work. A tag is recognized where its marker
+        starts a log message or a line without the "<timestamp> - " prefix. The
+        few lines with a marker elsewhere in the message, or with several markers,
+        are parsed by _parse_line instead (see _find_heads), so the result matches
+        the line parser.
+
+        :return: Storage for finalize_session(), like create_empty_data_dict().
+        """
+        if end is None:
+            end = len(buf)
+        data = {}
+        text = np.frombuffer(buf, dtype=np.uint8)
+        heads, newlines, irregular = _find_heads(text, start, end)
+        line_rows = LogParser._parse_lines(buf, start, newlines, irregular) if len(irregular) else None
+        for tag in TAGS:
+            LogParser.extract_tag_bulk(tag, buf, start, end, data, heads[tag], newlines, irregular, line_rows)
+        data["start_time"] = _line_timestamps(text, [start], newlines, start)[0] if end > start else None
+        return data
+
+    @staticmethod
+    def extract_tag_bulk(tag, buf, start, end, data, heads, newlines, irregular=(), line_rows=None):
+        """
+        Bulk-extract the channels of one tag from buf[start:end] into data.
+
+        :param heads: Positions where the tag's marker starts a message (see _find_heads).
+        :param newlines: Line end positions of the block, from _find_heads.
+        :param irregular: Indices of the lines whose rows come from line_rows instead.
+        :param line_rows: The irregular lines parsed by _parse_lines, with row
+            positions in buf; merged in file order.
+        """
+        typecode = CHANNELS[tag.channels[0]][0]
+        if tag.prefix or tag.excludes or tag.timestamped:
+            rows, positions, timestamps = LogParser._bulk_line_rows(tag, buf, start, end)
+        else:
+            rows = tag.bulk_pattern.findall(buf, start, end)
+            positions = heads
+            timestamps = None
+            if len(rows) != len(heads):
+                # Some marker's values did not match; find where the matches are
+                matches = list(tag.bulk_pattern.finditer(buf, start, end))
+                rows = [match.groups() for match in matches]
+                positions = [match.start() for match in matches]
+        fields = np.array(rows, dtype=bytes).reshape(len(rows), tag.bulk_pattern.groups)
+        positions = np.asarray(positions, dtype=np.intp)
+        if len(irregular):
+            regular = ~np.isin(np.searchsorted(newlines, positions), irregular)
+            fields, positions = fields[regular], positions[regular]
+            if timestamps is not None:
+                timestamps = [stamp for stamp, kept in zip(timestamps, regular) if kept]
+        values, ok = _bytes_to_numbers(fields, typecode)
+        positions = positions[ok]
+        text = np.frombuffer(buf, dtype=np.uint8)
+        times = _line_timestamps(text, positions, newlines, start)
+        if tag.timestamped:
+            # Like _parse_line, lines without a "<timestamp> - " prefix add no timestamp
+            stamped = [(position, stamp) for position, stamp in
+                       zip(positions, (stamp for stamp, good in zip(timestamps, ok) if good))
+                       if stamp is not None]
+            stamp_positions = np.array([position for position, _ in stamped], dtype=np.intp)
+            stamps = np.array([stamp for _, stamp in stamped], dtype=str)
+
+        if line_rows is not None and len(line_rows[1][tag]):
+            storage, row_positions = line_rows
+            order = np.argsort(np.concatenate([row_positions[tag], positions]), kind='stable')
+            n_rows = len(row_positions[tag])
+            line_values = np.concatenate([np.array(storage[channel], dtype=typecode).reshape(n_rows, -1)
+                                          for channel in tag.channels], axis=1)
+            values = np.concatenate([line_values, values])[order]
+            line_times = np.array([stamp.encode('ascii', 'replace') for stamp in storage[tag.time_key]],
+                                  dtype=f'S{TIMESTAMP_LEN}')
+            times = np.concatenate([line_times, times])[order]
+            if tag.timestamped:
+                order = np.argsort(np.concatenate([row_positions["timestamps"], stamp_positions]), kind='stable')
+                stamps = np.concatenate([np.array(storage["timestamps"], dtype=str), stamps])[order]
+
+        data[tag.time_key] = times
+        if tag.timestamped:
+            data["timestamps"] = stamps
+        if len(tag.channels) == 1:
+            data[tag.channels[0]] = values.reshape(-1)
+        else:
+            for i, channel in enumerate(tag.channels):
+                data[channel] = values[:, i]
+
+    @staticmethod
+    def _parse_lines(buf, start, newlines, lines):
+        """
+        Parse some lines of a block with _parse_line, for the irregular lines that
+        bulk extraction leaves out (see _find_heads).
+
+        :param newlines: Line end positions of the block, from _find_heads.
+        :param lines: Indices of the lines into newlines.
+        :return: (parse storage, row positions) where row positions maps each tag,
+            and "timestamps", to the start of the line of each of its rows.
+        """
+        data = LogParser.create_empty_data_dict()
+        positions = {tag: [] for tag in TAGS}
+        positions["timestamps"] = []
+        for index in lines:
+            line_start = newlines[index - 1] + 1 if index else start
+            line = buf[line_start:newlines[index]].decode(errors='replace').strip()
+            tag = LogParser._find_tag(line)
+            if tag is None:
+                continue
+            rows, stamps = len(data[tag.time_key]), len(data["timestamps"])
+            LogParser._parse_line(line, data)
+            if len(data[tag.time_key]) > rows:
+                positions[tag].append(line_start)
+            if len(data["timestamps"]) > stamps:
+                positions["timestamps"].append(line_start)
+        return data, {key: np.array(rows, dtype=np.intp) for key, rows in positions.items()}
+
+    @staticmethod
+    def _bulk_line_rows(tag, buf, start, end):
+        """
+        findall() for tags that need their whole line: check the line prefix and
+        excludes and collect timestamps. Costs Python work per matching line only.
+
+        :return: (rows of captured values, match positions, timestamps of the rows
+            or None). A row's timestamp is None if its line has no timestamp prefix.
+        """
+        rows = []
+        positions = []
+        timestamps = [] if tag.timestamped else None
+        for match in tag.bulk_pattern.finditer(buf, start, end):
+            line_start = buf.rfind(b'\n', start, match.start()) + 1 or start
+            line_end = buf.find(b'\n', match.end(), end)
+            line = buf[line_start:line_end if line_end >= 0 else end].decode(errors='replace').strip()
+            if not tag.accepts(line):
+                continue
+            rows.append(match.groups())
+            positions.append(match.start())
+            if timestamps is not None:
+                stamp, sep, _ = line.partition(' - ')
+                timestamps.append(stamp if sep else None)
+        return rows, positions, timestamps
+
+    @staticmethod
+    def _parse_line(line, data):
+        """Parse a single log line and extract relevant data."""
+        if data["start_time"] is None:
+            data["start_time"] = line.partition(' - ')[0]
+        tag = LogParser._find_tag(line)
+        if tag is None:
+            return
+        # Values are searched from the start of the line, as the if/elif chain did
+        match = tag.pattern.search(line)
+        if match:
+            try:
+                tag.extract(data, match, line)
+            except (AttributeError, ValueError, IndexError) as e:
+                pass  # Skip lines that don't match expected format
+
+    @staticmethod
+    def _find_tag(line):
+        """
+        Find the LogTag for a line: the first tag in TAGS whose marker is in the
+        line and that accepts it, as the old if/elif chain picked.
+
+        The message head (text after a ' - ' separator up to the first ':' or the
+        closing ']') is looked up in the tag table. If the line has another head
+        ending (HEAD_ENDS) elsewhere, a search for the markers of the tags before
+        it confirms that none takes priority. Lines with an unknown head, or with
+        an earlier marker, scan the markers in order.
+
+        :return: The tag, or None if the line carries no data.
+        """
+        pos = line.find(' - ')
+        while pos >= 0:
+            pos += 3
+            if line.startswith('[', pos):
+                end = line.find(']', pos) + 1
+            else:
+                end = line.find(':', pos) + 1
+            if end:
+                tag = TAGS_BY_HEAD.get(line[pos:end])
+                if tag is not None and line.startswith(tag.marker, pos):
+                    earlier = EARLIER_MARKERS[tag]
+                    if (earlier is None or not (HEAD_ENDS.search(line, end) or HEAD_ENDS.search(line, 0, pos))
+                            or not earlier.search(line)) and tag.accepts(line):
+                        return tag
+                    break
+            pos = line.find(' - ', pos)
+
+        for tag in TAGS:
+            if tag.marker in line and tag.accepts(line):
+                return tag
+        return None
+
+
+class SessionCache:
+    """
+    Sidecar cache of parsed sessions, one uncompressed .npz file per log.
+
+    An entry is valid while the log's path, size, mtime and content fingerprint
+    match and it was written by the same CACHE_VERSION and parse mode. Entries are
+    evicted least recently used first once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        :param cache_dir: Directory for cache files, ~/.cache/log_plotter by default.
+        :param max_bytes: Total size the cache directory is trimmed to after a store.
+        """
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "log_plotter")
+        self.max_bytes = max_bytes
+
+    def parse_log_file(self, log_file_path, workers=1, bulk=False):
+        """LogParser.parse_log_file() that returns cached sessions when they are still valid."""
+        sessions = self.load(log_file_path, bulk)
+        if sessions is None:
+            sessions = LogParser.parse_log_file(log_file_path, workers=workers, bulk=bulk)
+            try:
+                self.store(log_file_path, sessions, bulk)
+            except OSError as e:
+                print(f"Could not write session cache: {e}")
+        return sessions
+
+    def load(self, log_file_path, bulk=False):
+        """Return the cached sessions for a log, or None if there is no valid entry."""
+        cache_path = self._cache_path(log_file_path)
+        try:
+            with np.load(cache_path, allow_pickle=False) as archive:
+                meta = json.loads(str(archive["meta"]))
+                n_sessions = meta.pop("sessions")
+                if meta != self._meta(log_file_path, bulk):
+                    return None
+                sessions = [{} for _ in range(n_sessions)]
+                for key in archive.files:
+                    if key != "meta":
+                        index, name = key.split("/", 1)
+                        sessions[int(index)][name] = archive[key]
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(cache_path)  # Mark as recently used
+        return sessions
+
+    def store(self, log_file_path, sessions, bulk=False):
+        """Write the cache entry for a log and evict old entries over max_bytes."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = self._meta(log_file_path, bulk)
+        meta["sessions"] = len(sessions)
+
+        arrays = {"meta": np.array(json.dumps(meta))}
+        for index, session in enumerate(sessions):
+            for name, values in session.items():
+                arrays[f"{index}/{name}"] = values
+
+        cache_path = self._cache_path(log_file_path)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, cache_path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        """Delete every cache entry."""
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _cache_path(self, log_file_path):
+        key = hashlib.blake2b(os.path.abspath(log_file_path).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    @staticmethod
+    def _meta(log_file_path, bulk):
+        stat = os.stat(log_file_path)
+        return {
+            "version": CACHE_VERSION,
+            "bulk": bool(bulk),
+            "path": os.path.abspath(log_file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "fingerprint": SessionCache._fingerprint(log_file_path, stat.st_size),
+        }
+
+    @staticmethod
+    def _fingerprint(log_file_path, size):
+        """Hash of the first and last FINGERPRINT_BYTES of the file, cheap even for huge logs."""
+        digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+        with open(log_file_path, 'rb') as f:
+            digest.update(f.read(FINGERPRINT_BYTES))
+            if size > FINGERPRINT_BYTES:
+                f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+                digest.update(f.read(FINGERPRINT_BYTES))
+        return digest.hexdigest()
+
+
+class LogFollower:
+    """
+    Incremental parser for a log that is still being written.
+
+    Remembers the byte offset of the last complete line and whether the last
+    session is still in GUIDED mode, so each poll() parses only the appended
+    lines. Session columns live in over-allocated numpy buffers; each session
+    dict is updated in place with views of the filled part.
+    """
+
+    def __init__(self, log_file_path):
+        self.log_file_path = log_file_path
+        self.offset = 0
+        self.sessions = []
+        self._buffers = []  # Per session: channel name -> over-allocated array
+        self._in_session = False
+
+    def poll(self):
+        """
+        Parse the lines appended since the last call. A log that shrank (rotated
+        or truncated) is parsed again from the start.
+
+        :return: Sorted indices of the sessions that changed or were started.
+        """
+        size = os.path.getsize(self.log_file_path)
+        if size < self.offset:
+            self.offset = 0
+            self.sessions.clear()
+            self._buffers.clear()
+            self._in_session = False
+        if size == self.offset:
+            return []
+
+        with open(self.log_file_path, 'rb') as f:
+            f.seek(self.offset)
+            raw = f.read(size - self.offset)
+        end = raw.rfind(b'\n') + 1  # Leave a partly written last line for the next poll
+        if end == 0:
+            return []
+        self.offset += end
+
+        pending = {}  # Session index -> parse storage for the new lines
+        for line in io.TextIOWrapper(io.BytesIO(raw[:end])):
+            line = line.strip()
+            if "Drone Mode: GUIDED" in line:
+                if not self._in_session:
+                    self._in_session = True
+                    self.sessions.append(LogParser.finalize_session(LogParser.create_empty_data_dict()))
+                    self._buffers.append({})
+            elif "Drone Mode:" in line and "GUIDED" not in line:
+                self._in_session = False
+
+            if self._in_session:
+                index = len(self.sessions) - 1
+                if index not in pending:
+                    pending[index] = LogParser.create_empty_data_dict()
+                LogParser._parse_line(line, pending[index])
+
+        for index, data in pending.items():
+            self._append(index, LogParser.finalize_session(data))
+        return sorted(pending)
+
+    def _append(self, index, chunk):
+        session = self.sessions[index]
+        buffers = self._buffers[index]
+        for name, values in chunk.items():
+            if name == "start_time":
+                if np.isnan(session[name]):
+                    session[name] = values
+                continue
+            if not len(values):
+                continue
+            n = len(session[name])
+            needed = n + len(values)
+            buffer = buffers.get(name)
+            if buffer is None or needed > len(buffer) or not np.can_cast(values.dtype, buffer.dtype):
+                dtype = values.dtype if buffer is None else np.promote_types(buffer.dtype, values.dtype)
+                grown = np.empty((max(2 * needed, FOLLOW_MIN_CAPACITY),) + values.shape[1:], dtype=dtype)
+                grown[:n] = session[name]
+                buffers[name] = buffer = grown
+            buffer[n:needed] = values
+            session[name] = buffer[:needed]
+
+
+class LogLoader:
+    """
+    Bulk-parses a log in worker processes while the caller's thread stays free.
+
+    Sessions are split into LOAD_CHUNK_BYTES chunks, submitted to a process pool
+    at once; poll() collects the finished ones. The pool is a multiprocessing.Pool
+    rather than a ProcessPoolExecutor so cancel() can stop running chunks too. A session is complete when all
+    its chunks are, so early sessions are available before the whole log is
+    parsed. Results match parse_log_file(bulk=True). Logs smaller than
+    PARALLEL_MIN_BYTES_BULK get one worker process, which keeps the caller free
+    without paying for a pool that would not parse them any faster.
+    """
+
+    def __init__(self, log_file_path, workers=None, chunk_bytes=LOAD_CHUNK_BYTES, ranges=None):
+        """
+        :param workers: Worker processes; None uses one per CPU for large logs.
+        :param ranges: Session byte ranges when already known (e.g. from a LogIndex).
+        """
+        self.log_file_path = log_file_path
+        if ranges is None:
+            ranges = LogParser.find_session_ranges(log_file_path)
+        self.sessions = [None] * len(ranges)  # Filled in as sessions complete
+        self.total_bytes = sum(end - start for start, end in ranges)
+        self.done_bytes = 0
+        self.cancelled = False
+
+        chunks = LogParser.split_session_ranges(log_file_path, ranges, chunk_bytes)
+        if workers is None:
+            workers = (os.cpu_count() or 1) if self.total_bytes >= PARALLEL_MIN_BYTES_BULK else 1
+        self._pool = multiprocessing.Pool(workers)
+        self._parts = [[] for _ in ranges]  # Chunk results of each session, in file order
+        self._remaining = [0] * len(ranges)
+        self._pending = []  # (session index, part number, bytes, AsyncResult)
+        for index, start, end in chunks:
+            result = self._pool.apply_async(LogParser._parse_chunk, (log_file_path, start, end, True))
+            self._pending.append((index, len(self._parts[index]), end - start, result))
+            self._parts[index].append(None)
+            self._remaining[index] += 1
+        if not self._pending:
+            self._pool.close()
+
+    @property
+    def done(self):
+        return not self._pending
+
+    @property
+    def progress(self):
+        """Fraction of the session bytes parsed so far."""
+        return self.done_bytes / self.total_bytes if self.total_bytes else 1.0
+
+    def poll(self):
+        """
+        Collect finished chunks. A chunk that failed re-raises its exception here.
+
+        :return: Sorted indices of the sessions completed by this call.
+        """
+        completed = []
+        still_pending = []
+        for pending in self._pending:
+            index, part, size, result = pending
+            if not result.ready():
+                still_pending.append(pending)
+                continue
+            self._parts[index][part] = result.get()
+            self.done_bytes += size
+            self._remaining[index] -= 1
+            if not self._remaining[index]:
+                self.sessions[index] = LogParser.concat_sessions(self._parts[index])
+                self._parts[index] = []
+                completed.append(index)
+        self._pending = still_pending
+        if self.done:
+            self._pool.close()
+        return sorted(completed)
+
+    def cancel(self):
+        """Drop the chunks not parsed yet and stop the worker processes, running chunks included."""
+        self.cancelled = True
+        self._pending = []
+        self._pool.terminate()
+
+
+class LogIndex:
+    """
+    Session index of a log for parsing sessions and channels on demand.
+
+    Opening the index only scans for GUIDED session boundaries. The first time a
+    channel of a session is read, the session's lines are indexed once: numpy
+    finds every " - " message separator and records where each tag's marker
+    starts a message, and the few irregular lines (see _find_heads) are parsed
+    line by line. Reading a channel then gathers only that tag's lines and
+    bulk-extracts them. Channels match parse_log_file(bulk=True).
+
+    Sessions holding parsed data are kept in LRU order; beyond max_bytes the
+    least recently used ones are unloaded, to be parsed again if read later.
+    """
+
+    def __init__(self, log_file_path, max_bytes=SESSION_MEMORY_BYTES):
+        self.log_file_path = log_file_path
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.sessions = []
+        self._loaded = OrderedDict()  # id(session) -> session, least recently used first
+        self._file = None
+        self._mm = None
+        self._bytes = None
+        if os.path.getsize(log_file_path) == 0:
+            return
+
+        self._file = open(log_file_path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._bytes = np.frombuffer(self._mm, dtype=np.uint8)
+        self.sessions = [LazySession(self, start, end)
+                         for start, end in LogParser.find_session_ranges(log_file_path)]
+
+    def close(self):
+        """Release the memory map. Channels not read yet can no longer be parsed."""
+        for session in self._loaded.values():
+            session.unload()
+        self._loaded.clear()
+        self.nbytes = 0
+        self._bytes = None
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = self._file = None
+
+    def _touch(self, session, added=0):
+        """Mark a session most recently used and unload others while over budget."""
+        session.nbytes += added
+        self.nbytes += added
+        self._loaded[id(session)] = session
+        self._loaded.move_to_end(id(session))
+        while self.nbytes > self.max_bytes and len(self._loaded) > 1:
+            _, oldest = self._loaded.popitem(last=False)
+            self.nbytes -= oldest.nbytes
+            oldest.unload()
+
+    def _timestamp_at(self, pos):
+        """Timestamp prefix of the line containing byte `pos`."""
+        line_start = self._mm.rfind(b'\n', 0, pos) + 1
+        line_end = self._mm.find(b'\n', pos)
+        line = self._mm[line_start:line_end if line_end >= 0 else len(self._mm)]
+        return line.decode(errors='replace').strip().partition(' - ')[0]
+
+    def _count_lines(self, start, end):
+        data = self._bytes
+        n_lines = 0
+        for block_start in range(start, end, INDEX_BLOCK_BYTES):
+            block = data[block_start:min(block_start + INDEX_BLOCK_BYTES, end)]
+            n_lines += int(np.count_nonzero(block == ord('\n')))
+        return n_lines + int(end > start and data[end - 1] != ord('\n'))
+
+    def _extract(self, tag, heads, newlines, line_rows=None):
+        """
+        Bulk-extract a tag from only the lines containing the given marker positions.
+
+        :param line_rows: Irregular lines of the session parsed by LogParser._parse_lines,
+            with file positions; their rows are merged in file order.
+        :return: Parse storage with the tag's channels, like parse_block_bulk().
+        """
+        # Line [start, end) of every head, each line once
+        after = np.searchsorted(newlines, heads)
+        starts = np.where(after > 0, newlines[np.maximum(after - 1, 0)] + 1, 0)
+        starts, first, line = np.unique(starts, return_index=True, return_inverse=True)
+        ends = newlines[after[first]]
+        # Gather the lines, newline included, into one contiguous buffer
+        lengths = np.minimum(ends + 1, len(self._bytes)) - starts
+        offsets = np.cumsum(lengths) - lengths
+        gather = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        buf = self._bytes[gather].tobytes()
+
+        if line_rows is not None:
+            # A line-parsed row sorts before the gathered line that follows it in the file
+            storage, row_positions = line_rows
+            following = np.append(offsets, len(buf))
+            line_rows = storage, {key: following[np.searchsorted(starts, positions)]
+                                  for key, positions in row_positions.items()}
+        data = {}
+        LogParser.extract_tag_bulk(tag, buf, 0, len(buf), data, offsets[line] + heads - starts[line],
+                                   offsets + lengths - 1, line_rows=line_rows)
+        return data
+
+
+class LazySession(Mapping):
+    """
+    Read-only session dict whose channels are parsed on first access and kept.
+
+    Has the same keys as a session from LogParser.finalize_session(); reading a
+    channel parses all channels of its tag from this session's lines in the
+    LogIndex. `start`/`end` are the session's byte range, `start_time`/`end_time`
+    the times of its first and last lines in POSIX seconds.
+    """
+
+    def __init__(self, index, start, end):
+        self._index = index
+        self.start = start
+        self.end = end
+        self.start_time, self.end_time = parse_timestamps(
+            [index._timestamp_at(start), index._timestamp_at(max(start, end - 1))])
+        self.nbytes = 0  # Memory held by the line index and parsed channels
+        self._n_lines = None
+        self._heads = None  # Tag -> byte positions of its markers in this session
+        self._newlines = None
+        self._line_rows = None  # Irregular lines parsed line by line, if any (see _find_heads)
+        self._channels = {}
+
+    @property
+    def n_lines(self):
+        if self._n_lines is None:
+            self._n_lines = self._index._count_lines(self.start, self.end)
+        return self._n_lines
+
+    @property
+    def loaded(self):
+        """Whether the session's lines are indexed."""
+        return self._heads is not None
+
+    def __getitem__(self, name):
+        if name not in self._channels:
+            self._load(name)
+        self._index._touch(self)
+        return self._channels[name]
+
+    def __iter__(self):
+        return iter(SESSION_KEYS)
+
+    def __len__(self):
+        return len(SESSION_KEYS)
+
+    def prepare(self):
+        """Index the session's lines now, so the first channel read is quick."""
+        if self._heads is None:
+            heads, newlines, irregular = _find_heads(self._index._bytes, self.start, self.end)
+            if len(irregular):
+                # Irregular lines are parsed once here and left out of bulk extraction
+                self._line_rows = LogParser._parse_lines(self._index._mm, self.start, newlines, irregular)
+                heads = {tag: positions[~np.isin(np.searchsorted(newlines, positions), irregular)]
+                         for tag, positions in heads.items()}
+            self._heads, self._newlines = heads, newlines
+            added = self._newlines.nbytes + sum(heads.nbytes for heads in self._heads.values())
+            self._index._touch(self, added)
+
+    def marked_channels(self):
+        """Channels whose tag marks at least one line, without parsing them."""
+        self.prepare()
+        heads = self._heads
+        line_rows = self._line_rows[1] if self._line_rows is not None else {}
+        self._index._touch(self)
+        return [channel for tag in TAGS if len(heads[tag]) or len(line_rows.get(tag, ()))
+                for channel in tag.channels]
+
+    def unload(self):
+        """Drop the line index and parsed channels."""
+        self._heads = self._newlines = self._line_rows = None
+        self._channels = {}
+        self.nbytes = 0
+
+    def _load(self, name):
+        if name == "start_time":
+            channels = {name: self.start_time}
+        elif name in TIME_KEYS.values() and name[:-len("_time")] in DERIVED_CHANNELS:
+            source = DERIVED_CHANNELS[name[:-len("_time")]][0]
+            channels = {name: self[TIME_KEYS[source]]}
+        elif name in TIME_KEYS.values():
+            self[name[:-len("_time")]]  # Parses the channel's tag, times included
+            return
+        elif name in DERIVED_CHANNELS:
+            source, derive = DERIVED_CHANNELS[name]
+            channels = {name: derive(self[source])}
+        else:
+            if name == "timestamps":
+                tag = next(tag for tag in TAGS if tag.timestamped)
+            elif name in TAG_BY_CHANNEL:
+                tag = TAG_BY_CHANNEL[name]
+            else:
+                raise KeyError(name)
+            self.prepare()
+            data = self._index._extract(tag, self._heads[tag], self._newlines, self._line_rows)
+            channels = {channel: LogParser.finalize_channel(channel, data[channel])
+                        for channel in tag.channels}
+            times = parse_timestamps(data[tag.time_key])
+            channels.update((TIME_KEYS[channel], times) for channel in tag.channels)
+            if tag.timestamped:
+                channels["timestamps"] = data["timestamps"]
+        self._channels.update(channels)
+        # Channels of one tag share their times array
+        arrays = {id(values): np.asarray(values) for values in channels.values()}
+        self._index._touch(self, sum(values.nbytes for values in arrays.values()))
@@ -7,378 +7,166 @@ Navigate between tests (GUIDED mode sessions) and different plot types.
 
 Usage:
     python log_plotter_app.py [log_file_path]
+    python log_plotter_app.py --export OUT_DIR [--format png,pdf,svg] [--workers N]
+                              [--force] [log_file_or_dir ...]
     
 If no log file is provided, it will open the latest log file from output/logs/
+With --export, every test and plot type of the given logs (all of output/logs/
+by default) is written to OUT_DIR, without a display, along with an index.html.
 """
 
 import matplotlib
-matplotlib.use('TkAgg')  # Use TkAgg backend for better interactivity
-
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
-import re
+import argparse
+import html
 import os
 import sys
 import glob
-from datetime import datetime
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 
+from log_alignment import SessionAligner, relative_position_error
+# The parser and data model live in log_parser (numpy only); re-exported here
+from log_parser import (CHANNELS, LOG_DIR, SESSION_KEYS, TAGS, TIME_KEYS, LazySession, LogFollower,
+                        LogIndex, LogLoader, LogParser, LogTag, SessionCache, parse_timestamps)
+
+
+# Follow mode: how often the log is polled and the minimum time between redraws
+FOLLOW_POLL_MS = 250
+FOLLOW_REDRAW_S = 1.0
+
+# Figure files the batch export can write
+EXPORT_FORMATS = ("png", "pdf", "svg")
+
+# Background loading: how often PlotterApp polls the LogLoader
+LOAD_POLL_MS = 100
+
+# Rendered plot images PlotterApp keeps for instant navigation back to a view
+RENDER_CACHE_BYTES = 256 * 1024 ** 2
+# After showing a cached image, rebuild the live artists once navigation pauses this
+# long; neighbouring views are pre-rendered only after the same pause
+RENDER_SETTLE_MS = 300
+
+# Tk is imported for the GUI only (_import_tk), so importing this module and
+# --export work without a display toolkit
+tk = ttk = filedialog = messagebox = simpledialog = None
+
+
+def _in_background(fn, *args):
+    """Call fn(*args) in a daemon thread and return a Future of its result."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _import_tk():
+    """Import tkinter into this module for PlotterApp. Raises ImportError without Tk."""
+    global tk, ttk, filedialog, messagebox, simpledialog
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox, simpledialog
+
+
+# Series longer than this are drawn from a MinMaxPyramid at screen resolution
+LOD_MIN_POINTS = 8192
+# Samples per block at the finest pyramid level; up to this many samples per pixel are drawn as is
+LOD_BLOCK = 4
+
+class MinMaxPyramid:
+    """
+    Multi-resolution min/max envelope of a time series, for drawing it with about
+    two points per pixel while keeping every spike visible.
+
+    Level k holds, for each block of LOD_BLOCK * 2**k samples, the indices of its
+    minimum and maximum; each level is built from the one below. x must be
+    sorted. NaN samples are ignored unless a whole block is NaN.
+    """
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.levels = []  # (block size, indices of block minima, indices of block maxima)
+
+        n = len(y)
+        index_type = np.int32 if n < 2 ** 31 else np.int64
+        low = np.where(np.isnan(y), np.inf, y)
+        high = np.where(np.isnan(y), -np.inf, y)
+        n_blocks = -(-n // LOD_BLOCK)
+        pad = n_blocks * LOD_BLOCK - n
+        starts = np.arange(n_blocks, dtype=index_type) * LOD_BLOCK
+        lows = np.append(low, np.full(pad, np.inf)).reshape(n_blocks, LOD_BLOCK)
+        highs = np.append(high, np.full(pad, -np.inf)).reshape(n_blocks, LOD_BLOCK)
+        minima = starts + np.argmin(lows, axis=1).astype(index_type)
+        maxima = starts + np.argmax(highs, axis=1).astype(index_type)
+        block = LOD_BLOCK
+        self.levels.append((block, minima, maxima))
+        while len(minima) > 1:
+            if len(minima) % 2:
+                minima = np.append(minima, minima[-1])
+                maxima = np.append(maxima, maxima[-1])
+            a, b = minima[0::2], minima[1::2]
+            minima = np.where(low[a] <= low[b], a, b)
+            a, b = maxima[0::2], maxima[1::2]
+            maxima = np.where(high[a] >= high[b], a, b)
+            block *= 2
+            self.levels.append((block, minima, maxima))
 
-class LogParser:
-    """Parser for visual guidance log files."""
-    
-    @staticmethod
-    def create_empty_data_dict():
-        """Create an empty dictionary for storing parsed data."""
-        return {
-            "frame_number": [],
-            "timestamps": [],
-            "interceptor_location": [],
-            "target_location": [],
-            "altitude": [],
-            "target_altitude": [],
-            "attitude": [],  # Roll, Pitch, Yaw in degrees
-            "velocity": [],
-            "velocity_norm": [],
-            "target_velocity": [],
-            "angular_velocity": [],
-            "linear_velocity": [],
-            "distance_to_target": [],
-            "speed": [],
-            "pixel_errors": [],
-            "virtual_pixel_errors": [],
-            "pixel_x": [],
-            "pixel_y": [],
-            "depth": [],
-            "depth_virtual": [],
-            "desired_accel_initial": [],
-            "desired_accel_final": [],
-            "xyz_pseudo": [],
-            "control_commands": [],  # Pitch, Yaw, Roll, Thrust
-            "throttle": [],
-            "bs_throttle": [],
-            "bs_roll": [],
-            "bs_levant": [],  # Levant differentiator for throttle
-            "levant_alt_state": [],  # Levant altitude state: z1_a, z1_r, z2_r
-            "bs_roll_levant": [],  # Levant differentiator for roll
-            "bs_state": [],  # Backstepping state data
-            "error_acc": [],
-            "virtual_east_accel": [],
-            "virtual_down_accel": [],
-            "target_heading": [],
-            "error_old_xy": [],
-            "error_old_z": [],
-            "raw_imu": [],  # Raw IMU accelerometer data [x, y, z]
-        }
-    
     @staticmethod
-    def parse_log_file(log_file_path):
+    def accepts(x, y):
+        """Whether a series is long enough and x sorted, so a pyramid pays off."""
+        return len(y) >= LOD_MIN_POINTS and len(x) == len(y) and bool(np.all(np.diff(x) >= 0))
+
+    def decimate(self, x_min, x_max, width):
         """
-        Parse log file and segment by GUIDED mode sessions.
-        Each session where mode changes to GUIDED is considered a separate test.
+        :return: (x, y) covering [x_min, x_max] with at most about 2 points per
+            pixel of `width`, including each block's extremes and the end samples.
         """
-        sessions = []
-        current_session_data = None
-        
-        with open(log_file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                
-                # Detect mode change to GUIDED (start of a test)
-                if "Drone Mode: GUIDED" in line:
-                    if current_session_data is None:
-                        current_session_data = LogParser.create_empty_data_dict()
-                        sessions.append(current_session_data)
-                
-                # Detect mode change away from GUIDED (end of test)
-                elif "Drone Mode:" in line and "GUIDED" not in line:
-                    current_session_data = None
-                
-                # Parse data only during GUIDED mode
-                if current_session_data is not None:
-                    LogParser._parse_line(line, current_session_data)
-        
-        return sessions
-    
-    @staticmethod
-    def _parse_line(line, data):
-        """Parse a single log line and extract relevant data."""
-        try:
-            # Extract timestamp
-            if ' - ' in line:
-                timestamp_str = line.split(' - ')[0]
-            else:
-                timestamp_str = None
-            
-            # Frame Number
-            if "Frame Number:" in line:
-                match = re.search(r'Frame Number:\s*(\d+)', line)
-                if match:
-                    data["frame_number"].append(int(match.group(1)))
-                    if timestamp_str:
-                        data["timestamps"].append(timestamp_str)
-            
-            # Interceptor Location
-            elif "Interceptor Location:" in line:
-                match = re.search(r'\(([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\)', line)
-                if match:
-                    data["interceptor_location"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Altitude
-            elif line.startswith("2") and "Altitude:" in line and "Target" not in line and "Relative" not in line:
-                match = re.search(r'Altitude:\s*([\d\.\-]+)', line)
-                if match:
-                    data["altitude"].append(float(match.group(1)))
-            
-            # Attitude (R,P,Y)
-            elif "Attitude (R,P,Y):" in line:
-                match = re.search(r'\(([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\)', line)
-                if match:
-                    data["attitude"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Velocity
-            elif "Velocity:" in line and "Target" not in line and "Angular" not in line and "Linear" not in line:
-                match = re.search(r'\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    vel = [float(match.group(1)), float(match.group(2)), float(match.group(3))]
-                    data["velocity"].append(vel)
-                    data["velocity_norm"].append(np.linalg.norm(vel))
-            
-            # Target Location
-            elif "Target Location:" in line:
-                match = re.search(r'\(([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\)', line)
-                if match:
-                    data["target_location"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Target Altitude
-            elif "Target Altitude:" in line:
-                match = re.search(r'Target Altitude:\s*([\d\.\-]+)', line)
-                if match:
-                    data["target_altitude"].append(float(match.group(1)))
-            
-            # Target Velocity
-            elif "Target Velocity:" in line:
-                match = re.search(r'Vx:\s*([\d\.\-]+),\s*Vy:\s*([\d\.\-]+),\s*Vz:\s*([\d\.\-]+)', line)
-                if match:
-                    data["target_velocity"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Distance to target
-            elif "Distance to target:" in line:
-                match = re.search(r'Distance to target:\s*([\d\.\-]+)', line)
-                if match:
-                    data["distance_to_target"].append(float(match.group(1)))
-            
-            # Speed
-            elif "Speed:" in line:
-                match = re.search(r'Speed:\s*([\d\.\-]+)', line)
-                if match:
-                    data["speed"].append(float(match.group(1)))
-            
-            # Angular Velocity
-            elif "Angular Velocity:" in line:
-                match = re.search(r'\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    data["angular_velocity"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Linear Velocity
-            elif "Linear Velocity:" in line:
-                match = re.search(r'\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    data["linear_velocity"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Virtual Pixel X, Y, Depth
-            elif "Virtual Pixel X:" in line:
-                match = re.search(r'Virtual Pixel X:\s*([\d\.\-]+),\s*Virtual Pixel Y:\s*([\d\.\-]+),\s*Depth:\s*([\d\.\-]+)', line)
-                if match:
-                    data["pixel_x"].append(float(match.group(1)))
-                    data["pixel_y"].append(float(match.group(2)))
-                    data["depth"].append(float(match.group(3)))
-            
-            # Depth Virtual
-            elif "Depth Virtual:" in line:
-                match = re.search(r'Depth Virtual:\s*([\d\.\-]+)', line)
-                if match:
-                    data["depth_virtual"].append(float(match.group(1)))
-            
-            # Pixel errors
-            elif "Pixel errors:" in line and "Virtual" not in line:
-                match = re.search(r'\(([\d\.\-]+),\s*([\d\.\-]+)\)', line)
-                if match:
-                    data["pixel_errors"].append([float(match.group(1)), float(match.group(2))])
-            
-            # Virtual Pixel errors
-            elif "Virtual Pixel errors:" in line:
-                match = re.search(r'\(([\d\.\-]+),\s*([\d\.\-]+)\)', line)
-                if match:
-                    data["virtual_pixel_errors"].append([float(match.group(1)), float(match.group(2))])
-            
-            # Desired Acceleration (initial)
-            elif "Desired Acceleration (initial):" in line:
-                match = re.search(r'\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    data["desired_accel_initial"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Accel Desired (final)
-            elif "Accel Desired (final):" in line:
-                match = re.search(r'\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    data["desired_accel_final"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # XYZPseudoFrame
-            elif "XYZPseudoFrame:" in line:
-                match = re.search(r'\[\s*([\d\.\-e]+)\s+([\d\.\-e]+)\s+([\d\.\-e]+)\s*\]', line)
-                if match:
-                    data["xyz_pseudo"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-            
-            # Target Heading New
-            elif "Target Heading New:" in line:
-                match = re.search(r'Target Heading New:\s*([\d\.\-]+)', line)
-                if match:
-                    data["target_heading"].append(float(match.group(1)))
-            
-            # Error ACC
-            elif "Error ACC:" in line:
-                match = re.search(r'Error ACC:\s*([\d\.\-]+)', line)
-                if match:
-                    data["error_acc"].append(float(match.group(1)))
-            
-            # Virtual East Acceleration
-            elif "Virtual East Acceleration:" in line:
-                match = re.search(r'Virtual East Acceleration:\s*([\d\.\-]+)', line)
-                if match:
-                    data["virtual_east_accel"].append(float(match.group(1)))
-            
-            # Virtual Down Acceleration
-            elif "Virtual Down Acceleration:" in line:
-                match = re.search(r'Virtual Down Acceleration:\s*([\d\.\-]+)', line)
-                if match:
-                    data["virtual_down_accel"].append(float(match.group(1)))
-            
-            # Control Commands
-            elif "Control Commands - Pitch:" in line:
-                match = re.search(r'Pitch:\s*([\d\.\-]+),\s*Yaw:\s*([\d\.\-]+),\s*Roll:\s*([\d\.\-]+),\s*Thrust:\s*([\d\.\-]+)', line)
-                if match:
-                    data["control_commands"].append([
-                        float(match.group(1)), float(match.group(2)), 
-                        float(match.group(3)), float(match.group(4))
-                    ])
-                    data["throttle"].append(float(match.group(4)))
-            
-            # BS_THROTTLE
-            elif "[BS_THROTTLE]" in line and "thr=" in line:
-                match = re.search(r'thr=([\d\.\-]+),\s*alt_err=([\d\.\-]+)m,\s*rate_err=([\d\.\-]+)m/s,\s*a_cmd=([\d\.\-]+)', line)
-                if match:
-                    data["bs_throttle"].append({
-                        'thr': float(match.group(1)),
-                        'alt_err': float(match.group(2)),
-                        'rate_err': float(match.group(3)),
-                        'a_cmd': float(match.group(4))
-                    })
-            
-            # BS_ROLL
-            elif "[BS_ROLL]" in line and "LEVANT" not in line:
-                match = re.search(r'phi=([\d\.\-]+)deg,\s*east_err=([\d\.\-]+)m,\s*vel_err=([\d\.\-]+)m/s,\s*a_lat=([\d\.\-]+)', line)
-                if match:
-                    data["bs_roll"].append({
-                        'phi': float(match.group(1)),
-                        'east_err': float(match.group(2)),
-                        'vel_err': float(match.group(3)),
-                        'a_lat': float(match.group(4))
-                    })
-            
-            # BS_LEVANT (Levant differentiator for throttle/altitude)
-            elif "[BS_LEVANT]" in line:
-                match = re.search(r'rate_hat=([\d\.\-]+)m/s,\s*accel_hat=([\d\.\-]+)m/s', line)
-                if match:
-                    data["bs_levant"].append({
-                        'rate_hat': float(match.group(1)),
-                        'accel_hat': float(match.group(2))
-                    })
-            
-            # BS_ROLL_LEVANT (Levant differentiator for roll/lateral)
-            elif "[BS_ROLL_LEVANT]" in line:
-                match = re.search(r'vel_hat=([\d\.\-]+)m/s,\s*accel_hat=([\d\.\-]+)m/s', line)
-                if match:
-                    data["bs_roll_levant"].append({
-                        'vel_hat': float(match.group(1)),
-                        'accel_hat': float(match.group(2))
-                    })
-            
-            # LEVANT_ALT_OUT (Levant altitude state: z1_a, z1_r, z2_r, z2_r)
-            elif "[LEVANT_ALT_OUT]" in line:
-                match = re.search(r'next_state=\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    data["levant_alt_state"].append({
-                        'z1_a': float(match.group(1)),  # Altitude estimate
-                        'z1_r': float(match.group(2)),  # Rate estimate (outer)
-                        'z2_r': float(match.group(3)),  # Rate estimate (inner)
-                        'z2_a': float(match.group(4))   # Acceleration estimate
-                    })
-            
-            # BS_STATE (drone state for backstepping)
-            elif "[BS_STATE]" in line:
-                match = re.search(r'drone_alt=([\d\.\-]+)m,\s*target_alt=([\d\.\-]+)m,\s*drone_vz=([\d\.\-]+)m/s,\s*drone_az=([\d\.\-]+)m/s', line)
-                if match:
-                    data["bs_state"].append({
-                        'drone_alt': float(match.group(1)),
-                        'target_alt': float(match.group(2)),
-                        'drone_vz': float(match.group(3)),
-                        'drone_az': float(match.group(4))
-                    })
-            
-            # Error Old XY
-            elif "Error Old XY:" in line:
-                match = re.search(r'Error Old XY:\s*([\d\.\-e]+)', line)
-                if match:
-                    data["error_old_xy"].append(float(match.group(1)))
-            
-            # Error Old Z
-            elif "Error Old Z:" in line:
-                match = re.search(r'Error Old Z:\s*([\d\.\-e]+)', line)
-                if match:
-                    data["error_old_z"].append(float(match.group(1)))
-            
-            # BS_ACCEL_MEAS raw_imu
-            elif "[BS_ACCEL_MEAS] raw_imu=" in line:
-                match = re.search(r'raw_imu=\[([\d\.\-]+),\s*([\d\.\-]+),\s*([\d\.\-]+)\]', line)
-                if match:
-                    data["raw_imu"].append([
-                        float(match.group(1)), float(match.group(2)), float(match.group(3))
-                    ])
-                    
-        except (AttributeError, ValueError, IndexError) as e:
-            pass  # Skip lines that don't match expected format
+        x = self.x
+        first = max(int(np.searchsorted(x, x_min, side='left')) - 1, 0)
+        last = min(int(np.searchsorted(x, x_max, side='right')) + 1, len(x))
+        count = last - first
+        if count <= LOD_BLOCK * width:
+            return x[first:last], self.y[first:last]
 
+        for block, minima, maxima in self.levels:
+            if block * width >= count:
+                break
+        # Whole blocks inside the view come from the pyramid; the partly visible
+        # blocks at its edges are searched directly, so their off-view samples
+        # can't hide an extreme in view
+        full_start = min(-(-first // block) * block, last)
+        full_end = max(last // block * block, full_start)
+        blocks = slice(full_start // block, full_end // block)
+        parts = [[first, last - 1], minima[blocks], maxima[blocks]]
+        for start, end in ((first, full_start), (full_end, last)):
+            if end > start:
+                values = self.y[start:end]
+                parts.append([start + np.argmin(np.where(np.isnan(values), np.inf, values)),
+                              start + np.argmax(np.where(np.isnan(values), -np.inf, values))])
+        index = np.unique(np.concatenate(parts))
+        return x[index], self.y[index]
 
-class PlotterApp:
-    """Main application class for log plotting."""
+
+class SessionPlotter:
+    """
+    Draws the plot types for sessions on a matplotlib figure. Holds no GUI state,
+    so figures can be rendered with any canvas, including Agg without a display.
+    """
     
     # Define all available plot types
     PLOT_TYPES = [
         ("3D Trajectory", "plot_3d_trajectory"),
         ("Altitude vs Time", "plot_altitude"),
         ("Distance to Target", "plot_distance"),
+        ("Relative Position Error", "plot_relative_position"),
         ("Velocity Components", "plot_velocity"),
         ("Velocity Norm & Speed", "plot_speed"),
         ("Attitude (R,P,Y)", "plot_attitude"),
@@ -399,365 +187,241 @@ class PlotterApp:
         ("Raw IMU Accelerometer", "plot_raw_imu"),
     ]
     
-    def __init__(self, root, log_file_path=None):
-        self.root = root
-        self.root.title("Visual Guidance Log Plotter")
-        self.root.geometry("1400x900")
-        
-        # Data storage
-        self.sessions = []
-        self.current_test_index = 0
-        self.current_plot_index = 0
-        self.log_file_path = log_file_path
-        
-        # Setup UI
-        self._setup_ui()
-        
-        # Load log file if provided
-        if log_file_path:
-            self._load_log_file(log_file_path)
+    def __init__(self, fig):
+        self.fig = fig
+        self.aligner = SessionAligner()  # Time-aligned channel frames of the plotted sessions
+        
+        # Artists of the current figure, reused when refreshing it in place
+        self._axes = {}
+        self._lines = {}
+        self._reuse_artists = False
+        self._touched = set()  # Axes and line keys used by the current plot call
+        self._pyramids = {}  # Line drawn at screen resolution -> its MinMaxPyramid
+    
+    def draw_figure(self, sessions, plot_index, test_index=None):
+        """
+        Clear the figure and draw one plot type.
+
+        :param test_index: Test to plot, or None to plot all sessions together.
+        """
+        self.fig.clear()
+        self._axes.clear()
+        self._lines.clear()
+        self._pyramids.clear()
+        plot_method = getattr(self, self.PLOT_TYPES[plot_index][1])
+        if test_index is None:
+            plot_method(sessions, all_tests=True)
         else:
-            self._load_latest_log()
+            plot_method([sessions[test_index]], test_indices=[test_index])
+        self.fig.tight_layout()
     
-    def _setup_ui(self):
-        """Setup the user interface."""
-        # Main frame
-        main_frame = ttk.Frame(self.root, padding="5")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Control panel (top)
-        control_frame = ttk.Frame(main_frame)
-        control_frame.pack(fill=tk.X, pady=(0, 5))
+    def _subplot(self, *args, **kwargs):
+        """fig.add_subplot() that returns the existing axes when refreshing in place."""
+        ax = self._axes.get(args) if self._reuse_artists else None
+        if ax is None:
+            ax = self.fig.add_subplot(*args, **kwargs)
+            self._axes[args] = ax
+            ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self._touched.add(ax)
+        return ax
+    
+    def _line(self, ax, x, y, *args, **kwargs):
+        """ax.plot() of one labelled line, updating the existing line when refreshing in place."""
+        key = (ax, kwargs.get('label'))
+        self._touched.add(key)
+        if self._reuse_artists and key in self._lines:
+            line, source = self._lines[key]
+            if source is not y:
+                x_shown, y_shown, pyramid = self._line_data(ax, x, y)
+                line.set_data(x_shown, y_shown)
+                self._lines[key] = (line, y)
+                self._set_pyramid(line, pyramid)
+            return line
+        x_shown, y_shown, pyramid = self._line_data(ax, x, y)
+        line, = ax.plot(x_shown, y_shown, *args, **kwargs)
+        self._lines[key] = (line, y)
+        self._set_pyramid(line, pyramid)
+        return line
+    
+    def _line_data(self, ax, x, y):
+        """
+        What to draw of (x, y) on ax: long series are decimated to the axes' pixel width.
+
+        :return: (x, y, MinMaxPyramid or None)
+        """
+        if not MinMaxPyramid.accepts(x, y):
+            return x, y, None
+        pyramid = MinMaxPyramid(x, y)
+        x_min, x_max = (x[0], x[-1]) if ax.get_autoscalex_on() else ax.get_xlim()
+        return pyramid.decimate(x_min, x_max, self._pixel_width(ax)) + (pyramid,)
+    
+    def _set_pyramid(self, line, pyramid):
+        if pyramid is None:
+            self._pyramids.pop(line, None)
+        else:
+            self._pyramids[line] = pyramid
+    
+    @staticmethod
+    def _pixel_width(ax):
+        return max(1, int(ax.bbox.width))
+    
+    def _on_xlim_changed(self, ax):
+        """Zoom, pan or rescale: redo the decimation of the axes' long lines for the new range."""
+        x_min, x_max = ax.get_xlim()
+        width = self._pixel_width(ax)
+        for line, pyramid in self._pyramids.items():
+            if line.axes is ax:
+                line.set_data(*pyramid.decimate(x_min, x_max, width))
+    
+    @staticmethod
+    def _elapsed(session, name):
+        """Record times of a channel in seconds since the start of the session."""
+        return session[TIME_KEYS[name]] - session["start_time"]
+    
+    # ==================== PLOT METHODS ====================
+    
+    def plot_3d_trajectory(self, sessions, all_tests=False, test_indices=None):
+        """Plot 3D trajectory of interceptor and target."""
+        from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 (registers the '3d' projection)
+        ax = self._subplot(111, projection='3d')
         
-        # File selection
-        file_frame = ttk.LabelFrame(control_frame, text="Log File", padding="5")
-        file_frame.pack(side=tk.LEFT, padx=5)
+        if test_indices is None:
+            test_indices = range(len(sessions))
         
-        self.file_label = ttk.Label(file_frame, text="No file loaded", width=50)
-        self.file_label.pack(side=tk.LEFT, padx=5)
+        colors = matplotlib.colormaps['tab10'](np.linspace(0, 1, len(sessions)))
         
-        ttk.Button(file_frame, text="Open...", command=self._open_file_dialog).pack(side=tk.LEFT, padx=5)
-        ttk.Button(file_frame, text="Reload", command=self._reload_file).pack(side=tk.LEFT, padx=5)
+        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
+            if len(session["interceptor_location"]):
+                locs = session["interceptor_location"]
+                ax.plot(locs[:, 1], locs[:, 0], locs[:, 2], 
+                       label=f'Test {idx+1} Interceptor', color=colors[i])
+                ax.scatter(locs[0, 1], locs[0, 0], locs[0, 2], 
+                          marker='o', s=100, color=colors[i])
+                ax.scatter(locs[-1, 1], locs[-1, 0], locs[-1, 2], 
+                          marker='x', s=100, color=colors[i])
+            
+            if len(session["target_location"]):
+                target_locs = session["target_location"]
+                ax.plot(target_locs[:, 1], target_locs[:, 0], target_locs[:, 2], 
+                       linestyle='--', label=f'Test {idx+1} Target', color=colors[i], alpha=0.7)
         
-        # Test navigation
-        test_frame = ttk.LabelFrame(control_frame, text="Test Navigation", padding="5")
-        test_frame.pack(side=tk.LEFT, padx=5)
+        ax.set_xlabel('Longitude (East)')
+        ax.set_ylabel('Latitude (North)')
+        ax.set_zlabel('Altitude (m)')
+        ax.set_title('3D Trajectory')
+        ax.legend()
+    
+    def plot_altitude(self, sessions, all_tests=False, test_indices=None):
+        """Plot altitude over time."""
+        ax = self._subplot(111)
         
-        ttk.Button(test_frame, text="◀ Prev Test", command=self._prev_test).pack(side=tk.LEFT, padx=2)
-        self.test_label = ttk.Label(test_frame, text="Test: 0/0", width=15)
-        self.test_label.pack(side=tk.LEFT, padx=5)
-        ttk.Button(test_frame, text="Next Test ▶", command=self._next_test).pack(side=tk.LEFT, padx=2)
+        if test_indices is None:
+            test_indices = range(len(sessions))
         
-        # Plot type selection
-        plot_frame = ttk.LabelFrame(control_frame, text="Plot Type", padding="5")
-        plot_frame.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
+            if len(session["altitude"]):
+                t = self._elapsed(session, "altitude")
+                self._line(ax, t, session["altitude"], label=f'Test {idx+1} Drone Alt')
+            
+            if len(session["target_altitude"]):
+                t = self._elapsed(session, "target_altitude")
+                self._line(ax, t, session["target_altitude"], '--', label=f'Test {idx+1} Target Alt')
         
-        self.plot_combo = ttk.Combobox(plot_frame, values=[p[0] for p in self.PLOT_TYPES], 
-                                        state="readonly", width=30)
-        self.plot_combo.current(0)
-        self.plot_combo.pack(side=tk.LEFT, padx=5)
-        self.plot_combo.bind("<<ComboboxSelected>>", self._on_plot_type_change)
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Altitude (m)')
+        ax.set_title('Altitude vs Time')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    
+    def plot_distance(self, sessions, all_tests=False, test_indices=None):
+        """Plot distance to target over time."""
+        ax = self._subplot(111)
         
-        ttk.Button(plot_frame, text="◀ Prev", command=self._prev_plot).pack(side=tk.LEFT, padx=2)
-        ttk.Button(plot_frame, text="Next ▶", command=self._next_plot).pack(side=tk.LEFT, padx=2)
+        if test_indices is None:
+            test_indices = range(len(sessions))
         
-        # View options
-        view_frame = ttk.LabelFrame(control_frame, text="View Options", padding="5")
-        view_frame.pack(side=tk.LEFT, padx=5)
+        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
+            if len(session["distance_to_target"]):
+                t = self._elapsed(session, "distance_to_target")
+                self._line(ax, t, session["distance_to_target"], label=f'Test {idx+1}')
         
-        self.show_all_tests = tk.BooleanVar(value=False)
-        ttk.Checkbutton(view_frame, text="Show all tests", variable=self.show_all_tests,
-                       command=self._update_plot).pack(side=tk.LEFT, padx=5)
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Distance (m)')
+        ax.set_title('Distance to Target')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    
+    def plot_relative_position(self, sessions, all_tests=False, test_indices=None):
+        """Plot target position relative to the interceptor, aligned in time."""
+        if test_indices is None:
+            test_indices = range(len(sessions))
         
-        # Figure frame (center)
-        fig_frame = ttk.Frame(main_frame)
-        fig_frame.pack(fill=tk.BOTH, expand=True)
+        n_sessions = len(sessions)
         
-        # Create matplotlib figure
-        self.fig = plt.Figure(figsize=(14, 8), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=fig_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
+            ax = self._subplot(n_sessions, 1, i+1)
+            
+            if len(session["interceptor_location"]) and len(session["target_location"]):
+                times, error = relative_position_error(session, self.aligner)
+                t = times - session["start_time"]
+                self._line(ax, t, error[:, 0], label='North', color='red')
+                self._line(ax, t, error[:, 1], label='East', color='green')
+                self._line(ax, t, error[:, 2], label='Up', color='blue')
+                self._line(ax, t, np.linalg.norm(error, axis=1), label='Norm', color='black')
+                if len(session["distance_to_target"]):
+                    self._line(ax, self._elapsed(session, "distance_to_target"), session["distance_to_target"],
+                               label='Logged Distance', color='gray', linestyle='--')
+            
+            ax.set_ylabel('Error (m)')
+            ax.set_title(f'Test {idx+1} - Target Relative to Interceptor')
+            ax.legend(loc='upper right')
+            ax.grid(True, alpha=0.3)
         
-        # Navigation toolbar
-        toolbar_frame = ttk.Frame(fig_frame)
-        toolbar_frame.pack(fill=tk.X)
-        self.toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
-        self.toolbar.update()
+        if n_sessions > 0:
+            ax.set_xlabel('Time (s)')
+    
+    def plot_velocity(self, sessions, all_tests=False, test_indices=None):
+        """Plot velocity components."""
+        if test_indices is None:
+            test_indices = range(len(sessions))
         
-        # Status bar (bottom)
-        status_frame = ttk.Frame(main_frame)
-        status_frame.pack(fill=tk.X, pady=(5, 0))
+        n_sessions = len(sessions)
         
-        self.status_label = ttk.Label(status_frame, text="Ready", relief=tk.SUNKEN)
-        self.status_label.pack(fill=tk.X)
+        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
+            ax = self._subplot(n_sessions, 1, i+1)
+            
+            if len(session["velocity"]):
+                vel = session["velocity"]
+                t = self._elapsed(session, "velocity")
+                self._line(ax, t, vel[:, 0], label='Vx', color='red')
+                self._line(ax, t, vel[:, 1], label='Vy', color='green')
+                self._line(ax, t, vel[:, 2], label='Vz', color='blue')
+            
+            ax.set_ylabel('Velocity (m/s)')
+            ax.set_title(f'Test {idx+1} - Velocity Components')
+            ax.legend(loc='upper right')
+            ax.grid(True, alpha=0.3)
         
-        # Keyboard bindings
-        self.root.bind("<Left>", lambda e: self._prev_plot())
-        self.root.bind("<Right>", lambda e: self._next_plot())
-        self.root.bind("<Up>", lambda e: self._prev_test())
-        self.root.bind("<Down>", lambda e: self._next_test())
-        self.root.bind("<Home>", lambda e: self._first_plot())
-        self.root.bind("<End>", lambda e: self._last_plot())
+        if n_sessions > 0:
+            ax.set_xlabel('Time (s)')
     
-    def _open_file_dialog(self):
-        """Open file dialog to select a log file."""
-        initial_dir = os.path.join(os.path.dirname(__file__), "..", "output", "logs")
-        if not os.path.exists(initial_dir):
-            initial_dir = os.path.dirname(__file__)
+    def plot_speed(self, sessions, all_tests=False, test_indices=None):
+        """Plot velocity norm and speed."""
+        ax = self._subplot(111)
         
-        filepath = filedialog.askopenfilename(
-            initialdir=initial_dir,
-            title="Select Log File",
-            filetypes=[("Log files", "*.log"), ("All files", "*.*")]
-        )
+        if test_indices is None:
+            test_indices = range(len(sessions))
         
-        if filepath:
-            self._load_log_file(filepath)
-    
-    def _load_latest_log(self):
-        """Load the latest log file from the output/logs directory."""
-        log_dir = os.path.join(os.path.dirname(__file__), "..", "output", "logs")
-        if not os.path.exists(log_dir):
-            self._set_status("Log directory not found. Please open a log file manually.")
-            return
+        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
+            if len(session["velocity_norm"]):
+                t = self._elapsed(session, "velocity_norm")
+                self._line(ax, t, session["velocity_norm"], label=f'Test {idx+1} Vel Norm')
+            
+            if len(session["speed"]):
+                t = self._elapsed(session, "speed")
+                self._line(ax, t, session["speed"], '--', label=f'Test {idx+1} Speed')
         
-        log_files = glob.glob(os.path.join(log_dir, "*.log"))
-        if not log_files:
-            self._set_status("No log files found. Please open a log file manually.")
-            return
-        
-        # Sort by modification time and get the latest
-        latest_log = max(log_files, key=os.path.getmtime)
-        self._load_log_file(latest_log)
-    
-    def _load_log_file(self, filepath):
-        """Load and parse a log file."""
-        self._set_status(f"Loading {os.path.basename(filepath)}...")
-        self.root.update()
-        
-        try:
-            self.sessions = LogParser.parse_log_file(filepath)
-            self.log_file_path = filepath
-            self.current_test_index = 0
-            self.current_plot_index = 0
-            
-            # Update UI
-            self.file_label.config(text=os.path.basename(filepath))
-            self._update_test_label()
-            self._update_plot()
-            
-            if self.sessions:
-                self._set_status(f"Loaded {len(self.sessions)} test(s) from {os.path.basename(filepath)}")
-            else:
-                self._set_status("No GUIDED mode sessions found in log file.")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load log file: {str(e)}")
-            self._set_status(f"Error loading file: {str(e)}")
-    
-    def _reload_file(self):
-        """Reload the current log file."""
-        if self.log_file_path:
-            self._load_log_file(self.log_file_path)
-    
-    def _prev_test(self):
-        """Go to previous test."""
-        if self.sessions and self.current_test_index > 0:
-            self.current_test_index -= 1
-            self._update_test_label()
-            self._update_plot()
-    
-    def _next_test(self):
-        """Go to next test."""
-        if self.sessions and self.current_test_index < len(self.sessions) - 1:
-            self.current_test_index += 1
-            self._update_test_label()
-            self._update_plot()
-    
-    def _prev_plot(self):
-        """Go to previous plot type."""
-        if self.current_plot_index > 0:
-            self.current_plot_index -= 1
-            self.plot_combo.current(self.current_plot_index)
-            self._update_plot()
-    
-    def _next_plot(self):
-        """Go to next plot type."""
-        if self.current_plot_index < len(self.PLOT_TYPES) - 1:
-            self.current_plot_index += 1
-            self.plot_combo.current(self.current_plot_index)
-            self._update_plot()
-    
-    def _first_plot(self):
-        """Go to first plot type."""
-        self.current_plot_index = 0
-        self.plot_combo.current(0)
-        self._update_plot()
-    
-    def _last_plot(self):
-        """Go to last plot type."""
-        self.current_plot_index = len(self.PLOT_TYPES) - 1
-        self.plot_combo.current(self.current_plot_index)
-        self._update_plot()
-    
-    def _on_plot_type_change(self, event=None):
-        """Handle plot type selection change."""
-        self.current_plot_index = self.plot_combo.current()
-        self._update_plot()
-    
-    def _update_test_label(self):
-        """Update the test navigation label."""
-        if self.sessions:
-            self.test_label.config(text=f"Test: {self.current_test_index + 1}/{len(self.sessions)}")
-        else:
-            self.test_label.config(text="Test: 0/0")
-    
-    def _set_status(self, message):
-        """Update the status bar."""
-        self.status_label.config(text=message)
-    
-    def _update_plot(self):
-        """Update the current plot."""
-        if not self.sessions:
-            self.fig.clear()
-            ax = self.fig.add_subplot(111)
-            ax.text(0.5, 0.5, "No data available.\nPlease load a log file.", 
-                   ha='center', va='center', fontsize=14)
-            ax.set_xlim(0, 1)
-            ax.set_ylim(0, 1)
-            self.canvas.draw()
-            return
-        
-        # Get the plot method name
-        _, method_name = self.PLOT_TYPES[self.current_plot_index]
-        plot_method = getattr(self, method_name)
-        
-        # Clear figure and create plot
-        self.fig.clear()
-        
-        if self.show_all_tests.get():
-            plot_method(self.sessions, all_tests=True)
-        else:
-            plot_method([self.sessions[self.current_test_index]], 
-                       test_indices=[self.current_test_index])
-        
-        self.fig.tight_layout()
-        self.canvas.draw()
-    
-    # ==================== PLOT METHODS ====================
-    
-    def plot_3d_trajectory(self, sessions, all_tests=False, test_indices=None):
-        """Plot 3D trajectory of interceptor and target."""
-        ax = self.fig.add_subplot(111, projection='3d')
-        
-        if test_indices is None:
-            test_indices = range(len(sessions))
-        
-        colors = plt.cm.tab10(np.linspace(0, 1, len(sessions)))
-        
-        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["interceptor_location"]:
-                locs = np.array(session["interceptor_location"])
-                ax.plot(locs[:, 1], locs[:, 0], locs[:, 2], 
-                       label=f'Test {idx+1} Interceptor', color=colors[i])
-                ax.scatter(locs[0, 1], locs[0, 0], locs[0, 2], 
-                          marker='o', s=100, color=colors[i])
-                ax.scatter(locs[-1, 1], locs[-1, 0], locs[-1, 2], 
-                          marker='x', s=100, color=colors[i])
-            
-            if session["target_location"]:
-                target_locs = np.array(session["target_location"])
-                ax.plot(target_locs[:, 1], target_locs[:, 0], target_locs[:, 2], 
-                       linestyle='--', label=f'Test {idx+1} Target', color=colors[i], alpha=0.7)
-        
-        ax.set_xlabel('Longitude (East)')
-        ax.set_ylabel('Latitude (North)')
-        ax.set_zlabel('Altitude (m)')
-        ax.set_title('3D Trajectory')
-        ax.legend()
-    
-    def plot_altitude(self, sessions, all_tests=False, test_indices=None):
-        """Plot altitude over time."""
-        ax = self.fig.add_subplot(111)
-        
-        if test_indices is None:
-            test_indices = range(len(sessions))
-        
-        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["altitude"]:
-                t = np.arange(len(session["altitude"]))
-                ax.plot(t, session["altitude"], label=f'Test {idx+1} Drone Alt')
-            
-            if session["target_altitude"]:
-                t = np.arange(len(session["target_altitude"]))
-                ax.plot(t, session["target_altitude"], '--', label=f'Test {idx+1} Target Alt')
-        
-        ax.set_xlabel('Time Steps')
-        ax.set_ylabel('Altitude (m)')
-        ax.set_title('Altitude vs Time')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-    
-    def plot_distance(self, sessions, all_tests=False, test_indices=None):
-        """Plot distance to target over time."""
-        ax = self.fig.add_subplot(111)
-        
-        if test_indices is None:
-            test_indices = range(len(sessions))
-        
-        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["distance_to_target"]:
-                t = np.arange(len(session["distance_to_target"]))
-                ax.plot(t, session["distance_to_target"], label=f'Test {idx+1}')
-        
-        ax.set_xlabel('Time Steps')
-        ax.set_ylabel('Distance (m)')
-        ax.set_title('Distance to Target')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-    
-    def plot_velocity(self, sessions, all_tests=False, test_indices=None):
-        """Plot velocity components."""
-        if test_indices is None:
-            test_indices = range(len(sessions))
-        
-        n_sessions = len(sessions)
-        
-        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
-            
-            if session["velocity"]:
-                vel = np.array(session["velocity"])
-                t = np.arange(len(vel))
-                ax.plot(t, vel[:, 0], label='Vx', color='red')
-                ax.plot(t, vel[:, 1], label='Vy', color='green')
-                ax.plot(t, vel[:, 2], label='Vz', color='blue')
-            
-            ax.set_ylabel('Velocity (m/s)')
-            ax.set_title(f'Test {idx+1} - Velocity Components')
-            ax.legend(loc='upper right')
-            ax.grid(True, alpha=0.3)
-        
-        if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
-    
-    def plot_speed(self, sessions, all_tests=False, test_indices=None):
-        """Plot velocity norm and speed."""
-        ax = self.fig.add_subplot(111)
-        
-        if test_indices is None:
-            test_indices = range(len(sessions))
-        
-        for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["velocity_norm"]:
-                t = np.arange(len(session["velocity_norm"]))
-                ax.plot(t, session["velocity_norm"], label=f'Test {idx+1} Vel Norm')
-            
-            if session["speed"]:
-                t = np.arange(len(session["speed"]))
-                ax.plot(t, session["speed"], '--', label=f'Test {idx+1} Speed')
-        
-        ax.set_xlabel('Time Steps')
+        ax.set_xlabel('Time (s)')
         ax.set_ylabel('Speed (m/s)')
         ax.set_title('Velocity Norm & Speed')
         ax.legend()
@@ -771,14 +435,14 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["attitude"]:
-                att = np.array(session["attitude"])
-                t = np.arange(len(att))
-                ax.plot(t, att[:, 0], label='Roll', color='red')
-                ax.plot(t, att[:, 1], label='Pitch', color='green')
-                ax.plot(t, att[:, 2], label='Yaw', color='blue')
+            if len(session["attitude"]):
+                att = session["attitude"]
+                t = self._elapsed(session, "attitude")
+                self._line(ax, t, att[:, 0], label='Roll', color='red')
+                self._line(ax, t, att[:, 1], label='Pitch', color='green')
+                self._line(ax, t, att[:, 2], label='Yaw', color='blue')
             
             ax.set_ylabel('Angle (deg)')
             ax.set_title(f'Test {idx+1} - Attitude (R, P, Y)')
@@ -786,7 +450,7 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_pixel_errors(self, sessions, all_tests=False, test_indices=None):
         """Plot pixel errors."""
@@ -796,13 +460,13 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["pixel_errors"]:
-                errs = np.array(session["pixel_errors"])
-                t = np.arange(len(errs))
-                ax.plot(t, errs[:, 0], label='X Error', color='red')
-                ax.plot(t, errs[:, 1], label='Y Error', color='blue')
+            if len(session["pixel_errors"]):
+                errs = session["pixel_errors"]
+                t = self._elapsed(session, "pixel_errors")
+                self._line(ax, t, errs[:, 0], label='X Error', color='red')
+                self._line(ax, t, errs[:, 1], label='Y Error', color='blue')
             
             ax.set_ylabel('Error (pixels)')
             ax.set_title(f'Test {idx+1} - Pixel Errors')
@@ -810,25 +474,25 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_depth(self, sessions, all_tests=False, test_indices=None):
         """Plot depth over time."""
-        ax = self.fig.add_subplot(111)
+        ax = self._subplot(111)
         
         if test_indices is None:
             test_indices = range(len(sessions))
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["depth"]:
-                t = np.arange(len(session["depth"]))
-                ax.plot(t, session["depth"], label=f'Test {idx+1} Depth')
+            if len(session["depth"]):
+                t = self._elapsed(session, "depth")
+                self._line(ax, t, session["depth"], label=f'Test {idx+1} Depth')
             
-            if session["depth_virtual"]:
-                t = np.arange(len(session["depth_virtual"]))
-                ax.plot(t, session["depth_virtual"], '--', label=f'Test {idx+1} Depth Virtual')
+            if len(session["depth_virtual"]):
+                t = self._elapsed(session, "depth_virtual")
+                self._line(ax, t, session["depth_virtual"], '--', label=f'Test {idx+1} Depth Virtual')
         
-        ax.set_xlabel('Time Steps')
+        ax.set_xlabel('Time (s)')
         ax.set_ylabel('Depth (m)')
         ax.set_title('Depth')
         ax.legend()
@@ -842,14 +506,14 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["desired_accel_initial"]:
-                acc = np.array(session["desired_accel_initial"])
-                t = np.arange(len(acc))
-                ax.plot(t, acc[:, 0], label='Ax', color='red')
-                ax.plot(t, acc[:, 1], label='Ay', color='green')
-                ax.plot(t, acc[:, 2], label='Az', color='blue')
+            if len(session["desired_accel_initial"]):
+                acc = session["desired_accel_initial"]
+                t = self._elapsed(session, "desired_accel_initial")
+                self._line(ax, t, acc[:, 0], label='Ax', color='red')
+                self._line(ax, t, acc[:, 1], label='Ay', color='green')
+                self._line(ax, t, acc[:, 2], label='Az', color='blue')
             
             ax.set_ylabel('Accel (m/s²)')
             ax.set_title(f'Test {idx+1} - Desired Acceleration (Initial)')
@@ -857,7 +521,7 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_accel_final(self, sessions, all_tests=False, test_indices=None):
         """Plot final desired acceleration."""
@@ -867,14 +531,14 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["desired_accel_final"]:
-                acc = np.array(session["desired_accel_final"])
-                t = np.arange(len(acc))
-                ax.plot(t, acc[:, 0], label='Ax', color='red')
-                ax.plot(t, acc[:, 1], label='Ay', color='green')
-                ax.plot(t, acc[:, 2], label='Az', color='blue')
+            if len(session["desired_accel_final"]):
+                acc = session["desired_accel_final"]
+                t = self._elapsed(session, "desired_accel_final")
+                self._line(ax, t, acc[:, 0], label='Ax', color='red')
+                self._line(ax, t, acc[:, 1], label='Ay', color='green')
+                self._line(ax, t, acc[:, 2], label='Az', color='blue')
             
             ax.set_ylabel('Accel (m/s²)')
             ax.set_title(f'Test {idx+1} - Desired Acceleration (Final)')
@@ -882,7 +546,7 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_xyz_pseudo(self, sessions, all_tests=False, test_indices=None):
         """Plot XYZ Pseudo Frame."""
@@ -892,14 +556,14 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["xyz_pseudo"]:
-                xyz = np.array(session["xyz_pseudo"])
-                t = np.arange(len(xyz))
-                ax.plot(t, xyz[:, 0], label='X', color='red')
-                ax.plot(t, xyz[:, 1], label='Y', color='green')
-                ax.plot(t, xyz[:, 2], label='Z', color='blue')
+            if len(session["xyz_pseudo"]):
+                xyz = session["xyz_pseudo"]
+                t = self._elapsed(session, "xyz_pseudo")
+                self._line(ax, t, xyz[:, 0], label='X', color='red')
+                self._line(ax, t, xyz[:, 1], label='Y', color='green')
+                self._line(ax, t, xyz[:, 2], label='Z', color='blue')
             
             ax.set_ylabel('Position (m)')
             ax.set_title(f'Test {idx+1} - XYZ Pseudo Frame')
@@ -907,7 +571,7 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_control_commands(self, sessions, all_tests=False, test_indices=None):
         """Plot control commands."""
@@ -917,14 +581,14 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["control_commands"]:
-                cmd = np.array(session["control_commands"])
-                t = np.arange(len(cmd))
-                ax.plot(t, cmd[:, 0], label='Pitch', color='red')
-                ax.plot(t, cmd[:, 1], label='Yaw', color='green')
-                ax.plot(t, cmd[:, 2], label='Roll', color='blue')
+            if len(session["control_commands"]):
+                cmd = session["control_commands"]
+                t = self._elapsed(session, "control_commands")
+                self._line(ax, t, cmd[:, 0], label='Pitch', color='red')
+                self._line(ax, t, cmd[:, 1], label='Yaw', color='green')
+                self._line(ax, t, cmd[:, 2], label='Roll', color='blue')
             
             ax.set_ylabel('Command')
             ax.set_title(f'Test {idx+1} - Control Commands')
@@ -932,21 +596,21 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_throttle(self, sessions, all_tests=False, test_indices=None):
         """Plot throttle over time."""
-        ax = self.fig.add_subplot(111)
+        ax = self._subplot(111)
         
         if test_indices is None:
             test_indices = range(len(sessions))
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["throttle"]:
-                t = np.arange(len(session["throttle"]))
-                ax.plot(t, session["throttle"], label=f'Test {idx+1}')
+            if len(session["throttle"]):
+                t = self._elapsed(session, "throttle")
+                self._line(ax, t, session["throttle"], label=f'Test {idx+1}')
         
-        ax.set_xlabel('Time Steps')
+        ax.set_xlabel('Time (s)')
         ax.set_ylabel('Throttle')
         ax.set_title('Throttle')
         ax.legend()
@@ -961,22 +625,22 @@ class PlotterApp:
         n_cols = 2
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["bs_throttle"]:
+            if len(session["bs_throttle"]):
                 bs_data = session["bs_throttle"]
-                t = np.arange(len(bs_data))
+                t = self._elapsed(session, "bs_throttle")
                 
                 # Throttle
-                ax1 = self.fig.add_subplot(n_sessions, n_cols, i*n_cols + 1)
-                ax1.plot(t, [d['thr'] for d in bs_data], label='Throttle', color='blue')
+                ax1 = self._subplot(n_sessions, n_cols, i*n_cols + 1)
+                self._line(ax1, t, bs_data['thr'], label='Throttle', color='blue')
                 ax1.set_ylabel('Throttle')
                 ax1.set_title(f'Test {idx+1} - BS Throttle')
                 ax1.legend()
                 ax1.grid(True, alpha=0.3)
                 
                 # Errors
-                ax2 = self.fig.add_subplot(n_sessions, n_cols, i*n_cols + 2)
-                ax2.plot(t, [d['alt_err'] for d in bs_data], label='Alt Err (m)', color='red')
-                ax2.plot(t, [d['rate_err'] for d in bs_data], label='Rate Err (m/s)', color='green')
+                ax2 = self._subplot(n_sessions, n_cols, i*n_cols + 2)
+                self._line(ax2, t, bs_data['alt_err'], label='Alt Err (m)', color='red')
+                self._line(ax2, t, bs_data['rate_err'], label='Rate Err (m/s)', color='green')
                 ax2.set_ylabel('Error')
                 ax2.set_title(f'Test {idx+1} - BS Errors')
                 ax2.legend()
@@ -991,22 +655,22 @@ class PlotterApp:
         n_cols = 2
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["bs_roll"]:
+            if len(session["bs_roll"]):
                 bs_data = session["bs_roll"]
-                t = np.arange(len(bs_data))
+                t = self._elapsed(session, "bs_roll")
                 
                 # Roll angle
-                ax1 = self.fig.add_subplot(n_sessions, n_cols, i*n_cols + 1)
-                ax1.plot(t, [d['phi'] for d in bs_data], label='Phi (deg)', color='blue')
+                ax1 = self._subplot(n_sessions, n_cols, i*n_cols + 1)
+                self._line(ax1, t, bs_data['phi'], label='Phi (deg)', color='blue')
                 ax1.set_ylabel('Roll (deg)')
                 ax1.set_title(f'Test {idx+1} - BS Roll')
                 ax1.legend()
                 ax1.grid(True, alpha=0.3)
                 
                 # Errors
-                ax2 = self.fig.add_subplot(n_sessions, n_cols, i*n_cols + 2)
-                ax2.plot(t, [d['east_err'] for d in bs_data], label='East Err (m)', color='red')
-                ax2.plot(t, [d['vel_err'] for d in bs_data], label='Vel Err (m/s)', color='green')
+                ax2 = self._subplot(n_sessions, n_cols, i*n_cols + 2)
+                self._line(ax2, t, bs_data['east_err'], label='East Err (m)', color='red')
+                self._line(ax2, t, bs_data['vel_err'], label='Vel Err (m/s)', color='green')
                 ax2.set_ylabel('Error')
                 ax2.set_title(f'Test {idx+1} - BS Roll Errors')
                 ax2.legend()
@@ -1021,15 +685,15 @@ class PlotterApp:
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
             # Create 2x2 subplot grid for each test
-            ax1 = self.fig.add_subplot(n_sessions, 2, i*2 + 1)
-            ax2 = self.fig.add_subplot(n_sessions, 2, i*2 + 2)
+            ax1 = self._subplot(n_sessions, 2, i*2 + 1)
+            ax2 = self._subplot(n_sessions, 2, i*2 + 2)
             
             # Throttle Levant (altitude)
-            if session["bs_levant"]:
+            if len(session["bs_levant"]):
                 levant_data = session["bs_levant"]
-                t = np.arange(len(levant_data))
-                ax1.plot(t, [d['rate_hat'] for d in levant_data], label='Rate Hat (m/s)', color='blue')
-                ax1.plot(t, [d['accel_hat'] for d in levant_data], label='Accel Hat (m/s²)', color='red')
+                t = self._elapsed(session, "bs_levant")
+                self._line(ax1, t, levant_data['rate_hat'], label='Rate Hat (m/s)', color='blue')
+                self._line(ax1, t, levant_data['accel_hat'], label='Accel Hat (m/s²)', color='red')
                 ax1.set_ylabel('Estimate')
                 ax1.set_title(f'Test {idx+1} - Altitude Levant (BS_LEVANT)')
                 ax1.legend(loc='upper right')
@@ -1039,11 +703,11 @@ class PlotterApp:
                 ax1.set_title(f'Test {idx+1} - Altitude Levant')
             
             # Roll Levant (lateral)
-            if session["bs_roll_levant"]:
+            if len(session["bs_roll_levant"]):
                 roll_levant_data = session["bs_roll_levant"]
-                t = np.arange(len(roll_levant_data))
-                ax2.plot(t, [d['vel_hat'] for d in roll_levant_data], label='Vel Hat (m/s)', color='blue')
-                ax2.plot(t, [d['accel_hat'] for d in roll_levant_data], label='Accel Hat (m/s²)', color='red')
+                t = self._elapsed(session, "bs_roll_levant")
+                self._line(ax2, t, roll_levant_data['vel_hat'], label='Vel Hat (m/s)', color='blue')
+                self._line(ax2, t, roll_levant_data['accel_hat'], label='Accel Hat (m/s²)', color='red')
                 ax2.set_ylabel('Estimate')
                 ax2.set_title(f'Test {idx+1} - Lateral Levant (BS_ROLL_LEVANT)')
                 ax2.legend(loc='upper right')
@@ -1053,8 +717,8 @@ class PlotterApp:
                 ax2.set_title(f'Test {idx+1} - Lateral Levant')
         
         if n_sessions > 0:
-            ax1.set_xlabel('Time Steps')
-            ax2.set_xlabel('Time Steps')
+            ax1.set_xlabel('Time (s)')
+            ax2.set_xlabel('Time (s)')
     
     def plot_levant_alt_state(self, sessions, all_tests=False, test_indices=None):
         """Plot Levant altitude state: z1_a (altitude), z1_r (rate), z2_r (acceleration)."""
@@ -1065,30 +729,30 @@ class PlotterApp:
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
             # Create 3-subplot grid for each test: z1_a, z1_r, z2_r
-            ax1 = self.fig.add_subplot(n_sessions, 3, i*3 + 1)
-            ax2 = self.fig.add_subplot(n_sessions, 3, i*3 + 2)
-            ax3 = self.fig.add_subplot(n_sessions, 3, i*3 + 3)
+            ax1 = self._subplot(n_sessions, 3, i*3 + 1)
+            ax2 = self._subplot(n_sessions, 3, i*3 + 2)
+            ax3 = self._subplot(n_sessions, 3, i*3 + 3)
             
-            if session["levant_alt_state"]:
+            if len(session["levant_alt_state"]):
                 state_data = session["levant_alt_state"]
-                t = np.arange(len(state_data))
+                t = self._elapsed(session, "levant_alt_state")
                 
                 # z1_a - Altitude estimate
-                ax1.plot(t, [d['z1_a'] for d in state_data], label='z1_a (Alt)', color='blue')
+                self._line(ax1, t, state_data['z1_a'], label='z1_a (Alt)', color='blue')
                 ax1.set_ylabel('Altitude (m)')
                 ax1.set_title(f'Test {idx+1} - z1_a (Altitude)')
                 ax1.legend(loc='upper right')
                 ax1.grid(True, alpha=0.3)
                 
                 # z1_r - Rate estimate
-                ax2.plot(t, [d['z1_r'] for d in state_data], label='z1_r (Rate)', color='green')
+                self._line(ax2, t, state_data['z1_r'], label='z1_r (Rate)', color='green')
                 ax2.set_ylabel('Rate (m/s)')
                 ax2.set_title(f'Test {idx+1} - z1_r (Alt Rate)')
                 ax2.legend(loc='upper right')
                 ax2.grid(True, alpha=0.3)
                 
                 # z2_r - Acceleration estimate
-                ax3.plot(t, [d['z2_r'] for d in state_data], label='z2_r (Accel)', color='red')
+                self._line(ax3, t, state_data['z2_r'], label='z2_r (Accel)', color='red')
                 ax3.set_ylabel('Acceleration (m/s²)')
                 ax3.set_title(f'Test {idx+1} - z2_r (Acceleration)')
                 ax3.legend(loc='upper right')
@@ -1102,9 +766,9 @@ class PlotterApp:
                 ax3.set_title(f'Test {idx+1} - z2_r (Acceleration)')
         
         if n_sessions > 0:
-            ax1.set_xlabel('Time Steps')
-            ax2.set_xlabel('Time Steps')
-            ax3.set_xlabel('Time Steps')
+            ax1.set_xlabel('Time (s)')
+            ax2.set_xlabel('Time (s)')
+            ax3.set_xlabel('Time (s)')
     
     def plot_bs_state(self, sessions, all_tests=False, test_indices=None):
         """Plot backstepping state data."""
@@ -1115,24 +779,24 @@ class PlotterApp:
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
             # Create 2x2 subplot grid for each test
-            ax1 = self.fig.add_subplot(n_sessions, 2, i*2 + 1)
-            ax2 = self.fig.add_subplot(n_sessions, 2, i*2 + 2)
+            ax1 = self._subplot(n_sessions, 2, i*2 + 1)
+            ax2 = self._subplot(n_sessions, 2, i*2 + 2)
             
-            if session["bs_state"]:
+            if len(session["bs_state"]):
                 state_data = session["bs_state"]
-                t = np.arange(len(state_data))
+                t = self._elapsed(session, "bs_state")
                 
                 # Altitude comparison
-                ax1.plot(t, [d['drone_alt'] for d in state_data], label='Drone Alt (m)', color='blue')
-                ax1.plot(t, [d['target_alt'] for d in state_data], label='Target Alt (m)', color='red', linestyle='--')
+                self._line(ax1, t, state_data['drone_alt'], label='Drone Alt (m)', color='blue')
+                self._line(ax1, t, state_data['target_alt'], label='Target Alt (m)', color='red', linestyle='--')
                 ax1.set_ylabel('Altitude (m)')
                 ax1.set_title(f'Test {idx+1} - Altitude (BS_STATE)')
                 ax1.legend(loc='upper right')
                 ax1.grid(True, alpha=0.3)
                 
                 # Velocity and acceleration
-                ax2.plot(t, [d['drone_vz'] for d in state_data], label='Drone Vz (m/s)', color='green')
-                ax2.plot(t, [d['drone_az'] for d in state_data], label='Drone Az (m/s²)', color='orange')
+                self._line(ax2, t, state_data['drone_vz'], label='Drone Vz (m/s)', color='green')
+                self._line(ax2, t, state_data['drone_az'], label='Drone Az (m/s²)', color='orange')
                 ax2.set_ylabel('Value')
                 ax2.set_title(f'Test {idx+1} - Vz & Az (BS_STATE)')
                 ax2.legend(loc='upper right')
@@ -1144,26 +808,26 @@ class PlotterApp:
                 ax2.set_title(f'Test {idx+1} - BS_STATE Velocity')
         
         if n_sessions > 0:
-            ax1.set_xlabel('Time Steps')
-            ax2.set_xlabel('Time Steps')
+            ax1.set_xlabel('Time (s)')
+            ax2.set_xlabel('Time (s)')
     
     def plot_virtual_accel(self, sessions, all_tests=False, test_indices=None):
         """Plot virtual accelerations."""
-        ax = self.fig.add_subplot(111)
+        ax = self._subplot(111)
         
         if test_indices is None:
             test_indices = range(len(sessions))
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            if session["virtual_east_accel"]:
-                t = np.arange(len(session["virtual_east_accel"]))
-                ax.plot(t, session["virtual_east_accel"], label=f'Test {idx+1} East Accel')
+            if len(session["virtual_east_accel"]):
+                t = self._elapsed(session, "virtual_east_accel")
+                self._line(ax, t, session["virtual_east_accel"], label=f'Test {idx+1} East Accel')
             
-            if session["virtual_down_accel"]:
-                t = np.arange(len(session["virtual_down_accel"]))
-                ax.plot(t, session["virtual_down_accel"], '--', label=f'Test {idx+1} Down Accel')
+            if len(session["virtual_down_accel"]):
+                t = self._elapsed(session, "virtual_down_accel")
+                self._line(ax, t, session["virtual_down_accel"], '--', label=f'Test {idx+1} Down Accel')
         
-        ax.set_xlabel('Time Steps')
+        ax.set_xlabel('Time (s)')
         ax.set_ylabel('Acceleration (m/s²)')
         ax.set_title('Virtual Accelerations')
         ax.legend()
@@ -1177,15 +841,15 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["error_old_xy"]:
-                t = np.arange(len(session["error_old_xy"]))
-                ax.plot(t, session["error_old_xy"], label='Error XY', color='red')
+            if len(session["error_old_xy"]):
+                t = self._elapsed(session, "error_old_xy")
+                self._line(ax, t, session["error_old_xy"], label='Error XY', color='red')
             
-            if session["error_old_z"]:
-                t = np.arange(len(session["error_old_z"]))
-                ax.plot(t, session["error_old_z"], label='Error Z', color='blue')
+            if len(session["error_old_z"]):
+                t = self._elapsed(session, "error_old_z")
+                self._line(ax, t, session["error_old_z"], label='Error Z', color='blue')
             
             ax.set_ylabel('Error')
             ax.set_title(f'Test {idx+1} - Error XY & Z')
@@ -1193,7 +857,7 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
     
     def plot_raw_imu(self, sessions, all_tests=False, test_indices=None):
         """Plot raw IMU accelerometer data."""
@@ -1203,14 +867,14 @@ class PlotterApp:
         n_sessions = len(sessions)
         
         for i, (session, idx) in enumerate(zip(sessions, test_indices)):
-            ax = self.fig.add_subplot(n_sessions, 1, i+1)
+            ax = self._subplot(n_sessions, 1, i+1)
             
-            if session["raw_imu"]:
-                imu_data = np.array(session["raw_imu"])
-                t = np.arange(len(imu_data))
-                ax.plot(t, imu_data[:, 0], label='IMU X (m/s²)', color='red')
-                ax.plot(t, imu_data[:, 1], label='IMU Y (m/s²)', color='green')
-                ax.plot(t, imu_data[:, 2], label='IMU Z (m/s²)', color='blue')
+            if len(session["raw_imu"]):
+                imu_data = session["raw_imu"]
+                t = self._elapsed(session, "raw_imu")
+                self._line(ax, t, imu_data[:, 0], label='IMU X (m/s²)', color='red')
+                self._line(ax, t, imu_data[:, 1], label='IMU Y (m/s²)', color='green')
+                self._line(ax, t, imu_data[:, 2], label='IMU Z (m/s²)', color='blue')
             else:
                 ax.text(0.5, 0.5, 'No raw IMU data available', ha='center', va='center')
             
@@ -1220,23 +884,970 @@ class PlotterApp:
             ax.grid(True, alpha=0.3)
         
         if n_sessions > 0:
-            ax.set_xlabel('Time Steps')
+            ax.set_xlabel('Time (s)')
 
 
-def main():
-    """Main entry point."""
-    log_file = None
+class PlotterApp(SessionPlotter):
+    """Main application class for log plotting."""
     
-    # Check if log file path is provided as argument
-    if len(sys.argv) > 1:
-        log_file = sys.argv[1]
-        if not os.path.exists(log_file):
-            print(f"Error: File not found: {log_file}")
-            sys.exit(1)
+    def __init__(self, root, log_file_path=None):
+        from matplotlib.figure import Figure
+        _import_tk()
+        super().__init__(Figure(figsize=(14, 8), dpi=100))
+        self.root = root
+        self.root.title("Visual Guidance Log Plotter")
+        self.root.geometry("1400x900")
+        
+        # Data storage
+        self.sessions = []
+        self.session_cache = SessionCache()
+        self.log_index = None  # LogIndex behind lazily parsed sessions
+        self.loader = None  # LogLoader parsing the log in the background
+        self._load_job = None
+        self._prefetch_job = None
+        self.current_test_index = 0
+        self.current_plot_index = 0
+        self.log_file_path = log_file_path
+        self._search = None  # Future of the running session search
+        
+        self._plot_layout = None  # _current_layout() of the figure's axes
+        
+        # Rendered images per view: _render_key() -> (canvas region, bytes)
+        self._rendered = OrderedDict()
+        self._rendered_bytes = 0
+        # Data versions in the render keys: the log's, bumped when other sessions
+        # are loaded, and per session index, bumped when a followed session grows
+        self._log_version = 0
+        self._session_versions = {}
+        # Axes -> (canvas region without its lines and legend, _axes_signature() then),
+        # kept by the last _draw_with_backgrounds()
+        self._backgrounds = {}
+        self._rebuild_job = None
+        self._prerender_queue = []  # (test index, plot index) to render off-screen when idle
+        
+        # Follow mode
+        self.follower = None
+        self._follow_job = None
+        self._follow_dirty = False
+        self._last_follow_redraw = 0.0
+        
+        # Setup UI
+        self._setup_ui()
+        
+        # Load log file if provided
+        if log_file_path:
+            self._load_log_file(log_file_path)
+        else:
+            self._load_latest_log()
+    
+    def _setup_ui(self):
+        """Setup the user interface."""
+        # Main frame
+        main_frame = ttk.Frame(self.root, padding="5")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Control panel (top)
+        control_frame = ttk.Frame(main_frame)
+        control_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        # File selection
+        file_frame = ttk.LabelFrame(control_frame, text="Log File", padding="5")
+        file_frame.pack(side=tk.LEFT, padx=5)
+        
+        self.file_label = ttk.Label(file_frame, text="No file loaded", width=50)
+        self.file_label.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(file_frame, text="Open...", command=self._open_file_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Reload", command=self._reload_file).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Find...", command=self._find_sessions).pack(side=tk.LEFT, padx=5)
+        
+        # Test navigation
+        test_frame = ttk.LabelFrame(control_frame, text="Test Navigation", padding="5")
+        test_frame.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(test_frame, text="◀ Prev Test", command=self._prev_test).pack(side=tk.LEFT, padx=2)
+        self.test_label = ttk.Label(test_frame, text="Test: 0/0", width=15)
+        self.test_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(test_frame, text="Next Test ▶", command=self._next_test).pack(side=tk.LEFT, padx=2)
+        
+        # Plot type selection
+        plot_frame = ttk.LabelFrame(control_frame, text="Plot Type", padding="5")
+        plot_frame.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        
+        self.plot_combo = ttk.Combobox(plot_frame, values=[p[0] for p in self.PLOT_TYPES], 
+                                        state="readonly", width=30)
+        self.plot_combo.current(0)
+        self.plot_combo.pack(side=tk.LEFT, padx=5)
+        self.plot_combo.bind("<<ComboboxSelected>>", self._on_plot_type_change)
+        
+        ttk.Button(plot_frame, text="◀ Prev", command=self._prev_plot).pack(side=tk.LEFT, padx=2)
+        ttk.Button(plot_frame, text="Next ▶", command=self._next_plot).pack(side=tk.LEFT, padx=2)
+        
+        # View options
+        view_frame = ttk.LabelFrame(control_frame, text="View Options", padding="5")
+        view_frame.pack(side=tk.LEFT, padx=5)
+        
+        self.show_all_tests = tk.BooleanVar(value=False)
+        ttk.Checkbutton(view_frame, text="Show all tests", variable=self.show_all_tests,
+                       command=self._update_plot).pack(side=tk.LEFT, padx=5)
+        
+        self.follow_log = tk.BooleanVar(value=False)
+        ttk.Checkbutton(view_frame, text="Follow", variable=self.follow_log,
+                       command=self._toggle_follow).pack(side=tk.LEFT, padx=5)
+        
+        # Figure frame (center)
+        fig_frame = ttk.Frame(main_frame)
+        fig_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Canvas for the matplotlib figure; the Tk backend is only imported for the GUI
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        self.canvas = FigureCanvasTkAgg(self.fig, master=fig_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        # Navigation toolbar
+        toolbar_frame = ttk.Frame(fig_frame)
+        toolbar_frame.pack(fill=tk.X)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
+        self.toolbar.update()
+        self.canvas.mpl_connect('resize_event', self._on_resize)
+        
+        # Status bar (bottom)
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        self.status_label = ttk.Label(status_frame, text="Ready", relief=tk.SUNKEN)
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Shown while a log loads in the background
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self._cancel_load)
+        self.load_progress = ttk.Progressbar(status_frame, length=200, maximum=1.0)
+        
+        # Keyboard bindings
+        self.root.bind("<Left>", lambda e: self._prev_plot())
+        self.root.bind("<Right>", lambda e: self._next_plot())
+        self.root.bind("<Up>", lambda e: self._prev_test())
+        self.root.bind("<Down>", lambda e: self._next_test())
+        self.root.bind("<Home>", lambda e: self._first_plot())
+        self.root.bind("<End>", lambda e: self._last_plot())
+    
+    def _open_file_dialog(self):
+        """Open file dialog to select a log file."""
+        initial_dir = LOG_DIR
+        if not os.path.exists(initial_dir):
+            initial_dir = os.path.dirname(__file__)
+        
+        filepath = filedialog.askopenfilename(
+            initialdir=initial_dir,
+            title="Select Log File",
+            filetypes=[("Log files", "*.log"), ("All files", "*.*")]
+        )
+        
+        if filepath:
+            self._load_log_file(filepath)
+    
+    def _load_latest_log(self):
+        """Load the latest log file from the output/logs directory."""
+        log_dir = LOG_DIR
+        if not os.path.exists(log_dir):
+            self._set_status("Log directory not found. Please open a log file manually.")
+            return
+        
+        log_files = glob.glob(os.path.join(log_dir, "*.log"))
+        if not log_files:
+            self._set_status("No log files found. Please open a log file manually.")
+            return
+        
+        # Sort by modification time and get the latest
+        latest_log = max(log_files, key=os.path.getmtime)
+        self._load_log_file(latest_log)
+    
+    def _load_log_file(self, filepath):
+        """
+        Load a log file. Without a cached parse, sessions are shown from a
+        LogIndex at once while a LogLoader parses the whole log in worker
+        processes; each session is swapped for its parsed copy when ready.
+        """
+        self._stop_follow()
+        self._stop_load()
+        self._set_status(f"Loading {os.path.basename(filepath)}...")
+        self.root.update()
+        
+        try:
+            sessions = self.session_cache.load(filepath, bulk=True)
+            if sessions is None:
+                # Index only; each plot parses just the channels it reads until loaded
+                log_index = LogIndex(filepath)
+                sessions = list(log_index.sessions)
+            else:
+                log_index = None
+            if self.log_index is not None:
+                self.log_index.close()
+            self.sessions = sessions
+            self.log_index = log_index
+            self.aligner.clear()
+            self._data_changed()
+            self.log_file_path = filepath
+            self.current_test_index = 0
+            self.current_plot_index = 0
+            
+            # Update UI
+            self.file_label.config(text=os.path.basename(filepath))
+            self._update_test_label()
+            self._update_plot()
+            
+            if not self.sessions:
+                self._set_status("No GUIDED mode sessions found in log file.")
+            elif log_index is not None:
+                self._start_load(filepath, [(session.start, session.end) for session in log_index.sessions])
+            else:
+                self._set_status(f"Loaded {len(self.sessions)} test(s) from {os.path.basename(filepath)}")
+                
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load log file: {str(e)}")
+            self._set_status(f"Error loading file: {str(e)}")
+    
+    def _start_load(self, filepath, ranges):
+        """Parse the log in the background, reporting progress in the status bar."""
+        self.loader = LogLoader(filepath, ranges=ranges)
+        self.load_progress.config(value=0.0)
+        self.cancel_button.pack(side=tk.RIGHT, padx=(5, 0))
+        self.load_progress.pack(side=tk.RIGHT, padx=(5, 0))
+        self._set_status(f"Parsing {os.path.basename(filepath)}: {len(self.sessions)} test(s)...")
+        self._load_job = self.root.after(LOAD_POLL_MS, self._load_tick)
+    
+    def _load_tick(self):
+        """Swap in the sessions parsed since the last tick and update the progress bar."""
+        self._load_job = None
+        loader = self.loader
+        try:
+            completed = loader.poll()
+        except Exception as e:
+            self._stop_load()
+            self._set_status(f"Background parse failed, channels are parsed on view: {str(e)}")
+            return
+        
+        for index in completed:
+            self.sessions[index] = loader.sessions[index]
+        self._data_changed(completed)
+        self.load_progress.config(value=loader.progress)
+        
+        if not loader.done:
+            self._load_job = self.root.after(LOAD_POLL_MS, self._load_tick)
+            return
+        
+        # Every session is parsed; the index's memory maps are no longer needed
+        self._stop_load()
+        if self.log_index is not None:
+            self.log_index.close()
+            self.log_index = None
+        try:
+            self.session_cache.store(loader.log_file_path, self.sessions, bulk=True)
+        except OSError as e:
+            print(f"Could not write session cache: {e}")
+        self._set_status(f"Loaded {len(self.sessions)} test(s) from {os.path.basename(loader.log_file_path)}")
+    
+    def _cancel_load(self):
+        """Stop the background parse; unparsed tests keep reading channels on view."""
+        if self.loader is None:
+            return
+        self._stop_load()
+        self._set_status("Loading cancelled; remaining tests are parsed when viewed.")
+    
+    def _stop_load(self):
+        if self._load_job is not None:
+            self.root.after_cancel(self._load_job)
+            self._load_job = None
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        self.load_progress.pack_forget()
+        self.cancel_button.pack_forget()
+    
+    def _reload_file(self):
+        """Reload the current log file."""
+        if self.log_file_path:
+            self._load_log_file(self.log_file_path)
+    
+    def open_session(self, log_file_path, test_index):
+        """Show a test of a log, loading the log unless it is the current one."""
+        if (self.log_file_path is None or not self.sessions
+                or os.path.abspath(log_file_path) != os.path.abspath(self.log_file_path)):
+            self._load_log_file(log_file_path)
+        if 0 <= test_index < len(self.sessions):
+            self.current_test_index = test_index
+            self._update_test_label()
+            self._update_plot()
+    
+    def _find_sessions(self):
+        """
+        Query session summaries of output/logs (see log_corpus) and list the matches.
+        The corpus is updated and queried in a background thread.
+        """
+        if self._search is not None:
+            self._set_status("A session search is already running.")
+            return
+        
+        where = simpledialog.askstring(
+            "Find Sessions",
+            "SQL condition on min_distance, rms_altitude_error, max_speed, duration_s,\n"
+            "frames or channels, e.g. min_distance < 2 (empty for all sessions):",
+            parent=self.root)
+        if where is None:
+            return
+        where = where.strip()
+        
+        paths = [path for path in {LOG_DIR, os.path.dirname(self.log_file_path or "")} if os.path.isdir(path)]
+        self._set_status("Indexing logs...")
+        self._search = _in_background(_search_sessions, paths, where or None)
+        self.root.after(LOAD_POLL_MS, lambda: self._search_done(where))
+    
+    def _search_done(self, where):
+        """List the results of the session search once it has finished."""
+        import sqlite3
+        from log_corpus import format_summary
+        
+        if not self._search.done():
+            self.root.after(LOAD_POLL_MS, lambda: self._search_done(where))
+            return
+        search, self._search = self._search, None
+        try:
+            rows = search.result()
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showerror("Error", f"Session search failed: {str(e)}")
+            self._set_status(f"Session search failed: {str(e)}")
+            return
+        self._set_status(f"{len(rows)} session(s) match {where or 'all'}")
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Sessions: {where or 'all'}")
+        results = tk.Listbox(window, width=130, height=min(max(len(rows), 5), 30))
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=results.yview)
+        results.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        results.pack(fill=tk.BOTH, expand=True)
+        for row in rows:
+            results.insert(tk.END, format_summary(row))
+        
+        def open_selected(event=None):
+            for index in results.curselection():
+                self.open_session(rows[index]["path"], rows[index]["session"])
+        results.bind("<Double-Button-1>", open_selected)
+        results.bind("<Return>", open_selected)
+    
+    def _toggle_follow(self):
+        """
+        Start or stop following the current log file as it grows. The log is read
+        up to its current end in a background thread; the loaded sessions stay on
+        screen until the follower has caught up.
+        """
+        if not self.follow_log.get():
+            self._stop_follow()
+            return
+        if not self.log_file_path:
+            self.follow_log.set(False)
+            return
+        
+        self._stop_load()
+        self.follower = LogFollower(self.log_file_path)
+        self._set_status(f"Reading {os.path.basename(self.log_file_path)} to follow it...")
+        catch_up = _in_background(self.follower.poll)
+        self._follow_job = self.root.after(FOLLOW_POLL_MS, lambda: self._follow_caught_up(catch_up))
+    
+    def _follow_caught_up(self, catch_up):
+        """Show the follower's sessions once its first poll is done, then follow."""
+        self._follow_job = None
+        if not catch_up.done():
+            self._follow_job = self.root.after(FOLLOW_POLL_MS, lambda: self._follow_caught_up(catch_up))
+            return
+        try:
+            catch_up.result()
+        except OSError as e:
+            self._set_status(f"Follow stopped: {str(e)}")
+            self._stop_follow()
+            return
+        
+        self.sessions = self.follower.sessions
+        self._data_changed()
+        self.current_test_index = max(0, len(self.sessions) - 1)
+        self._update_test_label()
+        self._update_plot()
+        self._set_status(f"Following {os.path.basename(self.log_file_path)}")
+        self._follow_job = self.root.after(FOLLOW_POLL_MS, self._follow_tick)
+    
+    def _stop_follow(self):
+        """Stop follow mode, keeping the sessions parsed so far."""
+        if self._follow_job is not None:
+            self.root.after_cancel(self._follow_job)
+            self._follow_job = None
+        self.follower = None
+        self.follow_log.set(False)
+    
+    def _follow_tick(self):
+        """Parse appended lines and redraw, at most once per FOLLOW_REDRAW_S."""
+        self._follow_job = None
+        was_last = self.current_test_index >= len(self.sessions) - 1
+        try:
+            changed = self.follower.poll()
+        except OSError as e:
+            self._set_status(f"Follow stopped: {str(e)}")
+            self._stop_follow()
+            return
+        
+        if changed:
+            self._data_changed(changed)
+            # Stay on the newest test when a new one starts while viewing the last
+            if was_last:
+                self.current_test_index = len(self.sessions) - 1
+            self._update_test_label()
+            shown = range(len(self.sessions)) if self.show_all_tests.get() else [self.current_test_index]
+            if any(index in shown for index in changed):
+                self._follow_dirty = True
+        
+        now = time.monotonic()
+        if self._follow_dirty and now - self._last_follow_redraw >= FOLLOW_REDRAW_S:
+            self._follow_dirty = False
+            self._last_follow_redraw = now
+            self._refresh_plot()
+        
+        self._follow_job = self.root.after(FOLLOW_POLL_MS, self._follow_tick)
+    
+    def _prev_test(self):
+        """Go to previous test."""
+        if self.sessions and self.current_test_index > 0:
+            self.current_test_index -= 1
+            self._update_test_label()
+            self._update_plot()
+    
+    def _next_test(self):
+        """Go to next test."""
+        if self.sessions and self.current_test_index < len(self.sessions) - 1:
+            self.current_test_index += 1
+            self._update_test_label()
+            self._update_plot()
+    
+    def _prev_plot(self):
+        """Go to previous plot type."""
+        if self.current_plot_index > 0:
+            self.current_plot_index -= 1
+            self.plot_combo.current(self.current_plot_index)
+            self._update_plot()
+    
+    def _next_plot(self):
+        """Go to next plot type."""
+        if self.current_plot_index < len(self.PLOT_TYPES) - 1:
+            self.current_plot_index += 1
+            self.plot_combo.current(self.current_plot_index)
+            self._update_plot()
+    
+    def _first_plot(self):
+        """Go to first plot type."""
+        self.current_plot_index = 0
+        self.plot_combo.current(0)
+        self._update_plot()
+    
+    def _last_plot(self):
+        """Go to last plot type."""
+        self.current_plot_index = len(self.PLOT_TYPES) - 1
+        self.plot_combo.current(self.current_plot_index)
+        self._update_plot()
+    
+    def _on_plot_type_change(self, event=None):
+        """Handle plot type selection change."""
+        self.current_plot_index = self.plot_combo.current()
+        self._update_plot()
+    
+    def _update_test_label(self):
+        """Update the test navigation label."""
+        if self.sessions:
+            self.test_label.config(text=f"Test: {self.current_test_index + 1}/{len(self.sessions)}")
+        else:
+            self.test_label.config(text="Test: 0/0")
+    
+    def _set_status(self, message):
+        """Update the status bar."""
+        self.status_label.config(text=message)
+    
+    def _update_plot(self):
+        """Update the current plot."""
+        if self._rebuild_job is not None:
+            self.root.after_cancel(self._rebuild_job)
+            self._rebuild_job = None
+        
+        if not self.sessions:
+            self.fig.clear()
+            self._axes.clear()
+            self._lines.clear()
+            self._pyramids.clear()
+            self._plot_layout = None
+            ax = self.fig.add_subplot(111)
+            ax.text(0.5, 0.5, "No data available.\nPlease load a log file.", 
+                   ha='center', va='center', fontsize=14)
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1)
+            self.canvas.draw()
+            return
+        
+        # A view drawn before is shown from its cached rendering right away; the
+        # artists catch up once navigation pauses
+        key = self._render_key()
+        cached = self._rendered.get(key)
+        if cached is not None:
+            self._rendered.move_to_end(key)
+            self.canvas.restore_region(cached[0])
+            self.canvas.blit(self.fig.bbox)
+            self._rebuild_job = self.root.after(RENDER_SETTLE_MS, self._draw_plot)
+        else:
+            self._draw_plot()
+        self._schedule_prefetch()
+    
+    def _draw_plot(self):
+        """Draw the current plot, updating the existing artists if the layout allows."""
+        self._rebuild_job = None
+        _, method_name = self.PLOT_TYPES[self.current_plot_index]
+        plot_method = getattr(self, method_name)
+        
+        before = self._view_state()
+        if self._reuse_plot(plot_method, reset_view=True):
+            if not self._blit_updated(before):
+                self._draw_with_backgrounds()
+        else:
+            # Clear figure and create plot
+            self.fig.clear()
+            self._axes.clear()
+            self._lines.clear()
+            self._pyramids.clear()
+            self._plot_layout = self._current_layout()
+            
+            self._call_plot_method(plot_method)
+            
+            self.fig.tight_layout()
+            self._draw_with_backgrounds()
+        self.toolbar.update()  # Home returns to this data's view
+        self._store_rendering()
+    
+    def _reuse_plot(self, plot_method, reset_view=False):
+        """
+        Run plot_method over the current figure's artists: existing lines get
+        set_data, new ones are added, lines it no longer draws are removed and the
+        limits are rescaled. 3D plots, a different layout or data that needs other
+        axes are not reused.
+
+        :param reset_view: Autoscale axes even if the user zoomed or panned.
+        :return: Whether the figure was updated.
+        """
+        if (self._plot_layout != self._current_layout()
+                or any(ax.name == '3d' for ax in self.fig.axes)):
+            return False
+        for ax in self.fig.axes:
+            for text in list(ax.texts):
+                text.remove()  # "No data" placeholders are re-added if still empty
+        
+        if reset_view:
+            for ax in self.fig.axes:
+                ax.set_autoscale_on(True)
+        n_axes = len(self.fig.axes)
+        self._touched.clear()
+        self._reuse_artists = True
+        try:
+            self._call_plot_method(plot_method)
+        finally:
+            self._reuse_artists = False
+        if len(self.fig.axes) != n_axes or any(ax not in self._touched for ax in self.fig.axes):
+            return False
+        
+        for key in [key for key in self._lines if key not in self._touched]:
+            line, _ = self._lines.pop(key)
+            self._pyramids.pop(line, None)
+            line.remove()
+        for ax in self.fig.axes:
+            ax.relim()
+            ax.autoscale_view()
+        return True
+    
+    def _view_state(self):
+        """Per axes: _axes_signature() and its lines with their data source, to compare before and after a reuse."""
+        state = {ax: (self._axes_signature(ax), {}) for ax in self.fig.axes}
+        for (ax, _), (line, source) in self._lines.items():
+            if ax in state:
+                state[ax][1][line] = source
+        return state
+    
+    @staticmethod
+    def _axes_signature(ax):
+        """What an axes' background depends on: limits, position and texts."""
+        return ax.get_xlim(), ax.get_ylim(), tuple(ax.bbox.bounds), [text.get_text() for text in ax.texts]
+    
+    def _blit_updated(self, before):
+        """
+        After a reuse that left every axes' limits, position and texts as they
+        were, redraw only the axes whose lines changed over the backgrounds kept
+        by the last _draw_with_backgrounds(), and blit those axes.
+
+        :param before: _view_state() before the reuse.
+        :return: Whether the canvas is up to date; if not, it needs a full draw.
+        """
+        after = self._view_state()
+        if after.keys() != before.keys():
+            return False
+        updated = []
+        for ax, (signature, lines) in after.items():
+            old_signature, old_lines = before[ax]
+            if signature != old_signature:
+                return False
+            if lines.keys() != old_lines.keys() or any(source is not old_lines[line]
+                                                       for line, source in lines.items()):
+                if ax not in self._backgrounds or self._backgrounds[ax][1] != signature:
+                    return False
+                updated.append(ax)
+        for ax in updated:
+            self.canvas.restore_region(self._backgrounds[ax][0])
+            self._draw_foreground(ax)
+            self.canvas.blit(ax.bbox)
+        return True
+    
+    def _foreground(self, ax):
+        """The reusable lines of an axes and its legend, in drawing order."""
+        reusable = {line for line, _ in self._lines.values()}
+        artists = [line for line in ax.lines if line in reusable]
+        if ax.get_legend() is not None:
+            artists.append(ax.get_legend())
+        return artists
+    
+    def _draw_foreground(self, ax):
+        for artist in self._foreground(ax):
+            ax.draw_artist(artist)
+    
+    def _draw_with_backgrounds(self):
+        """
+        Full draw of the canvas that also keeps each axes' background, rendered
+        without its lines and legend, so _blit_updated() can redraw just those.
+        The foreground is animated only for this one render.
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        foreground = [artist for ax in self.fig.axes for artist in self._foreground(ax)]
+        for artist in foreground:
+            artist.set_animated(True)
+        try:
+            FigureCanvasAgg.draw(self.canvas)  # Into the Agg buffer only, not to the screen yet
+        finally:
+            for artist in foreground:
+                artist.set_animated(False)
+        self._backgrounds = {ax: (self.canvas.copy_from_bbox(ax.bbox), self._axes_signature(ax))
+                             for ax in self.fig.axes}
+        for ax in self.fig.axes:
+            self._draw_foreground(ax)
+        self.canvas.blit(self.fig.bbox)
+    
+    def _render_key(self):
+        """What the canvas shows: layout, test, figure size and the version of the data shown."""
+        test = None if self.show_all_tests.get() else self.current_test_index
+        shown = range(len(self.sessions)) if test is None else [test]
+        data = (self._log_version,) + tuple(self._session_versions.get(index, 0) for index in shown)
+        return self._current_layout(), test, tuple(self.fig.bbox.bounds), data
+    
+    def _store_rendering(self, canvas=None):
+        key = self._render_key()
+        if key in self._rendered:
+            return
+        canvas = canvas or self.canvas
+        nbytes = int(self.fig.bbox.width) * int(self.fig.bbox.height) * 4
+        self._rendered[key] = (canvas.copy_from_bbox(self.fig.bbox), nbytes)
+        self._rendered_bytes += nbytes
+        while self._rendered_bytes > RENDER_CACHE_BYTES and len(self._rendered) > 1:
+            _, (_, evicted) = self._rendered.popitem(last=False)
+            self._rendered_bytes -= evicted
+    
+    def _data_changed(self, indices=None):
+        """
+        Give changed sessions new data versions, so renderings of them no longer match.
+
+        :param indices: Session indices that changed, or None for a new set of sessions,
+            whose renderings are dropped at once.
+        """
+        if indices is None:
+            self._log_version += 1
+            self._session_versions.clear()
+            self._rendered.clear()
+            self._rendered_bytes = 0
+            return
+        for index in indices:
+            self._session_versions[index] = self._session_versions.get(index, 0) + 1
+    
+    def _schedule_prefetch(self):
+        """
+        Once navigation has paused for RENDER_SETTLE_MS, render the next and previous
+        test and plot type off-screen into the rendering cache, one per idle
+        callback, so stepping to them shows an image at once. A render can't be
+        interrupted, so none is started while the user is still stepping through
+        views; stepping again drops the queue. Followed logs change on every poll
+        and are not pre-rendered.
+        """
+        if self._prefetch_job is not None:
+            self.root.after_cancel(self._prefetch_job)
+            self._prefetch_job = None
+        self._prerender_queue = []
+        if self.follower is not None or not self.sessions:
+            return
+        
+        test, plot = self.current_test_index, self.current_plot_index
+        for index in (test + 1, test - 1):
+            if 0 <= index < len(self.sessions):
+                self._prerender_queue.append((index, plot))
+        for index in (plot + 1, plot - 1):
+            if 0 <= index < len(self.PLOT_TYPES):
+                self._prerender_queue.append((test, index))
+        self._prefetch_job = self.root.after(RENDER_SETTLE_MS, self._prefetch_neighbours)
+    
+    def _prefetch_neighbours(self):
+        """Render one queued view, then yield to Tk before the next."""
+        self._prefetch_job = None
+        if not self._prerender_queue:
+            return
+        self._prerender(*self._prerender_queue.pop(0))
+        if self._prerender_queue:
+            self._prefetch_job = self.root.after_idle(self._prefetch_neighbours)
+    
+    def _prerender(self, test_index, plot_index):
+        """
+        Draw a view on an off-screen Agg canvas of the figure's size and cache its
+        image under the view's render key. The on-screen figure is not touched.
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        
+        state = (self.fig, self._axes, self._lines, self._pyramids, self._touched,
+                 self._plot_layout, self.current_test_index, self.current_plot_index)
+        self.current_test_index, self.current_plot_index = test_index, plot_index
+        self.fig = Figure(figsize=state[0].get_size_inches(), dpi=state[0].dpi)
+        try:
+            if self._render_key() in self._rendered:
+                return
+            canvas = FigureCanvasAgg(self.fig)
+            self._axes, self._lines, self._pyramids, self._touched = {}, {}, {}, set()
+            self._plot_layout = self._current_layout()
+            _, method_name = self.PLOT_TYPES[plot_index]
+            self._call_plot_method(getattr(self, method_name))
+            self.fig.tight_layout()
+            canvas.draw()
+            self._store_rendering(canvas)
+        finally:
+            (self.fig, self._axes, self._lines, self._pyramids, self._touched,
+             self._plot_layout, self.current_test_index, self.current_plot_index) = state
+    
+    def _call_plot_method(self, plot_method):
+        if self.show_all_tests.get():
+            plot_method(self.sessions, all_tests=True)
+        else:
+            plot_method([self.sessions[self.current_test_index]], 
+                       test_indices=[self.current_test_index])
+    
+    def _current_layout(self):
+        """What decides the figure's axes: plot type and the number of tests shown."""
+        return (self.current_plot_index, self.show_all_tests.get(),
+                len(self.sessions) if self.show_all_tests.get() else 1)
+    
+    def _refresh_plot(self):
+        """
+        Update the current figure in place with the latest session data, keeping
+        the user's zoom. Falls back to a full redraw if the artists can't be reused.
+        """
+        if not self.sessions:
+            self._update_plot()
+            return
+        
+        _, method_name = self.PLOT_TYPES[self.current_plot_index]
+        if not self._reuse_plot(getattr(self, method_name)):
+            self._update_plot()
+            return
+        self.canvas.draw_idle()
+    
+    def _on_resize(self, event):
+        for ax in {line.axes for line in self._pyramids}:
+            self._on_xlim_changed(ax)
+    
+
+
+def _search_sessions(paths, where):
+    """
+    Update the session corpus with the logs in `paths` and query it. Runs in a
+    background thread, so it opens its own connection to the corpus database.
+    """
+    from log_corpus import LogCorpus
+    
+    corpus = LogCorpus()
+    try:
+        corpus.update(paths, workers=None)
+        return corpus.query(where)
+    finally:
+        corpus.close()
+
+
+# Sessions of the log a batch export worker is rendering, kept across its tasks
+_export_sessions = {}
+
+
+def _export_file_name(test_index, plot_index, fmt):
+    method_name = SessionPlotter.PLOT_TYPES[plot_index][1]
+    return f"test{test_index + 1:02d}_{plot_index + 1:02d}_{method_name[len('plot_'):]}.{fmt}"
+
+
+def _export_plot(log_file_path, cache_dir, out_dir, plot_index, test_indices, formats):
+    """Worker task: render one plot type for some tests of a log with Agg."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    sessions = _export_sessions.get(log_file_path)
+    if sessions is None:
+        _export_sessions.clear()
+        sessions = SessionCache(cache_dir).parse_log_file(log_file_path, bulk=True)
+        _export_sessions[log_file_path] = sessions
+
+    plotter = SessionPlotter(Figure(figsize=(14, 8), dpi=100))
+    FigureCanvasAgg(plotter.fig)
+    for test_index in test_indices:
+        plotter.draw_figure(sessions, plot_index, test_index)
+        for fmt in formats:
+            path = os.path.join(out_dir, _export_file_name(test_index, plot_index, fmt))
+            tmp_path = path + ".tmp"
+            plotter.fig.savefig(tmp_path, format=fmt)
+            os.replace(tmp_path, path)  # A partial file never looks up to date
+    return len(test_indices) * len(formats)
+
+
+def export_figures(log_paths, out_dir, formats=("png",), workers=None, force=False,
+                   session_cache=None):
+    """
+    Render every (session, plot type) of the logs to files without a display.
+
+    Figures go to out_dir/<log name>/ and are rendered with Agg in a process pool,
+    one task per log and plot type. Files newer than their log are skipped unless
+    force is set. out_dir/index.html links every figure.
+
+    :param log_paths: Log files and directories of *.log files.
+    :param formats: Subset of EXPORT_FORMATS.
+    :return: (files written, files skipped)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    session_cache = session_cache or SessionCache()
+    logs = []
+    for path in log_paths:
+        if os.path.isdir(path):
+            logs.extend(sorted(glob.glob(os.path.join(path, "*.log"))))
+        else:
+            logs.append(path)
+
+    written = skipped = 0
+    pages = []  # (log path, figure directory, number of sessions)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for log_path in logs:
+            log_dir = os.path.join(out_dir, os.path.splitext(os.path.basename(log_path))[0])
+            os.makedirs(log_dir, exist_ok=True)
+            log_mtime = os.path.getmtime(log_path)
+            n_sessions = len(LogParser.find_session_ranges(log_path))
+            pages.append((log_path, log_dir, n_sessions))
+
+            tasks = []
+            for plot_index in range(len(SessionPlotter.PLOT_TYPES)):
+                stale = []
+                for test_index in range(n_sessions):
+                    paths = [os.path.join(log_dir, _export_file_name(test_index, plot_index, fmt))
+                             for fmt in formats]
+                    if force or not all(os.path.exists(path) and os.path.getmtime(path) >= log_mtime
+                                        for path in paths):
+                        stale.append(test_index)
+                    else:
+                        skipped += len(formats)
+                if stale:
+                    tasks.append((plot_index, stale))
+            if not tasks:
+                continue
+
+            # Parse once here so the workers read the sessions from the cache
+            session_cache.parse_log_file(log_path, workers=workers, bulk=True)
+            for plot_index, stale in tasks:
+                futures.append(executor.submit(_export_plot, log_path, session_cache.cache_dir,
+                                               log_dir, plot_index, stale, formats))
+        for future in futures:
+            written += future.result()
+
+    _write_export_index(out_dir, pages, formats)
+    return written, skipped
+
+
+def _write_export_index(out_dir, pages, formats):
+    """Write out_dir/index.html with a section per log and test."""
+    image_format = "png" if "png" in formats else None
+    lines = ["<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\">",
+             "<title>Visual Guidance Log Figures</title>",
+             "<style>img { width: 480px; margin: 4px; } figure { display: inline-block; }</style>",
+             "</head><body>", "<h1>Visual Guidance Log Figures</h1>"]
+    for log_path, log_dir, n_sessions in pages:
+        rel_dir = os.path.relpath(log_dir, out_dir)
+        lines.append(f"<h2>{html.escape(os.path.basename(log_path))}</h2>")
+        if not n_sessions:
+            lines.append("<p>No GUIDED mode sessions found in log file.</p>")
+        for test_index in range(n_sessions):
+            lines.append(f"<h3>Test {test_index + 1}</h3>")
+            for plot_index, (plot_name, _) in enumerate(SessionPlotter.PLOT_TYPES):
+                links = []
+                for fmt in formats:
+                    href = html.escape(os.path.join(rel_dir, _export_file_name(test_index, plot_index, fmt)))
+                    links.append(f'<a href="{href}">{fmt.upper()}</a>')
+                image = ""
+                if image_format:
+                    src = html.escape(os.path.join(rel_dir, _export_file_name(test_index, plot_index, image_format)))
+                    image = f'<a href="{src}"><img src="{src}" alt="{html.escape(plot_name)}"></a><br>'
+                lines.append(f"<figure>{image}<figcaption>{html.escape(plot_name)} "
+                             f"{' '.join(links)}</figcaption></figure>")
+    lines.append("</body></html>")
+    with open(os.path.join(out_dir, "index.html"), 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Plot visual guidance logs")
+    parser.add_argument("logs", nargs="*",
+                        help="Log file to open, or log files and directories to export")
+    parser.add_argument("--export", metavar="OUT_DIR",
+                        help="Write every test and plot type to OUT_DIR without opening a window")
+    parser.add_argument("--format", default="png",
+                        help="Comma-separated export formats: " + ", ".join(EXPORT_FORMATS))
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Export processes (0 = all CPUs)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-export figures that are up to date")
+    args = parser.parse_args()
+    
+    for path in args.logs:
+        if not os.path.exists(path):
+            print(f"Error: File not found: {path}")
+            sys.exit(1)
+    
+    if args.export:
+        formats = tuple(fmt.strip().lower() for fmt in args.format.split(",") if fmt.strip())
+        unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+        if unknown or not formats:
+            parser.error(f"Unknown export format: {', '.join(unknown) or args.format}")
+        start = time.perf_counter()
+        written, skipped = export_figures(args.logs or [LOG_DIR], args.export, formats,
+                                          workers=args.workers or None, force=args.force)
+        print(f"Wrote {written} figure(s), {skipped} up to date, in {time.perf_counter() - start:.1f} s; "
+              f"index: {os.path.join(args.export, 'index.html')}")
+        return
+    
+    try:
+        _import_tk()
+    except ImportError:  # Python built without Tk: --export still works
+        print("Error: tkinter is not available; use --export to write figures without the GUI")
+        sys.exit(1)
     
     # Create and run the application
     root = tk.Tk()
-    app = PlotterApp(root, log_file)
+    app = PlotterApp(root, args.logs[0] if args.logs else None)
     root.mainloop()
 
 
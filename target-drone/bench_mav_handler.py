@@ -0,0 +1,147 @@
+"""
+End-to-end MAVHandler benchmark against the local mock vehicle.
+
+For each handler backend this reports connect time, telemetry ingest rate, the
+latency from a set_velocity_body() call until the vehicle receives it (with
+setpoints paced at 50 Hz), and the setpoints/s issued by the handler and received
+by the vehicle when sending as fast as possible. The setpoint sequence number
+travels in the vx field to match sends with receives.
+
+Usage:
+    python bench_mav_handler.py [duration_s] [backend ...]
+
+Backends: dronekit, dronekit-fast, pool
+"""
+
+import sys
+import threading
+import time
+
+import numpy as np
+
+from mav_handler import MAVHandler
+from mock_vehicle import MockVehicle
+from vehicle_pool import VehiclePool
+
+
+TELEMETRY_TYPES = ('GLOBAL_POSITION_INT', 'ATTITUDE', 'RAW_IMU')
+
+
+def open_dronekit(port):
+    return MAVHandler(f"127.0.0.1:{port}"), None
+
+
+def open_dronekit_fast(port):
+    return MAVHandler(f"127.0.0.1:{port}", fast_start=True), None
+
+
+def open_pool(port):
+    pool = VehiclePool(f"udpin:127.0.0.1:{port}")
+    return pool.handler(1, timeout=30), pool
+
+
+BACKENDS = {
+    'dronekit': open_dronekit,
+    'dronekit-fast': open_dronekit_fast,
+    'pool': open_pool,
+}
+
+
+def measure_telemetry(handler, duration_s):
+    counts = {name: 0 for name in TELEMETRY_TYPES}
+    lock = threading.Lock()
+
+    def count(vehicle, name, msg):
+        with lock:
+            counts[name] += 1
+
+    for name in TELEMETRY_TYPES:
+        handler.vehicle.add_message_listener(name, count)
+    time.sleep(duration_s)
+    for name in TELEMETRY_TYPES:
+        handler.vehicle.remove_message_listener(name, count)
+    return {name: n / duration_s for name, n in counts.items()}
+
+
+def send_setpoints(handler, mock, duration_s, rate_hz=None):
+    """
+    Call set_velocity_body for `duration_s`, paced at `rate_hz` or as fast as possible.
+
+    :return: (send rate, receive rate, array of latencies in seconds)
+    """
+    mock.take_commands()
+    send_times = []
+    start = time.perf_counter()
+    deadline = start + duration_s
+    while time.perf_counter() < deadline:
+        send_times.append(time.perf_counter())
+        # vx carries the sequence number; float32 keeps integers exact up to 2**24
+        handler.set_velocity_body(float(len(send_times) - 1), 0.0, 0.0)
+        if rate_hz is not None:
+            time.sleep(max(0.0, start + len(send_times) / rate_hz - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    time.sleep(0.5)  # Let in-flight messages arrive
+
+    latencies = []
+    for received, msg in mock.take_commands():
+        if msg.get_type() != 'SET_POSITION_TARGET_LOCAL_NED':
+            continue
+        seq = int(msg.vx)
+        if 0 <= seq < len(send_times):
+            latencies.append(received - send_times[seq])
+    return len(send_times) / elapsed, len(latencies) / elapsed, np.array(latencies)
+
+
+def measure_setpoints(handler, mock, duration_s):
+    # Latency first: the flood below may leave a backlog in rate-limited writers
+    _, _, latencies = send_setpoints(handler, mock, duration_s, rate_hz=50)
+    issued, received, _ = send_setpoints(handler, mock, duration_s)
+    return {
+        'issued_per_s': issued,
+        'received_per_s': received,
+        'latency_median_ms': 1e3 * np.median(latencies) if len(latencies) else float('nan'),
+        'latency_p95_ms': 1e3 * np.percentile(latencies, 95) if len(latencies) else float('nan'),
+    }
+
+
+def run_backend(name, port, duration_s):
+    mock = MockVehicle(f"127.0.0.1:{port}", trajectory="circle")
+    mock.start()
+    pool = None
+    handler = None
+    try:
+        start = time.perf_counter()
+        handler, pool = BACKENDS[name](port)
+        connect_s = time.perf_counter() - start
+
+        telemetry = measure_telemetry(handler, duration_s)
+        setpoints = measure_setpoints(handler, mock, duration_s)
+    finally:
+        if pool is not None:
+            pool.close()
+        elif handler is not None:
+            handler.close_connection()
+        mock.close()
+
+    print(f"\n=== {name} ===")
+    print(f"Connect time:          {connect_s:8.3f} s")
+    if handler.time_to_first_telemetry is not None:
+        print(f"Time to first position:{handler.time_to_first_telemetry:8.3f} s")
+    for msg_name, rate in telemetry.items():
+        print(f"{msg_name + ' ingest:':<23}{rate:8.1f} msg/s")
+    print(f"Command latency:       {setpoints['latency_median_ms']:8.2f} ms median, "
+          f"{setpoints['latency_p95_ms']:.2f} ms p95 at 50 Hz")
+    print(f"Setpoints issued:      {setpoints['issued_per_s']:8.0f} /s")
+    print(f"Setpoints received:    {setpoints['received_per_s']:8.0f} /s")
+
+
+def main():
+    duration_s = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    backends = sys.argv[2:] or list(BACKENDS)
+
+    for i, name in enumerate(backends):
+        run_backend(name, 14600 + i, duration_s)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark for the MAVHandler setpoint send paths.
+
+Compares the old per-call message_factory.*_encode path with the cached message
+templates used by MAVHandler. Messages are fully packed by pymavlink but written
+to a null sink, so the numbers are the CPU cost of a send, not the link speed.
+
+Usage:
+    python bench_setpoints.py [duration_s]
+"""
+
+import math
+import sys
+import time
+import types
+
+from pymavlink import mavutil
+from pymavlink.quaternion import QuaternionBase
+
+from mav_handler import MAVHandler
+
+
+class NullFile:
+    """File-like sink that drops everything written to it."""
+
+    def write(self, buf):
+        pass
+
+
+class NullVehicle:
+    """Stand-in for dronekit.Vehicle that packs outgoing messages and discards them."""
+
+    def __init__(self):
+        self.message_factory = mavutil.mavlink.MAVLink(NullFile(), srcSystem=255, srcComponent=0)
+        self._master = types.SimpleNamespace(target_system=1, target_component=1)
+        self.attitude = types.SimpleNamespace(roll=0.0, pitch=0.0, yaw=0.0)
+        self.location = types.SimpleNamespace(global_frame=types.SimpleNamespace(lat=None))
+        self.last_heartbeat = None
+
+    def send_mavlink(self, msg):
+        self.message_factory.send(msg)
+
+    def flush(self):
+        pass
+
+    def add_message_listener(self, name, fn):
+        pass
+
+
+def legacy_set_velocity_body(vehicle, vx, vy, vz):
+    msg = vehicle.message_factory.set_position_target_local_ned_encode(
+        0, 0, 0,
+        mavutil.mavlink.MAV_FRAME_BODY_OFFSET_NED,
+        0b0000111111000111,
+        0, 0, 0,
+        vx, vy, vz,
+        0, 0, 0,
+        0, 0
+    )
+    vehicle.send_mavlink(msg)
+    vehicle.flush()
+
+
+def legacy_set_target_attitude(vehicle, boot_time, roll=0, pitch=0, yaw=0, thrust=0.5):
+    msg = vehicle.message_factory.set_attitude_target_encode(
+        int(1e3 * (time.time() - boot_time)),
+        vehicle._master.target_system, vehicle._master.target_component,
+        0,
+        QuaternionBase([math.radians(angle) for angle in (roll, pitch, yaw)]),
+        0, 0, 0,
+        thrust
+    )
+    vehicle.send_mavlink(msg)
+
+
+def run(label, fn, duration_s):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration_s
+    while time.perf_counter() < deadline:
+        for i in range(100):
+            fn(i)
+        count += 100
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{label:<40} {rate:>12,.0f} sends/s")
+    return rate
+
+
+def main():
+    duration_s = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+    vehicle = NullVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    boot_time = time.time()
+
+    results = [
+        ("set_velocity_body",
+         run("set_velocity_body (encode per call)",
+             lambda i: legacy_set_velocity_body(vehicle, i * 0.01, 0.0, 0.0), duration_s),
+         run("set_velocity_body (template)",
+             lambda i: handler.set_velocity_body(i * 0.01, 0.0, 0.0), duration_s)),
+        ("set_target_attitude",
+         run("set_target_attitude (encode per call)",
+             lambda i: legacy_set_target_attitude(vehicle, boot_time, roll=i * 0.1, pitch=2.0, yaw=30.0), duration_s),
+         run("set_target_attitude (template)",
+             lambda i: handler.set_target_attitude(roll=i * 0.1, pitch=2.0, yaw=30.0), duration_s)),
+    ]
+
+    print()
+    for name, before, after in results:
+        print(f"{name:<40} {after / before:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 from dronekit import connect, VehicleMode, LocationGlobalRelative
 from pymavlink import mavutil
-from pymavlink.quaternion import QuaternionBase
+from concurrent.futures import Future, InvalidStateError
+import numpy as np
+import heapq
+import itertools
+import json
+import os
+import threading
+import traceback
 import time
 import math
 
@@ -8,26 +15,621 @@ from mavlinkHandler import MAVLinkHandlerDronekit, MAVLinkHandlerPymavlink
 
 
 
+_DEG_TO_RAD = math.pi / 180.0
+_cos = math.cos
+_sin = math.sin
+
+
+def euler_to_quaternion(roll, pitch, yaw):
+    """
+    Convert roll, pitch, yaw in radians to a [w, x, y, z] quaternion.
+    Gives the same result as QuaternionBase([roll, pitch, yaw]) without building the object.
+    """
+    roll *= 0.5
+    pitch *= 0.5
+    yaw *= 0.5
+    t0 = _cos(yaw)
+    t1 = _sin(yaw)
+    t2 = _cos(roll)
+    t3 = _sin(roll)
+    t4 = _cos(pitch)
+    t5 = _sin(pitch)
+
+    return [t0 * t2 * t4 + t1 * t3 * t5,
+            t0 * t3 * t4 - t1 * t2 * t5,
+            t0 * t2 * t5 + t1 * t3 * t4,
+            t1 * t2 * t4 - t0 * t3 * t5]
+
+
 def to_quaternion(roll = 0.0, pitch = 0.0, yaw = 0.0):
     """
     Convert degrees to quaternions
     """
-    t0 = math.cos(math.radians(yaw * 0.5))
-    t1 = math.sin(math.radians(yaw * 0.5))
-    t2 = math.cos(math.radians(roll * 0.5))
-    t3 = math.sin(math.radians(roll * 0.5))
-    t4 = math.cos(math.radians(pitch * 0.5))
-    t5 = math.sin(math.radians(pitch * 0.5))
+    return euler_to_quaternion(roll * _DEG_TO_RAD, pitch * _DEG_TO_RAD, yaw * _DEG_TO_RAD)
+
+
+def _resolve(future, result=None, exception=None):
+    """
+    Complete a Future unless it is already done (e.g. cancelled by the caller).
+    """
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+def _then(first, step):
+    """
+    Chain `step` after the Future `first`.
+
+    `step` is called with no arguments once `first` succeeds and must return another
+    Future. The returned Future mirrors that one; cancelling it cancels whichever
+    step is still pending. If `step` raises, the returned Future fails with its error.
+    """
+    outer = Future()
+
+    def on_first_done(f):
+        if outer.done():
+            return
+        if f.cancelled():
+            outer.cancel()
+            return
+        if f.exception() is not None:
+            _resolve(outer, exception=f.exception())
+            return
+        try:
+            inner = step()
+        except Exception as e:
+            _resolve(outer, exception=e)
+            return
+        outer.add_done_callback(lambda o: inner.cancel() if o.cancelled() else None)
+        inner.add_done_callback(on_inner_done)
+
+    def on_inner_done(i):
+        if i.cancelled():
+            outer.cancel()
+        elif i.exception() is not None:
+            _resolve(outer, exception=i.exception())
+        else:
+            _resolve(outer, i.result())
+
+    outer.add_done_callback(lambda o: first.cancel() if o.cancelled() else None)
+    first.add_done_callback(on_first_done)
+    return outer
+
+
+class _Scheduler:
+    """
+    One daemon thread that runs callbacks at a given time, shared by all handlers.
+
+    Used for wait timeouts, so pending waits don't each hold a Timer thread, and
+    for work that must not run inside DroneKit's listener loops.
+    """
+
+    def __init__(self):
+        self._heap = []  # [due time, sequence, callback or None if cancelled]
+        self._sequence = itertools.count()
+        self._changed = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay, fn):
+        """
+        Run fn() in the scheduler thread after `delay` seconds.
+
+        :return: An entry to pass to cancel().
+        """
+        entry = [time.monotonic() + delay, next(self._sequence), fn]
+        with self._changed:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="MAVHandlerScheduler")
+                self._thread.daemon = True
+                self._thread.start()
+            self._changed.notify()
+        return entry
+
+    def cancel(self, entry):
+        with self._changed:
+            entry[2] = None
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._changed.wait(self._heap[0][0] - now if self._heap else None)
+                _, _, fn = heapq.heappop(self._heap)
+            if fn is not None:
+                try:
+                    fn()
+                except Exception:
+                    traceback.print_exc()
+
+
+_scheduler = _Scheduler()
+
+
+class ImuRingBuffer:
+    """
+    Preallocated ring buffer of timestamped IMU samples.
+
+    Each row is (time_s, xacc, yacc, zacc, xgyro, ygyro, zgyro). Every sample is
+    written twice, at slot `i` and `i + capacity`, so the latest samples always form
+    one contiguous block and window() can hand out a view instead of a copy.
+    """
+
+    COLUMNS = ('time', 'xacc', 'yacc', 'zacc', 'xgyro', 'ygyro', 'zgyro')
+
+    def __init__(self, capacity=4096):
+        """
+        :param capacity: Number of samples kept.
+        """
+        self.capacity = capacity
+        self.count = 0  # Total samples appended since creation
+        self._data = np.zeros((2 * capacity, len(self.COLUMNS)))
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def append(self, t, xacc, yacc, zacc, xgyro, ygyro, zgyro):
+        row = (t, xacc, yacc, zacc, xgyro, ygyro, zgyro)
+        with self._lock:
+            i = self._next
+            self._data[i] = row
+            self._data[i + self.capacity] = row
+            self._next = (i + 1) % self.capacity
+            self.count += 1
+
+    def window(self, n=None):
+        """
+        Return the latest `n` samples (all stored samples if None), oldest first, as a
+        read-only view into the buffer, without copying.
+
+        The view is only valid until `capacity - n` more samples have been appended:
+        the next append overwrites its oldest row, while the reader may be looking
+        at it, so a full-capacity window is never safe to read while samples are
+        arriving. Copy the view to keep it or when it is read slowly; mean(), rms()
+        and decimated() compute under the buffer's lock instead.
+
+        :param n: Number of samples.
+        :return: Array of shape (n, 7) with the columns in COLUMNS.
+        """
+        with self._lock:
+            view = self._view(n)
+        view.flags.writeable = False
+        return view
+
+    def _view(self, n):
+        # Call with the lock held
+        stored = min(self.count, self.capacity)
+        n = stored if n is None else min(n, stored)
+        end = self._next + self.capacity
+        return self._data[end - n:end]
+
+    def times(self, n=None):
+        return self.window(n)[:, 0]
+
+    def acc(self, n=None):
+        return self.window(n)[:, 1:4]
+
+    def gyro(self, n=None):
+        return self.window(n)[:, 4:7]
+
+    def mean(self, n=None):
+        """
+        Mean of (xacc, yacc, zacc, xgyro, ygyro, zgyro) over the latest `n` samples.
+        Zeros while the buffer is empty, like rms().
+        """
+        with self._lock:
+            values = self._view(n)[:, 1:]
+            if not len(values):
+                return np.zeros(len(self.COLUMNS) - 1)
+            return values.mean(axis=0)
+
+    def rms(self, n=None):
+        """
+        Root mean square of (xacc, yacc, zacc, xgyro, ygyro, zgyro) over the latest `n` samples.
+        """
+        with self._lock:
+            values = self._view(n)[:, 1:]
+            return np.sqrt(np.einsum('ij,ij->j', values, values) / max(len(values), 1))
+
+    def decimated(self, factor, n=None):
+        """
+        Block-average the latest `n` samples by `factor`, timestamps included.
+        Leftover samples at the old end that do not fill a block are dropped.
+
+        :return: Array of shape (n // factor, 7); (0, 7) while fewer than `factor`
+            samples are stored.
+        """
+        with self._lock:
+            window = self._view(n)
+            blocks = len(window) // factor
+            if not blocks:
+                return np.empty((0, len(self.COLUMNS)))
+            return window[len(window) - blocks * factor:].reshape(blocks, factor, -1).mean(axis=1)
+
+
+class ParameterCache:
+    """
+    Local copy of the vehicle parameters, kept current from PARAM_VALUE messages.
+
+    request_all() refreshes it with a single PARAM_REQUEST_LIST. Writes of the
+    value the vehicle has confirmed are skipped, and writes issued within
+    `coalesce_s` of each other are sent together, each confirmed by the PARAM_VALUE
+    the vehicle echoes back. Like DroneKit, a write that is not confirmed within
+    `resend_s` is sent again, and after `retries` sends it is given up as failed.
+    A heartbeat gap longer than `reconnect_gap_s` is treated as a reconnect: the
+    cached values are demoted to unconfirmed and the list is requested again.
+    """
+
+    def __init__(self, vehicle, coalesce_s=0.05, reconnect_gap_s=3.0, resend_s=1.0, retries=3):
+        """
+        :param vehicle: The dronekit.Vehicle used for sending and listening.
+        :param coalesce_s: Delay before queued writes are sent.
+        :param reconnect_gap_s: Heartbeat gap in seconds that invalidates the cache.
+        :param resend_s: Time to wait for a write's confirmation before sending it again.
+        :param retries: Number of times a write is sent before it counts as failed.
+        """
+        self.vehicle = vehicle
+        self.coalesce_s = coalesce_s
+        self.reconnect_gap_s = reconnect_gap_s
+        self.resend_s = resend_s
+        self.retries = retries
+
+        self._values = {}       # name -> value confirmed by the vehicle
+        self._types = {}        # name -> MAV_PARAM_TYPE
+        self._warm = {}         # name -> value from disk or before a reconnect, not confirmed
+        self._pending = {}      # name -> value queued for sending
+        self._unconfirmed = {}  # name -> [value, time last sent, times sent], waiting for its PARAM_VALUE
+        self._failed = {}       # name -> value given up after `retries` unconfirmed sends
+        self._param_count = None
+        self._received = set()
+        self._cond = threading.Condition()
+        self._flush_timer = None
+        self._resend_timer = None
+        self._last_heartbeat = None
+
+        vehicle.add_message_listener('PARAM_VALUE', self._on_param_value)
+        vehicle.add_message_listener('HEARTBEAT', self._on_heartbeat)
+
+    @staticmethod
+    def _same(a, b):
+        # PARAM_VALUE carries float32, so compare at that precision
+        return np.float32(a) == np.float32(b)
+
+    def seed(self, items):
+        """
+        Mark (name, value) pairs as confirmed, e.g. from a parameter table DroneKit
+        has already downloaded.
+        """
+        with self._cond:
+            for name, value in items:
+                if value is not None:
+                    self._values[name] = value
+                    self._warm.pop(name, None)
+
+    def get(self, name, default=None):
+        """
+        Return the cached value of a parameter, unconfirmed values included.
+        """
+        with self._cond:
+            if name in self._values:
+                return self._values[name]
+            return self._warm.get(name, default)
+
+    def _is_confirmed(self, name, value):
+        """Whether the vehicle has confirmed `value` and no other write is on its way."""
+        return (name in self._values and self._same(self._values[name], value)
+                and name not in self._unconfirmed)
+
+    def set(self, name, value):
+        """
+        Queue a parameter write. Does nothing if the vehicle has confirmed this value;
+        otherwise the write is sent after `coalesce_s`, replacing a queued one.
+        """
+        with self._cond:
+            self._failed.pop(name, None)
+            if self._is_confirmed(name, value):
+                self._pending.pop(name, None)  # Back to the vehicle's value before it was sent
+                return
+            self._pending[name] = value
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.coalesce_s, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self, wait=False, timeout=2.0):
+        """
+        Send all queued writes now.
+
+        :param wait: If True, block until every write sent so far has been confirmed
+            or has failed.
+        :param timeout: Maximum time to wait for the confirmations.
+        :return: Names of parameters that are still unconfirmed or whose write failed.
+        """
+        with self._cond:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending, self._pending = self._pending, {}
+            # Confirmed meanwhile, e.g. by a PARAM_VALUE of the list download
+            pending = {name: value for name, value in pending.items() if not self._is_confirmed(name, value)}
+            now = time.monotonic()
+            for name, value in pending.items():
+                self._unconfirmed[name] = [value, now, 1]
+            self._schedule_resend()
+
+        self._send(pending)
+
+        with self._cond:
+            if wait:
+                self._cond.wait_for(lambda: not self._unconfirmed, timeout)
+            return set(self._unconfirmed) | set(self._failed)
+
+    def _send(self, writes):
+        """Send PARAM_SET for each (name: value) of `writes`."""
+        factory = self.vehicle.message_factory
+        for name, value in writes.items():
+            msg = factory.param_set_encode(
+                self.vehicle._master.target_system, self.vehicle._master.target_component,
+                name.encode('ascii'), value,
+                self._types.get(name, mavutil.mavlink.MAV_PARAM_TYPE_REAL32))
+            self.vehicle.send_mavlink(msg)
+        if writes:
+            self.vehicle.flush()
+
+    def _schedule_resend(self):
+        # Called with the lock held
+        if self._unconfirmed and self._resend_timer is None:
+            due = min(sent_at for _, sent_at, _ in self._unconfirmed.values()) + self.resend_s
+            self._resend_timer = _scheduler.call_later(max(0.0, due - time.monotonic()), self._resend)
+
+    def _resend(self):
+        """Send unconfirmed writes again once `resend_s` has passed; give up after `retries` sends."""
+        now = time.monotonic()
+        resend = {}
+        with self._cond:
+            self._resend_timer = None
+            for name, entry in list(self._unconfirmed.items()):
+                value, sent_at, sends = entry
+                if now - sent_at < self.resend_s:
+                    continue
+                if sends >= self.retries:
+                    print(f"Parameter {name} not confirmed after {sends} attempts, giving up.")
+                    del self._unconfirmed[name]
+                    self._failed[name] = value
+                    continue
+                entry[1:] = [now, sends + 1]
+                resend[name] = value
+            self._schedule_resend()
+            self._cond.notify_all()
+        self._send(resend)
+
+    def request_all(self):
+        """
+        Ask the vehicle for its whole parameter list with one PARAM_REQUEST_LIST.
+        """
+        with self._cond:
+            self._received.clear()
+            self._param_count = None
+        msg = self.vehicle.message_factory.param_request_list_encode(
+            self.vehicle._master.target_system, self.vehicle._master.target_component)
+        self.vehicle.send_mavlink(msg)
+        self.vehicle.flush()
+
+    def wait_complete(self, timeout=None):
+        """
+        Block until every parameter of the current list download has arrived.
+
+        :return: True if the download is complete, False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(self.is_complete, timeout)
+
+    def is_complete(self):
+        return self._param_count is not None and len(self._received) >= self._param_count
+
+    def fetch_all(self, timeout=30.0):
+        """
+        Request the whole parameter list and wait for it.
+
+        :return: True if every parameter arrived before the timeout.
+        """
+        self.request_all()
+        return self.wait_complete(timeout)
+
+    def invalidate(self):
+        """
+        Forget which values are confirmed. They are still returned by get() until
+        fresh values arrive, but no longer suppress writes.
+        """
+        with self._cond:
+            self._warm.update(self._values)
+            self._values.clear()
+            self._received.clear()
+            self._param_count = None
+            self._pending.update((name, entry[0]) for name, entry in self._unconfirmed.items())
+            self._unconfirmed.clear()
+
+    def save(self, path):
+        """
+        Write the cached values to a JSON file for a warm start.
+        """
+        with self._cond:
+            data = {'values': {**self._warm, **self._values}, 'types': dict(self._types)}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """
+        Load values written by save(). They are served by get() but treated as
+        unconfirmed until the vehicle reports them.
+        """
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            data = json.load(f)
+        with self._cond:
+            for name, value in data.get('values', {}).items():
+                if name not in self._values:
+                    self._warm[name] = value
+            for name, param_type in data.get('types', {}).items():
+                self._types.setdefault(name, param_type)
+
+    def _on_param_value(self, vehicle, name, msg):
+        param_id = msg.param_id
+        if isinstance(param_id, bytes):
+            param_id = param_id.decode('ascii', errors='ignore')
+        param_id = param_id.rstrip('\x00')
+
+        with self._cond:
+            self._values[param_id] = msg.param_value
+            self._types[param_id] = msg.param_type
+            self._warm.pop(param_id, None)
+            if msg.param_index != 65535:
+                self._param_count = msg.param_count
+                self._received.add(msg.param_index)
+            sent = self._unconfirmed.get(param_id)
+            if sent is not None and self._same(sent[0], msg.param_value):
+                del self._unconfirmed[param_id]
+            failed = self._failed.get(param_id)
+            if failed is not None and self._same(failed, msg.param_value):
+                del self._failed[param_id]
+            self._cond.notify_all()
+
+    def _on_heartbeat(self, vehicle, name, msg):
+        now = time.monotonic()
+        reconnected = self._last_heartbeat is not None and now - self._last_heartbeat > self.reconnect_gap_s
+        self._last_heartbeat = now
+        if reconnected:
+            print("Heartbeat gap detected, refreshing parameter cache...")
+            self.invalidate()
+            self.request_all()
+            self.flush()
+
+
+class SetpointStreamer:
+    """
+    Background thread that sends the latest setpoint of each MAVLink message type
+    at a fixed rate.
+
+    Callers only replace the stored setpoint; encoding, sending and flushing happen
+    on the streamer thread, with one flush per cycle. Unchanged setpoints may be
+    skipped, but are still re-sent every `keepalive_s` so the flight controller's
+    guided-mode timeout never expires.
+
+    Only one kind is streamed at a time: setting a setpoint clears the other kinds,
+    so the flight controller never gets e.g. a stale velocity target alongside a
+    new attitude target.
+    """
 
-    w = t0 * t2 * t4 + t1 * t3 * t5
-    x = t0 * t3 * t4 - t1 * t2 * t5
-    y = t0 * t2 * t5 + t1 * t3 * t4
-    z = t1 * t2 * t4 - t0 * t3 * t5
+    def __init__(self, vehicle, rate_hz=50, keepalive_s=0.5):
+        """
+        :param vehicle: The dronekit.Vehicle used for sending.
+        :param rate_hz: Output rate of the stream in Hz.
+        :param keepalive_s: Maximum time between two sends of an unchanged setpoint.
+        """
+        self.vehicle = vehicle
+        self.period = 1.0 / rate_hz
+        self.keepalive_s = keepalive_s
+
+        self._lock = threading.Lock()
+        self._setpoints = {}  # kind -> (encoder, args, dedup)
+        self._last_sent = {}  # kind -> (args, send time)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def update(self, kind, encoder, args, dedup=True):
+        """
+        Replace the setpoint of the given kind and stop streaming the other kinds.
+        Never blocks on the link.
 
-    return [w, x, y, z]
+        :param kind: Setpoint slot, one per MAVLink message type (e.g. 'position_target').
+        :param encoder: Callable building the MAVLink message from `args`.
+        :param args: Tuple of setpoint values, also used to detect unchanged setpoints.
+        :param dedup: If True, an unchanged setpoint is only re-sent for keepalive.
+        """
+        with self._lock:
+            for other in [other for other in self._setpoints if other != kind]:
+                del self._setpoints[other]
+                self._last_sent.pop(other, None)
+            self._setpoints[kind] = (encoder, args, dedup)
+
+    def clear(self, kind=None):
+        """
+        Stop streaming one setpoint kind, or all of them if `kind` is None. A setpoint
+        set again afterwards is sent right away, even if it is unchanged.
+        """
+        with self._lock:
+            if kind is None:
+                self._setpoints.clear()
+                self._last_sent.clear()
+            else:
+                self._setpoints.pop(kind, None)
+                self._last_sent.pop(kind, None)
 
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="SetpointStreamer")
+        self._thread.daemon = True
+        self._thread.start()
 
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
 
+    def _run(self):
+        next_tick = time.monotonic()
+        failing = False
+        while not self._stop_event.is_set():
+            try:
+                self._send_pending(time.monotonic())
+                failing = False
+            except Exception:
+                # Keep streaming: a link error or a bad setpoint must not end the
+                # stream silently. Only the first error of a streak is printed.
+                if not failing:
+                    traceback.print_exc()
+                failing = True
+
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # Running late: drop the missed ticks instead of bursting to catch up
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def _send_pending(self, now):
+        with self._lock:
+            setpoints = [(kind, setpoint, self._last_sent.get(kind))
+                         for kind, setpoint in self._setpoints.items()]
+
+        sent = False
+        for kind, (encoder, args, dedup), last in setpoints:
+            if dedup and last is not None and last[0] == args and now - last[1] < self.keepalive_s:
+                continue
+            self.vehicle.send_mavlink(encoder(*args))
+            with self._lock:
+                # A clear() while sending must not leave this send marked as the last one
+                if kind in self._setpoints:
+                    self._last_sent[kind] = (args, now)
+            sent = True
+
+        if sent:
+            self.vehicle.flush()
 
 
 class MAVHandler:
@@ -36,28 +638,192 @@ class MAVHandler:
     It provides methods for connecting, arming, takeoff, navigation, and retrieving telemetry data.
     """
 
-    def __init__(self, connection_string, baud_rate=57600):
+    # Readiness stages, in the order they normally complete
+    READINESS_STAGES = ('heartbeat', 'position', 'attitude', 'attributes', 'parameters')
+
+    def __init__(self, connection_string, baud_rate=57600, imu_buffer_size=4096, param_cache_path=None,
+                 fast_start=False, first_telemetry_timeout=10.0):
         """
         Initialize the MAVHandler by connecting to the vehicle.
 
         :param connection_string: The address string for connecting to the vehicle
                                   (e.g., '/dev/ttyAMA0', 'udp:127.0.0.1:14550', etc.)
         :param baud_rate: Baud rate for serial connection (ignored for UDP/TCP connections).
+        :param imu_buffer_size: Number of samples kept in each IMU ring buffer.
+        :param param_cache_path: Optional JSON file the parameter cache is loaded from
+                                 and saved to on close_connection().
+        :param fast_start: If True, return as soon as a heartbeat and the first position
+                           have arrived, and load attributes and parameters in the
+                           background. Progress is reported through `readiness`.
+        :param first_telemetry_timeout: Maximum time a fast start waits for the first position.
         """
+        connect_start = time.monotonic()
         print(f"Connecting to vehicle on: {connection_string}")
-        self.vehicle = connect(connection_string, baud=baud_rate, wait_ready=True, rate=100)
+        vehicle = connect(connection_string, baud=baud_rate, wait_ready=not fast_start, rate=100)
         print("Connection established.")
+        self._setup(vehicle, imu_buffer_size, param_cache_path, connect_start)
+        # connect() only returns after the first heartbeat
+        self.readiness['heartbeat'].set()
+
+        if fast_start:
+            if not self.readiness['position'].wait(first_telemetry_timeout):
+                print("No position received yet, continuing without it.")
+            self._start_loader()
+        else:
+            # wait_ready has already downloaded the attributes and the full parameter list
+            self.param_cache.seed(vehicle.parameters.items())
+            for event in self.readiness.values():
+                event.set()
+            if self.time_to_first_telemetry is None:
+                self.time_to_first_telemetry = time.monotonic() - connect_start
 
+    @classmethod
+    def from_vehicle(cls, vehicle, imu_buffer_size=4096, param_cache_path=None, connect_start=None,
+                     load_in_background=False):
+        """
+        Create a MAVHandler around an already connected vehicle object.
+
+        Readiness stages whose telemetry the vehicle already has are set right away.
+
+        :param vehicle: A dronekit.Vehicle, or an object with the same interface.
+        :param imu_buffer_size: Number of samples kept in each IMU ring buffer.
+        :param param_cache_path: Optional JSON file for the parameter cache.
+        :param connect_start: time.monotonic() when the connection to the vehicle
+                              started, for time_to_first_telemetry. Defaults to now.
+        :param load_in_background: Wait for the attributes and parameters in a
+                                   background thread, as a fast start does.
+        """
+        handler = cls.__new__(cls)
+        handler._setup(vehicle, imu_buffer_size, param_cache_path,
+                       time.monotonic() if connect_start is None else connect_start)
+        handler._mark_received_telemetry()
+        if load_in_background:
+            handler._start_loader()
+        return handler
+
+    def _setup(self, vehicle, imu_buffer_size, param_cache_path, connect_start):
+        self.vehicle = vehicle
+        self.connect_start = connect_start
+        self.time_to_first_telemetry = None  # Seconds from connect() to the first position
+        self.readiness = {stage: threading.Event() for stage in self.READINESS_STAGES}
+        self.param_cache_path = param_cache_path
+        self.param_cache = ParameterCache(vehicle)
+        if param_cache_path:
+            self.param_cache.load(param_cache_path)
         self.imu_data = {'xacc': 0, 'yacc': 0, 'zacc': 0}
         self.angular_velocity = {'xgyro': 0, 'ygyro': 0, 'zgyro': 0}
         self.boot_time = time.time()
+        self.setpoint_streamer = None
+        self._init_message_templates()
+
+        # Full-rate IMU history. RAW_IMU is in raw sensor units, HIGHRES_IMU in
+        # m/s^2 and rad/s, so they are kept in separate buffers.
+        self.imu_buffer = ImuRingBuffer(imu_buffer_size)
+        self.highres_imu_buffer = ImuRingBuffer(imu_buffer_size)
 
         # Tell DroneKit to call our method on RAW_IMU messages
         self.vehicle.add_message_listener('RAW_IMU', self.receivedImu)
+        self.vehicle.add_message_listener('HIGHRES_IMU', self.receivedHighresImu)
+
+        self.vehicle.add_message_listener('HEARTBEAT', self._on_readiness_message)
+        self.vehicle.add_message_listener('GLOBAL_POSITION_INT', self._on_readiness_message)
+        self.vehicle.add_message_listener('ATTITUDE', self._on_readiness_message)
+
+    def _on_readiness_message(self, vehicle, name, msg):
+        if name == 'HEARTBEAT':
+            self.readiness['heartbeat'].set()
+        elif name == 'GLOBAL_POSITION_INT':
+            if not self.readiness['position'].is_set():
+                self.time_to_first_telemetry = time.monotonic() - self.connect_start
+                self.readiness['position'].set()
+        elif name == 'ATTITUDE':
+            self.readiness['attitude'].set()
+
+    def _mark_received_telemetry(self):
+        """
+        Set the stages of the telemetry the vehicle received before our listeners
+        were added. The first position's arrival time is used when the vehicle
+        records it (first_position_time), otherwise now.
+        """
+        if self.vehicle.last_heartbeat is not None:
+            self.readiness['heartbeat'].set()
+        if self.vehicle.location.global_frame.lat is not None and not self.readiness['position'].is_set():
+            first_position = getattr(self.vehicle, 'first_position_time', None) or time.monotonic()
+            self.time_to_first_telemetry = first_position - self.connect_start
+            self.readiness['position'].set()
+        if self.vehicle.attitude.pitch is not None:
+            self.readiness['attitude'].set()
+
+    def _start_loader(self):
+        loader = threading.Thread(target=self._load_in_background, name="MAVHandlerLoader")
+        loader.daemon = True
+        loader.start()
+
+    def _load_in_background(self, timeout=60.0):
+        """
+        Finish a fast start: wait for DroneKit's attribute and parameter downloads,
+        which run on their own after the first heartbeat, and mark each stage ready.
+        """
+        if self.vehicle.wait_ready('gps_0', 'armed', 'mode', 'attitude', timeout=timeout, raise_exception=False):
+            self.readiness['attributes'].set()
+        if self.vehicle.wait_ready('parameters', timeout=timeout, raise_exception=False):
+            self.param_cache.seed(self.vehicle.parameters.items())
+            self.readiness['parameters'].set()
+        else:
+            print("Parameter download incomplete, requesting the full list...")
+            if self.param_cache.fetch_all(timeout):
+                self.readiness['parameters'].set()
+
+    def wait_ready(self, *stages, timeout=None):
+        """
+        Block until the given readiness stages are reached (all stages if none given).
+
+        :param stages: Names from READINESS_STAGES.
+        :param timeout: Maximum total time to wait in seconds, or None to wait forever.
+        :return: True if every stage is ready.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for stage in stages or self.READINESS_STAGES:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.readiness[stage].wait(remaining):
+                return False
+        return True
+
+    def _init_message_templates(self):
+        """
+        Build the setpoint messages once. The setpoint encoders only overwrite the
+        changing fields of these instead of going through message_factory.*_encode
+        on every call, so a template must only be used from one thread at a time
+        (the streamer thread while the setpoint stream is running).
+        """
+        factory = self.vehicle.message_factory
+        self._position_target_msg = factory.set_position_target_local_ned_encode(
+            0,       # time_boot_ms (not used)
+            0, 0,    # target system, target component
+            mavutil.mavlink.MAV_FRAME_BODY_OFFSET_NED,       # coordinate frame
+            0b0000111111000111,  # type_mask (only velocity components enabled)
+            0, 0, 0, # x, y, z positions (not used)
+            0, 0, 0, # velocity components in m/s
+            0, 0, 0, # accelerations (not used)
+            0, 0     # yaw, yaw_rate
+        )
+        self._target_attitude_msg = factory.set_attitude_target_encode(
+            0,
+            self.vehicle._master.target_system, self.vehicle._master.target_component,
+            0, [1.0, 0.0, 0.0, 0.0], 0, 0, 0, 0
+        )
+        self._attitude_ignore_throttle_msg = factory.set_attitude_target_encode(
+            0,    # time_boot_ms
+            1,    # target system
+            1,    # target component
+            0b00001000, [1.0, 0.0, 0.0, 0.0], 0, 0, 0, 0
+        )
 
     def receivedImu(self, vehicle, name, msg):
         # Now `self` is the MAVHandler instance, and
         # `vehicle` is the dronekit.Vehicle object
+        self.imu_buffer.append(msg.time_usec * 1e-6, msg.xacc, msg.yacc, msg.zacc,
+                               msg.xgyro, msg.ygyro, msg.zgyro)
         self.imu_data['xacc'] = msg.xacc
         self.imu_data['yacc'] = msg.yacc
         self.imu_data['zacc'] = msg.zacc
@@ -65,8 +831,24 @@ class MAVHandler:
         self.angular_velocity['ygyro'] = msg.ygyro
         self.angular_velocity['zgyro'] = msg.zgyro
 
-    def set_parameter_value(self, parameter_name, value):
-        self.vehicle.parameters[parameter_name] = value
+    def receivedHighresImu(self, vehicle, name, msg):
+        self.highres_imu_buffer.append(msg.time_usec * 1e-6, msg.xacc, msg.yacc, msg.zacc,
+                                       msg.xgyro, msg.ygyro, msg.zgyro)
+
+    def set_parameter_value(self, parameter_name, value, wait=False):
+        """
+        Set a parameter on the vehicle. Writing the value the vehicle already has is
+        a no-op, and writes made in quick succession are sent together.
+
+        :param parameter_name: The name of the parameter to set.
+        :param value: The new value.
+        :param wait: If True, block until the vehicle has confirmed the write.
+        :return: True if the write is confirmed (always True when wait is False).
+        """
+        self.param_cache.set(parameter_name, value)
+        if wait:
+            return parameter_name not in self.param_cache.flush(wait=True)
+        return True
         
     def get_parameter_value(self, parameter_name):
         """
@@ -75,7 +857,10 @@ class MAVHandler:
         :param parameter_name: The name of the parameter to retrieve.
         :return: The value of the parameter.
         """
-        return self.vehicle.parameters.get(parameter_name)
+        value = self.param_cache.get(parameter_name)
+        if value is None:
+            value = self.vehicle.parameters.get(parameter_name)
+        return value
 
     def arm_and_takeoff(self, target_altitude):
         """
@@ -84,32 +869,108 @@ class MAVHandler:
         :param target_altitude: Target altitude (in meters) above ground.
         """
         print("Arming motors...")
-        while not self.vehicle.is_armable:
-            print("Waiting for vehicle to become armable...")
-            time.sleep(1)
-
         # Set the vehicle mode to GUIDED (required for taking off)
-        self.vehicle.mode = VehicleMode("GUIDED")
-        while self.vehicle.mode != "GUIDED":
-            print("Waiting for mode to change to GUIDED...")
-            time.sleep(1)
-
-        self.vehicle.armed = True
-        while not self.vehicle.armed:
-            print("Waiting for vehicle to become armed...")
-            time.sleep(1)
+        self.set_mode_async("GUIDED").result()
+        self.arm_async().result()
 
         print("Taking off!")
-        self.vehicle.simple_takeoff(target_altitude)
+        self.takeoff_async(target_altitude).result()
+        print("Reached target altitude")
 
-        # Wait until the vehicle reaches a safe height
-        while True:
-            current_altitude = self.vehicle.location.global_relative_frame.alt
-            print(f"Current Altitude: {current_altitude:.2f} m")
-            if current_altitude >= target_altitude * 0.95:
-                print("Reached target altitude")
-                break
-            time.sleep(1)
+    def _wait_for_state(self, predicate, attributes=(), timeout=None, description="vehicle state"):
+        """
+        Return a Future that resolves to True as soon as `predicate()` holds.
+
+        The predicate is checked right away, on every HEARTBEAT and whenever one of
+        the given vehicle attributes changes. After `timeout` seconds the Future fails
+        with TimeoutError. Once the Future is done, including when the caller cancels
+        it, the listeners are removed from the shared scheduler thread.
+
+        :param predicate: Callable returning True once the wanted state is reached.
+        :param attributes: DroneKit attribute names to listen to (e.g. 'mode', 'armed').
+        :param timeout: Timeout in seconds, or None to wait forever.
+        :param description: Text used in the timeout error.
+        """
+        future = Future()
+
+        def check(*args):
+            if not future.done() and predicate():
+                _resolve(future, True)
+
+        def expire():
+            _resolve(future, exception=TimeoutError(f"Timed out waiting for {description}"))
+
+        def remove_listeners():
+            self.vehicle.remove_message_listener('HEARTBEAT', check)
+            for name in attributes:
+                self.vehicle.remove_attribute_listener(name, check)
+
+        def cleanup(f):
+            if timer is not None:
+                _scheduler.cancel(timer)
+            # check() resolves the Future from inside DroneKit's listener loop, which
+            # iterates the live listener list: removing there would skip the next
+            # listener. check() ignores calls once the Future is done.
+            _scheduler.call_later(0, remove_listeners)
+
+        self.vehicle.add_message_listener('HEARTBEAT', check)
+        for name in attributes:
+            self.vehicle.add_attribute_listener(name, check)
+        timer = _scheduler.call_later(timeout, expire) if timeout is not None else None
+        future.add_done_callback(cleanup)
+
+        check()
+        return future
+
+    def set_mode_async(self, mode_name, timeout=None, clear_setpoints=False):
+        """
+        Request a mode change without blocking.
+
+        :param mode_name: A valid flight mode string.
+        :param timeout: Timeout in seconds, or None to wait forever.
+        :param clear_setpoints: Stop streaming setpoints first, so the ones meant for the
+            previous mode don't keep reaching the vehicle in the new one.
+        :return: A concurrent.futures.Future resolved when the vehicle reports the new mode.
+        """
+        if clear_setpoints:
+            self.clear_setpoint()
+        self.vehicle.mode = VehicleMode(mode_name)
+        return self._wait_for_state(lambda: self.vehicle.mode.name == mode_name, ('mode',),
+                                    timeout, f"mode {mode_name}")
+
+    def arm_async(self, timeout=None):
+        """
+        Wait until the vehicle is armable, then arm it, without blocking.
+
+        :param timeout: Timeout in seconds for the whole sequence, or None to wait forever.
+        :return: A concurrent.futures.Future resolved when the vehicle reports armed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        def arm():
+            self.vehicle.armed = True
+            return self._wait_for_state(lambda: self.vehicle.armed, ('armed',), remaining(), "arming")
+
+        armable = self._wait_for_state(lambda: self.vehicle.is_armable, ('mode', 'gps_0', 'ekf_ok'),
+                                       remaining(), "vehicle to become armable")
+        return _then(armable, arm)
+
+    def takeoff_async(self, target_altitude, timeout=None):
+        """
+        Take off to the given altitude without blocking. The vehicle must already be
+        armed and in GUIDED mode.
+
+        :param target_altitude: Target altitude (in meters) above ground.
+        :param timeout: Timeout in seconds, or None to wait forever.
+        :return: A concurrent.futures.Future resolved when 95% of the altitude is reached.
+        """
+        self.vehicle.simple_takeoff(target_altitude)
+        return self._wait_for_state(
+            lambda: (self.vehicle.location.global_relative_frame.alt or 0) >= target_altitude * 0.95,
+            ('location.global_relative_frame',), timeout, f"altitude {target_altitude} m")
 
     def goto_location(self, lat, lon, alt):
         """
@@ -124,6 +985,48 @@ class MAVHandler:
         target_location = LocationGlobalRelative(lat, lon, alt)
         self.vehicle.simple_goto(target_location)
 
+    def start_setpoint_stream(self, rate_hz=50, keepalive_s=0.5):
+        """
+        Start streaming setpoints from a background thread at a fixed rate.
+
+        While the stream is running, set_velocity_body, set_position_target_local_ned,
+        set_target_attitude and send_attitude_target_ignore_throttle only update the
+        latest setpoint and return immediately.
+
+        :param rate_hz: Output rate of the stream in Hz.
+        :param keepalive_s: Maximum time between two sends of an unchanged velocity setpoint.
+        """
+        if self.setpoint_streamer is None:
+            self.setpoint_streamer = SetpointStreamer(self.vehicle, rate_hz, keepalive_s)
+            self.setpoint_streamer.start()
+
+    def stop_setpoint_stream(self):
+        """
+        Stop the setpoint stream. Setpoints are sent immediately again afterwards.
+        """
+        if self.setpoint_streamer is not None:
+            self.setpoint_streamer.stop()
+            self.setpoint_streamer = None
+
+    def clear_setpoint(self, kind=None):
+        """
+        Stop streaming setpoints: one kind ('position_target' or 'attitude_target'),
+        or all of them if `kind` is None.
+        """
+        if self.setpoint_streamer is not None:
+            self.setpoint_streamer.clear(kind)
+
+    def _submit_setpoint(self, kind, encoder, args, dedup=True, flush=False):
+        """
+        Hand a setpoint to the streamer, or send it right away if no stream is running.
+        """
+        if self.setpoint_streamer is not None:
+            self.setpoint_streamer.update(kind, encoder, args, dedup)
+            return
+        self.vehicle.send_mavlink(encoder(*args))
+        if flush:
+            self.vehicle.flush()
+
     def set_velocity_body(self, vx, vy, vz):
         """
         Set the vehicle velocity in the body frame (relative to heading).
@@ -133,31 +1036,26 @@ class MAVHandler:
         :param vy: Velocity in m/s along the vehicle's y-axis (to the right is positive).
         :param vz: Velocity in m/s along the vehicle's z-axis (down is positive).
         """
-        msg = self.vehicle.message_factory.set_position_target_local_ned_encode(
-            0,       # time_boot_ms (not used)
-            0, 0,    # target system, target component
-            mavutil.mavlink.MAV_FRAME_BODY_OFFSET_NED,       # coordinate frame (1 = MAV_FRAME_LOCAL_NED)
-            0b0000111111000111,  # type_mask (bitmask;  only velocity components enabled)
-            0, 0, 0, # x, y, z positions (not used)
-            vx, vy, vz,  # velocity components in m/s
-            0, 0, 0, # accelerations (not used)
-            0, 0     # yaw, yaw_rate (not used)
-        )
-        self.vehicle.send_mavlink(msg)
-        self.vehicle.flush()
+        self._submit_setpoint("position_target", self._encode_position_target,
+                              (vx, vy, vz, 0), flush=True)
 
     def set_target_attitude(self, roll=0, pitch=0, yaw=0, thrust=0.5, roll_rate=0, pitch_rate=0, yaw_rate=0, bit_mask=0b00000000):
-            msg = self.vehicle.message_factory.set_attitude_target_encode(
-                int(1e3 * (time.time() - self.boot_time)),
-                self.vehicle._master.target_system, self.vehicle._master.target_component,
-                bit_mask,
-                QuaternionBase([math.radians(angle) for angle in (roll, pitch, yaw)]),
-                roll_rate, 
-                pitch_rate, 
-                yaw_rate, 
-                thrust
-            )
-            self.vehicle.send_mavlink(msg)
+        self._submit_setpoint("attitude_target", self._encode_target_attitude,
+                              (roll, pitch, yaw, thrust, roll_rate, pitch_rate, yaw_rate, bit_mask),
+                              dedup=False)
+
+    def _encode_target_attitude(self, roll, pitch, yaw, thrust, roll_rate, pitch_rate, yaw_rate, bit_mask):
+        msg = self._target_attitude_msg
+        msg.time_boot_ms = int(1e3 * (time.time() - self.boot_time))
+        msg.target_system = self.vehicle._master.target_system
+        msg.target_component = self.vehicle._master.target_component
+        msg.type_mask = bit_mask
+        msg.q = to_quaternion(roll, pitch, yaw)
+        msg.body_roll_rate = roll_rate
+        msg.body_pitch_rate = pitch_rate
+        msg.body_yaw_rate = yaw_rate
+        msg.thrust = thrust
+        return msg
 
     def set_position_target_local_ned(self, vx, vy=0, vz=0, yaw=None):
         """
@@ -171,18 +1069,16 @@ class MAVHandler:
         if yaw is None:
             yaw = self.vehicle.attitude.yaw
 
-        msg = self.vehicle.message_factory.set_position_target_local_ned_encode(
-            0,       # time_boot_ms (not used)
-            0, 0,    # target system, target component
-            mavutil.mavlink.MAV_FRAME_BODY_OFFSET_NED,       # coordinate frame
-            0b0000111111000111,  # type_mask (only velocity components enabled)
-            0, 0, 0, # x, y, z positions (not used)
-            vx, vy, vz,  # velocity components in m/s
-            0, 0, 0, # accelerations (not used)
-            math.degrees(yaw),  # yaw angle in degrees
-            0     # yaw_rate (not used)
-        )
-        self.vehicle.send_mavlink(msg)
+        self._submit_setpoint("position_target", self._encode_position_target,
+                              (vx, vy, vz, math.degrees(yaw)))
+
+    def _encode_position_target(self, vx, vy, vz, yaw_deg):
+        msg = self._position_target_msg
+        msg.vx = vx
+        msg.vy = vy
+        msg.vz = vz
+        msg.yaw = yaw_deg
+        return msg
 
 
     def send_attitude_target_ignore_throttle(
@@ -222,8 +1118,6 @@ class MAVHandler:
             Thrust value (0.0 to 1.0). This parameter will be ignored in this function
             because bit 3 of the type_mask is set to ignore throttle.
         """
-        import math
-        
         # If no yaw angle is provided, use the current vehicle yaw
         if yaw_angle is None:
             yaw_angle = self.vehicle.attitude.yaw
@@ -237,22 +1131,22 @@ class MAVHandler:
         else:
             # Use yaw angle => ignore yaw rate => bit 2 = 1, bit 3 = 1
             typemask = 0b00001100  # 12 decimal
-        
-        # Create the message
-        msg = self.vehicle.message_factory.set_attitude_target_encode(
-            0,    # time_boot_ms
-            1,    # target system
-            1,    # target component
-            typemask,
-            to_quaternion(roll_angle, pitch_angle, yaw_angle),  # attitude (quaternion)
-            roll_rate,   # body roll rate in radians/sec
-            pitch_rate,  # body pitch rate in radians/sec
-            math.radians(yaw_rate),  # body yaw rate in radians/sec
-            thrust       # thrust - ignored by FCU because bit 3 is set
-        )
 
-        self.vehicle.send_mavlink(msg)
+        self._submit_setpoint("attitude_target", self._encode_attitude_target_ignore_throttle,
+                              (typemask, roll_angle, pitch_angle, yaw_angle,
+                               roll_rate, pitch_rate, math.radians(yaw_rate), thrust),
+                              dedup=False)
 
+    def _encode_attitude_target_ignore_throttle(self, typemask, roll_angle, pitch_angle, yaw_angle,
+                                                roll_rate, pitch_rate, yaw_rate, thrust):
+        msg = self._attitude_ignore_throttle_msg
+        msg.type_mask = typemask
+        msg.q = to_quaternion(roll_angle, pitch_angle, yaw_angle)  # attitude (quaternion)
+        msg.body_roll_rate = roll_rate    # body roll rate in radians/sec
+        msg.body_pitch_rate = pitch_rate  # body pitch rate in radians/sec
+        msg.body_yaw_rate = yaw_rate      # body yaw rate in radians/sec
+        msg.thrust = thrust               # thrust - ignored by FCU because bit 3 is set
+        return msg
 
     def condition_yaw(self, heading, relative=False, clockwise=True):
         """
@@ -306,17 +1200,15 @@ class MAVHandler:
         """
         return self.vehicle.heading
 
-    def set_mode(self, mode_name):
+    def set_mode(self, mode_name, clear_setpoints=False):
         """
         Set vehicle mode (e.g., 'GUIDED', 'LOITER', 'AUTO', etc.).
 
         :param mode_name: A valid flight mode string.
+        :param clear_setpoints: Stop streaming setpoints first (see set_mode_async).
         """
         print(f"Changing mode to {mode_name}...")
-        self.vehicle.mode = VehicleMode(mode_name)
-        while self.vehicle.mode.name != mode_name:
-            print("Waiting for mode to change...")
-            time.sleep(1)
+        self.set_mode_async(mode_name, clear_setpoints=clear_setpoints).result()
         print(f"Vehicle mode changed to {mode_name}.")
 
     def set_groundspeed(self, speed_m_s):
@@ -333,6 +1225,10 @@ class MAVHandler:
         Closes the connection to the vehicle.
         """
         print("Closing vehicle connection...")
+        self.stop_setpoint_stream()
+        self.param_cache.flush(wait=True)
+        if self.param_cache_path:
+            self.param_cache.save(self.param_cache_path)
         self.vehicle.close()
         print("Connection closed.")
 
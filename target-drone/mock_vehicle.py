@@ -0,0 +1,237 @@
+"""
+Mock MAVLink vehicle over local UDP.
+
+Streams HEARTBEAT, GLOBAL_POSITION_INT, ATTITUDE, RAW_IMU and GPS_RAW_INT at
+configurable rates along a scripted trajectory, answers mode, arming and parameter
+requests, and timestamps every setpoint command it receives. Good enough for
+DroneKit's wait_ready() and for benchmarking MAVHandler without SITL or hardware.
+
+Usage:
+    python mock_vehicle.py [address] [trajectory]
+
+e.g. `python mock_vehicle.py 127.0.0.1:14538 circle` feeds target_drone.py.
+"""
+
+from pymavlink import mavutil
+import math
+import sys
+import threading
+import time
+
+
+EARTH_RADIUS_M = 6378137.0
+
+DEFAULT_RATES = {
+    'HEARTBEAT': 1,
+    'GLOBAL_POSITION_INT': 50,
+    'ATTITUDE': 50,
+    'RAW_IMU': 100,
+    'GPS_RAW_INT': 5,
+}
+
+DEFAULT_PARAMETERS = {
+    'WP_YAW_BEHAVIOR': 1.0,
+    'WPNAV_SPEED': 500.0,
+    'GUID_TIMEOUT': 3.0,
+    'SYSID_THISMAV': 1.0,
+}
+
+# Messages that are recorded with their receive time
+COMMAND_TYPES = ('SET_POSITION_TARGET_LOCAL_NED', 'SET_POSITION_TARGET_GLOBAL_INT',
+                 'SET_ATTITUDE_TARGET', 'COMMAND_LONG', 'SET_MODE', 'PARAM_SET')
+
+
+def hover(t):
+    return 0.0, 0.0, 10.0, 0.0
+
+
+def circle(t, radius=20.0, period=30.0):
+    angle = 2 * math.pi * t / period
+    return radius * math.cos(angle), radius * math.sin(angle), 10.0, angle + math.pi / 2
+
+
+def line(t, speed=5.0):
+    return speed * t, 0.0, 10.0, 0.0
+
+
+TRAJECTORIES = {'hover': hover, 'circle': circle, 'line': line}
+
+
+class MockVehicle:
+    """
+    Scripted MAVLink vehicle that talks to a handler listening on a local UDP port.
+    """
+
+    def __init__(self, address="127.0.0.1:14560", sysid=1, rates=None, trajectory="circle",
+                 home=(41.1, 29.0, 0.0), parameters=None):
+        """
+        :param address: host:port the handler listens on.
+        :param sysid: MAVLink system id of the mock vehicle.
+        :param rates: Dict of message name -> rate in Hz, merged over DEFAULT_RATES.
+        :param trajectory: Name from TRAJECTORIES, or a callable t -> (north_m, east_m, up_m, yaw_rad).
+        :param home: (lat, lon, alt) of the trajectory origin.
+        :param parameters: Dict of parameter values, DEFAULT_PARAMETERS if None.
+        """
+        self.conn = mavutil.mavlink_connection(f"udpout:{address}", source_system=sysid, source_component=1)
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.trajectory = TRAJECTORIES[trajectory] if isinstance(trajectory, str) else trajectory
+        self.home = home
+        self.parameters = dict(DEFAULT_PARAMETERS if parameters is None else parameters)
+
+        self.mode = 'GUIDED'
+        self.armed = False
+        self.commands = []  # (receive time from time.perf_counter(), message)
+        self.sent_counts = {name: 0 for name in self.rates}
+
+        self._mode_numbers = mavutil.mode_mapping_byname(mavutil.mavlink.MAV_TYPE_QUADROTOR)
+        self._mode_names = {number: name for name, number in self._mode_numbers.items()}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._start_time = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="MockVehicle")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.conn.close()
+
+    def take_commands(self):
+        """
+        Return and clear the recorded (receive time, message) pairs.
+        """
+        with self._lock:
+            commands, self.commands = self.commands, []
+        return commands
+
+    def _run(self):
+        senders = {
+            'HEARTBEAT': self._send_heartbeat,
+            'GLOBAL_POSITION_INT': self._send_global_position_int,
+            'ATTITUDE': self._send_attitude,
+            'RAW_IMU': self._send_raw_imu,
+            'GPS_RAW_INT': self._send_gps_raw_int,
+        }
+        schedule = {name: self._start_time for name, rate in self.rates.items() if rate > 0}
+
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            for name, due in schedule.items():
+                if now >= due:
+                    senders[name](now - self._start_time)
+                    self.sent_counts[name] += 1
+                    # Skip missed slots instead of bursting to catch up
+                    schedule[name] = max(due + 1.0 / self.rates[name], now)
+
+            self._receive()
+
+            next_due = min(schedule.values()) if schedule else now + 0.01
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                self.conn.select(min(delay, 0.01))
+
+    def _receive(self):
+        while True:
+            msg = self.conn.recv_match(blocking=False)
+            if msg is None:
+                return
+            received = time.perf_counter()
+            msg_type = msg.get_type()
+            if msg_type in COMMAND_TYPES:
+                with self._lock:
+                    self.commands.append((received, msg))
+
+            if msg_type == 'SET_MODE':
+                self.mode = self._mode_names.get(msg.custom_mode, self.mode)
+            elif msg_type == 'COMMAND_LONG':
+                self._handle_command_long(msg)
+            elif msg_type == 'PARAM_REQUEST_LIST':
+                for index, name in enumerate(self.parameters):
+                    self._send_param_value(name, index)
+            elif msg_type == 'PARAM_REQUEST_READ':
+                if msg.param_id in self.parameters:
+                    self._send_param_value(msg.param_id, list(self.parameters).index(msg.param_id))
+            elif msg_type == 'PARAM_SET':
+                if msg.param_id in self.parameters:
+                    self.parameters[msg.param_id] = msg.param_value
+                    self._send_param_value(msg.param_id, list(self.parameters).index(msg.param_id))
+
+    def _handle_command_long(self, msg):
+        result = mavutil.mavlink.MAV_RESULT_ACCEPTED
+        if msg.command == mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+            self.armed = msg.param1 == 1
+        elif msg.command == mavutil.mavlink.MAV_CMD_DO_SET_MODE:
+            self.mode = self._mode_names.get(int(msg.param2), self.mode)
+        self.conn.mav.command_ack_send(msg.command, result)
+
+    def _position(self, t):
+        north, east, up, yaw = self.trajectory(t)
+        lat = self.home[0] + math.degrees(north / EARTH_RADIUS_M)
+        lon = self.home[1] + math.degrees(east / (EARTH_RADIUS_M * math.cos(math.radians(self.home[0]))))
+        return lat, lon, up, yaw
+
+    def _send_heartbeat(self, t):
+        base_mode = mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+        if self.armed:
+            base_mode |= mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+        self.conn.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+            base_mode, self._mode_numbers[self.mode], mavutil.mavlink.MAV_STATE_ACTIVE)
+
+    def _send_global_position_int(self, t):
+        lat, lon, up, yaw = self._position(t)
+        # Velocity from a short finite difference of the trajectory
+        north0, east0, up0, _ = self.trajectory(t)
+        north1, east1, up1, _ = self.trajectory(t + 0.01)
+        vx, vy, vz = (north1 - north0) / 0.01, (east1 - east0) / 0.01, -(up1 - up0) / 0.01
+        self.conn.mav.global_position_int_send(
+            int(t * 1000), int(lat * 1e7), int(lon * 1e7), int((self.home[2] + up) * 1000), int(up * 1000),
+            int(vx * 100), int(vy * 100), int(vz * 100), int(math.degrees(yaw) % 360 * 100))
+
+    def _send_attitude(self, t):
+        _, _, _, yaw = self.trajectory(t)
+        yaw = (yaw + math.pi) % (2 * math.pi) - math.pi
+        self.conn.mav.attitude_send(int(t * 1000), 0.0, 0.0, yaw, 0.0, 0.0, 0.0)
+
+    def _send_raw_imu(self, t):
+        self.conn.mav.raw_imu_send(int(t * 1e6), 0, 0, -1000, 0, 0, 0, 0, 0, 0)
+
+    def _send_gps_raw_int(self, t):
+        lat, lon, up, _ = self._position(t)
+        self.conn.mav.gps_raw_int_send(
+            int(t * 1e6), 3, int(lat * 1e7), int(lon * 1e7), int((self.home[2] + up) * 1000),
+            100, 100, 0, 0, 12)
+
+    def _send_param_value(self, name, index):
+        self.conn.mav.param_value_send(
+            name.encode('ascii'), self.parameters[name], mavutil.mavlink.MAV_PARAM_TYPE_REAL32,
+            len(self.parameters), index)
+
+
+# Example usage:
+if __name__ == "__main__":
+    address = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:14538"
+    trajectory = sys.argv[2] if len(sys.argv) > 2 else "circle"
+
+    mock = MockVehicle(address, trajectory=trajectory)
+    mock.start()
+    print(f"Mock vehicle streaming to {address} ({trajectory})")
+    try:
+        while True:
+            time.sleep(1)
+            print(f"Sent: {mock.sent_counts}  Commands received: {len(mock.take_commands())}")
+    except KeyboardInterrupt:
+        print("Mock vehicle stopped.")
+    finally:
+        mock.close()
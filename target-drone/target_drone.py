@@ -1,10 +1,17 @@
 import serial
 import json
+import sys
 import time
 import random  # Replace this with your actual GPS source
 from mav_handler import MAVHandler
 
-drone = MAVHandler("127.0.0.1:14538")  
+# Fast start: begin streaming as soon as the first position arrives instead of
+# waiting for the full parameter download, so the link recovers quickly after a reboot
+# Connection string can be overridden, e.g. to point at mock_vehicle.py
+connection_str = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:14538"
+drone = MAVHandler(connection_str, fast_start=True)
+if drone.time_to_first_telemetry is not None:
+    print(f"First telemetry after {drone.time_to_first_telemetry:.3f} s")
 
 # Open serial port to RFD modem
 ser = serial.Serial('/dev/ttyUSB0', 115200, timeout=1)  # Adjust COM port for your setup
@@ -0,0 +1,520 @@
+"""
+Unit tests for the MAVHandler helpers, with a fake vehicle where one is needed.
+
+Run with: python -m pytest test_mav_handler.py
+"""
+
+import threading
+import time
+import warnings
+from collections import defaultdict
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from pymavlink import mavutil
+from pymavlink.quaternion import QuaternionBase
+
+from mav_handler import (ImuRingBuffer, MAVHandler, ParameterCache, SetpointStreamer, _scheduler, _then,
+                         to_quaternion)
+
+
+class FakeVehicle:
+    """
+    The parts of dronekit.Vehicle MAVHandler uses: message and attribute listeners,
+    a message factory and send_mavlink(), which records the messages instead of
+    sending them. Setting `mode` only records the request, like a vehicle that
+    has not switched yet.
+    """
+
+    def __init__(self):
+        self.message_factory = mavutil.mavlink.MAVLink(None, srcSystem=255)
+        self._master = SimpleNamespace(target_system=1, target_component=1)
+        self.sent = []
+        self.parameters = {}
+        self.requested_mode = None
+        self.reported_mode = SimpleNamespace(name='STABILIZE')
+        self.last_heartbeat = None
+        self.location = SimpleNamespace(global_frame=SimpleNamespace(lat=None))
+        self.attitude = SimpleNamespace(pitch=None)
+        self._listeners = defaultdict(list)
+        self._attribute_listeners = defaultdict(list)
+
+    @property
+    def mode(self):
+        return self.reported_mode
+
+    @mode.setter
+    def mode(self, mode):
+        self.requested_mode = mode.name
+
+    def report_mode(self, name):
+        self.reported_mode = SimpleNamespace(name=name)
+        for fn in list(self._attribute_listeners['mode']):
+            fn(self, 'mode', self.reported_mode)
+
+    def add_attribute_listener(self, name, fn):
+        self._attribute_listeners[name].append(fn)
+
+    def remove_attribute_listener(self, name, fn):
+        self._attribute_listeners[name].remove(fn)
+
+    def add_message_listener(self, name, fn):
+        self._listeners[name].append(fn)
+
+    def remove_message_listener(self, name, fn):
+        self._listeners[name].remove(fn)
+
+    def send_mavlink(self, msg):
+        self.sent.append(msg)
+
+    def flush(self):
+        pass
+
+    def receive(self, msg):
+        for fn in list(self._listeners[msg.get_type()]):
+            fn(self, msg.get_type(), msg)
+
+    def take_sent(self, msg_type=None):
+        sent, self.sent = self.sent, []
+        return [msg for msg in sent if msg_type is None or msg.get_type() == msg_type]
+
+
+def fill(buffer, n):
+    for i in range(n):
+        buffer.append(i * 0.01, i, 2 * i, 3 * i, -i, -2 * i, -3 * i)
+
+
+def test_empty_buffer():
+    buffer = ImuRingBuffer(capacity=16)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert buffer.decimated(4).shape == (0, 7)
+        assert np.array_equal(buffer.mean(), np.zeros(6))
+        assert np.array_equal(buffer.rms(), np.zeros(6))
+    assert buffer.window().shape == (0, 7)
+
+
+def test_decimated_under_filled():
+    buffer = ImuRingBuffer(capacity=16)
+    fill(buffer, 3)
+    assert buffer.decimated(4).shape == (0, 7)
+    assert buffer.decimated(4, n=2).shape == (0, 7)
+
+
+def test_decimated_drops_oldest_leftover():
+    buffer = ImuRingBuffer(capacity=16)
+    fill(buffer, 10)
+    blocks = buffer.decimated(4)
+    assert blocks.shape == (2, 7)
+    # Samples 2..9 in two blocks; samples 0 and 1 are the leftover
+    assert np.allclose(blocks[:, 1], [3.5, 7.5])
+
+
+def test_mean_wraps_around():
+    buffer = ImuRingBuffer(capacity=4)
+    fill(buffer, 6)
+    assert np.allclose(buffer.mean()[0], np.mean([2, 3, 4, 5]))
+
+
+def test_window_valid_until_capacity_minus_n_appends():
+    buffer = ImuRingBuffer(capacity=8)
+    fill(buffer, 11)
+    window = buffer.window(3)
+    expected = window.copy()
+    for i in range(8 - 3):
+        buffer.append(100 + i, 0, 0, 0, 0, 0, 0)
+    np.testing.assert_array_equal(window, expected)
+    buffer.append(200, 0, 0, 0, 0, 0, 0)
+    assert window[0, 0] == 200
+    np.testing.assert_array_equal(window[1:], expected[1:])
+
+
+def param_value(vehicle, name, value):
+    return vehicle.message_factory.param_value_encode(
+        name.encode('ascii'), value, mavutil.mavlink.MAV_PARAM_TYPE_REAL32, 1, 65535)
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_parameter_write_confirmed_once():
+    vehicle = FakeVehicle()
+    cache = ParameterCache(vehicle, coalesce_s=10)
+    cache.set('WPNAV_SPEED', 500)
+    cache.flush()
+    [msg] = vehicle.take_sent('PARAM_SET')
+    assert msg.param_value == 500
+    vehicle.receive(param_value(vehicle, 'WPNAV_SPEED', 500))
+
+    cache.set('WPNAV_SPEED', 500)
+    assert cache.flush() == set()
+    assert vehicle.take_sent() == []
+    assert cache.get('WPNAV_SPEED') == 500
+
+
+def test_lost_parameter_write_is_resent_then_fails():
+    vehicle = FakeVehicle()
+    cache = ParameterCache(vehicle, coalesce_s=10, resend_s=0.05, retries=3)
+    cache.set('WPNAV_SPEED', 500)
+    cache.flush()
+    wait_until(lambda: 'WPNAV_SPEED' in cache._failed)
+    assert len(vehicle.take_sent('PARAM_SET')) == 3
+    assert cache.flush() == {'WPNAV_SPEED'}
+
+    # A failed write is not remembered as sent: the same value goes out again
+    cache.set('WPNAV_SPEED', 500)
+    cache.flush()
+    assert len(vehicle.take_sent('PARAM_SET')) == 1
+    vehicle.receive(param_value(vehicle, 'WPNAV_SPEED', 500))
+    assert cache.flush(wait=True, timeout=0.1) == set()
+
+
+def test_resend_stops_once_confirmed():
+    vehicle = FakeVehicle()
+    cache = ParameterCache(vehicle, coalesce_s=10, resend_s=0.05, retries=10)
+    cache.set('WPNAV_SPEED', 500)
+    cache.flush()
+    wait_until(lambda: len(vehicle.sent) >= 2)  # The first PARAM_SET was lost
+    vehicle.receive(param_value(vehicle, 'WPNAV_SPEED', 500))
+    vehicle.take_sent()
+    time.sleep(0.2)
+    assert vehicle.take_sent() == []
+    assert cache.flush() == set()
+
+
+def test_unconfirmed_value_is_not_deduplicated():
+    vehicle = FakeVehicle()
+    cache = ParameterCache(vehicle, coalesce_s=10, resend_s=10)
+    cache.set('WPNAV_SPEED', 500)
+    cache.flush()
+    cache.set('WPNAV_SPEED', 500)
+    cache.flush()
+    assert len(vehicle.take_sent('PARAM_SET')) == 2
+
+
+def test_pending_write_of_confirmed_value_is_skipped():
+    vehicle = FakeVehicle()
+    cache = ParameterCache(vehicle, coalesce_s=10, resend_s=10)
+    vehicle.receive(param_value(vehicle, 'WPNAV_SPEED', 500))
+    cache.set('WPNAV_SPEED', 600)
+    cache.set('WPNAV_SPEED', 500)  # Back to the vehicle's value before anything was sent
+    cache.set('WPNAV_ACCEL', 250)
+    vehicle.receive(param_value(vehicle, 'WPNAV_ACCEL', 250))  # Confirmed before the flush
+    cache.flush()
+    assert vehicle.take_sent() == []
+
+
+def test_then_runs_step_after_first():
+    first, second = Future(), Future()
+    chained = _then(first, lambda: second)
+    first.set_result(None)
+    assert not chained.done()
+    second.set_result(42)
+    assert chained.result(timeout=0) == 42
+
+
+def test_then_fails_when_step_raises():
+    first = Future()
+    error = RuntimeError("step failed")
+
+    def step():
+        raise error
+
+    chained = _then(first, step)
+    first.set_result(None)
+    assert chained.exception(timeout=0) is error
+
+
+def test_then_skips_step_after_failure():
+    first = Future()
+    steps = []
+    chained = _then(first, lambda: steps.append(1))
+    first.set_exception(TimeoutError())
+    assert isinstance(chained.exception(timeout=0), TimeoutError)
+    assert steps == []
+
+
+def test_cancelling_then_cancels_pending_step():
+    first, second = Future(), Future()
+    chained = _then(first, lambda: second)
+    first.set_result(None)
+    chained.cancel()
+    assert second.cancelled()
+
+
+def test_scheduler_runs_in_order_and_skips_cancelled():
+    ran = []
+    done = threading.Event()
+    _scheduler.call_later(0.05, lambda: ran.append('late'))
+    cancelled = _scheduler.call_later(0.01, lambda: ran.append('cancelled'))
+    _scheduler.call_later(0, lambda: ran.append('first'))
+    _scheduler.call_later(0.1, done.set)
+    _scheduler.cancel(cancelled)
+    assert done.wait(2)
+    assert ran == ['first', 'late']
+
+
+def test_set_mode_async_resolves_on_reported_mode():
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    future = handler.set_mode_async('GUIDED')
+    assert vehicle.requested_mode == 'GUIDED'
+    assert not future.done()
+    vehicle.report_mode('GUIDED')
+    assert future.result(timeout=0) is True
+    wait_until(lambda: not vehicle._attribute_listeners['mode'])
+
+
+def test_set_mode_async_times_out():
+    handler = MAVHandler.from_vehicle(FakeVehicle())
+    with pytest.raises(TimeoutError):
+        handler.set_mode_async('GUIDED', timeout=0.05).result(timeout=2)
+
+
+@pytest.mark.parametrize("clear_setpoints", [False, True])
+def test_set_mode_async_clears_setpoints_only_when_asked(clear_setpoints):
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    handler.start_setpoint_stream(rate_hz=100, keepalive_s=0.05)
+    try:
+        handler.set_velocity_body(1, 0, 0)
+        handler.set_mode_async('GUIDED', clear_setpoints=clear_setpoints).cancel()
+        time.sleep(0.05)  # Let the streamer pick up the change
+        vehicle.take_sent()
+        time.sleep(0.2)
+        sent = vehicle.take_sent('SET_POSITION_TARGET_LOCAL_NED')
+        assert bool(sent) != clear_setpoints
+    finally:
+        handler.stop_setpoint_stream()
+
+
+class FlakyVehicle(FakeVehicle):
+    """A vehicle whose link fails for the first `failures` sends."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def send_mavlink(self, msg):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("link down")
+        super().send_mavlink(msg)
+
+
+def heartbeat(vehicle):
+    return vehicle.message_factory.heartbeat_encode(0, 0, 0, 0, 0)
+
+
+def test_streamer_sends_unchanged_setpoint_only_for_keepalive():
+    vehicle = FakeVehicle()
+    streamer = SetpointStreamer(vehicle, rate_hz=100, keepalive_s=10)
+    encoded = []
+
+    def encoder(value):
+        encoded.append(value)
+        return heartbeat(vehicle)
+
+    streamer.update('position_target', encoder, (1,))
+    for now in (0.0, 0.1, 0.2):
+        streamer._send_pending(now)
+    assert encoded == [1]
+    streamer._send_pending(10.0)
+    assert encoded == [1, 1]
+    streamer.update('position_target', encoder, (2,))
+    streamer._send_pending(10.1)
+    assert encoded == [1, 1, 2]
+
+
+def test_streamer_resends_without_dedup_and_after_clear():
+    vehicle = FakeVehicle()
+    streamer = SetpointStreamer(vehicle, rate_hz=100, keepalive_s=10)
+    encoder = lambda value: heartbeat(vehicle)
+    streamer.update('attitude_target', encoder, (1,), dedup=False)
+    streamer._send_pending(0.0)
+    streamer._send_pending(0.1)
+    assert len(vehicle.take_sent()) == 2
+
+    streamer.update('position_target', encoder, (1,))
+    streamer._send_pending(0.2)
+    streamer.clear('position_target')
+    streamer._send_pending(0.3)
+    streamer.update('position_target', encoder, (1,))
+    streamer._send_pending(0.4)
+    # The attitude setpoint was dropped by the position one; the cleared setpoint goes out again
+    assert len(vehicle.take_sent()) == 2
+
+
+def test_streamer_streams_one_kind_at_a_time():
+    vehicle = FakeVehicle()
+    streamer = SetpointStreamer(vehicle, rate_hz=100, keepalive_s=10)
+    kinds = []
+    streamer.update('position_target', lambda: kinds.append('position') or heartbeat(vehicle), ())
+    streamer.update('attitude_target', lambda: kinds.append('attitude') or heartbeat(vehicle), ())
+    streamer._send_pending(0.0)
+    assert kinds == ['attitude']
+
+
+def test_streamer_keeps_running_after_send_error(capsys):
+    vehicle = FlakyVehicle(failures=3)
+    streamer = SetpointStreamer(vehicle, rate_hz=100, keepalive_s=0)
+    streamer.update('position_target', lambda: heartbeat(vehicle), ())
+    streamer.start()
+    try:
+        wait_until(lambda: len(vehicle.sent) >= 3)
+    finally:
+        streamer.stop()
+    # One traceback for the whole streak of failures
+    assert capsys.readouterr().err.count("OSError: link down") == 1
+
+
+def test_setpoints_go_through_stream_while_running():
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    handler.set_velocity_body(1, 0, 0)
+    assert len(vehicle.take_sent('SET_POSITION_TARGET_LOCAL_NED')) == 1
+
+    handler.start_setpoint_stream(rate_hz=100, keepalive_s=10)
+    try:
+        for _ in range(20):
+            handler.set_velocity_body(2, 0, 0)
+        wait_until(lambda: vehicle.sent)
+        time.sleep(0.1)
+    finally:
+        handler.stop_setpoint_stream()
+    [msg] = vehicle.take_sent('SET_POSITION_TARGET_LOCAL_NED')
+    assert msg.vx == 2
+
+
+def packed(msg):
+    """The message as framed on the wire by a fresh link, so sequence numbers match."""
+    return msg.pack(mavutil.mavlink.MAVLink(None, srcSystem=255))
+
+
+SETPOINT_VALUES = [(1.5, -0.25, 0.5, 30.0), (0.0, 0.0, 0.0, 0.0), (-3.0, 2.0, -1.0, -170.0)]
+
+
+def test_position_target_template_matches_encode():
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    factory = vehicle.message_factory
+    for vx, vy, vz, yaw_deg in SETPOINT_VALUES:
+        expected = factory.set_position_target_local_ned_encode(
+            0, 0, 0, mavutil.mavlink.MAV_FRAME_BODY_OFFSET_NED, 0b0000111111000111,
+            0, 0, 0, vx, vy, vz, 0, 0, 0, yaw_deg, 0)
+        assert packed(handler._encode_position_target(vx, vy, vz, yaw_deg)) == packed(expected)
+
+
+def test_target_attitude_template_matches_encode():
+    vehicle = FakeVehicle()
+    vehicle._master = SimpleNamespace(target_system=3, target_component=7)
+    handler = MAVHandler.from_vehicle(vehicle)
+    factory = vehicle.message_factory
+    for roll, pitch, yaw, thrust in SETPOINT_VALUES:
+        msg = handler._encode_target_attitude(roll, pitch, yaw, thrust, 0.1, 0.2, 0.3, 0b00000111)
+        q = QuaternionBase([np.radians(angle) for angle in (roll, pitch, yaw)])
+        assert np.allclose(msg.q, list(q.q))
+        expected = factory.set_attitude_target_encode(
+            msg.time_boot_ms, 3, 7, 0b00000111, msg.q, 0.1, 0.2, 0.3, thrust)
+        assert packed(msg) == packed(expected)
+
+
+def test_attitude_ignore_throttle_template_matches_encode():
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    factory = vehicle.message_factory
+    for roll, pitch, yaw, thrust in SETPOINT_VALUES:
+        msg = handler._encode_attitude_target_ignore_throttle(
+            0b00001100, roll, pitch, yaw, 0.1, 0.2, 0.3, thrust)
+        expected = factory.set_attitude_target_encode(
+            0, 1, 1, 0b00001100, to_quaternion(roll, pitch, yaw), 0.1, 0.2, 0.3, thrust)
+        assert packed(msg) == packed(expected)
+
+
+def test_euler_to_quaternion_matches_quaternion_base():
+    for angles in [(0.1, -0.2, 0.3), (np.pi, 0, -np.pi / 2), (0, 0, 0)]:
+        assert np.allclose(to_quaternion(*np.degrees(angles)), list(QuaternionBase(list(angles)).q))
+
+
+class LoadingVehicle(FakeVehicle):
+    """A vehicle whose DroneKit downloads finish for the attributes in `loaded`."""
+
+    def __init__(self, loaded, parameters=None):
+        super().__init__()
+        self.loaded = set(loaded)
+        self.parameters = parameters or {}
+
+    def wait_ready(self, *attributes, timeout=None, raise_exception=True):
+        return self.loaded.issuperset(attributes)
+
+
+def test_readiness_follows_telemetry():
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    assert not handler.wait_ready('heartbeat', timeout=0)
+    assert handler.time_to_first_telemetry is None
+
+    vehicle.receive(heartbeat(vehicle))
+    vehicle.receive(vehicle.message_factory.global_position_int_encode(0, 0, 0, 0, 0, 0, 0, 0, 0))
+    assert handler.wait_ready('heartbeat', 'position', timeout=0)
+    first_telemetry = handler.time_to_first_telemetry
+    assert first_telemetry is not None
+    assert not handler.wait_ready(timeout=0.01)
+
+    vehicle.receive(vehicle.message_factory.global_position_int_encode(0, 0, 0, 0, 0, 0, 0, 0, 0))
+    vehicle.receive(vehicle.message_factory.attitude_encode(0, 0, 0, 0, 0, 0, 0))
+    assert handler.wait_ready('attitude', timeout=0)
+    assert handler.time_to_first_telemetry == first_telemetry
+
+
+def test_wait_ready_unblocks_when_stage_completes():
+    vehicle = FakeVehicle()
+    handler = MAVHandler.from_vehicle(vehicle)
+    _scheduler.call_later(0.05, lambda: vehicle.receive(heartbeat(vehicle)))
+    assert handler.wait_ready('heartbeat', timeout=2)
+
+
+def test_background_load_seeds_parameters():
+    vehicle = LoadingVehicle({'gps_0', 'armed', 'mode', 'attitude', 'parameters'},
+                             parameters={'WPNAV_SPEED': 500.0})
+    handler = MAVHandler.from_vehicle(vehicle)
+    handler._load_in_background(timeout=0)
+    assert handler.wait_ready('attributes', 'parameters', timeout=0)
+    assert handler.get_parameter_value('WPNAV_SPEED') == 500.0
+    assert vehicle.take_sent() == []
+
+
+def test_background_load_requests_missing_parameters():
+    vehicle = LoadingVehicle({'gps_0', 'armed', 'mode', 'attitude'})
+    handler = MAVHandler.from_vehicle(vehicle)
+    loader = threading.Thread(target=handler._load_in_background, kwargs={'timeout': 2})
+    loader.start()
+    wait_until(lambda: vehicle.sent)
+    [request] = vehicle.take_sent()
+    assert request.get_type() == 'PARAM_REQUEST_LIST'
+    assert handler.wait_ready('attributes', timeout=0)
+    assert not handler.wait_ready('parameters', timeout=0)
+
+    for index, (name, value) in enumerate([('WPNAV_SPEED', 500.0), ('WPNAV_ACCEL', 250.0)]):
+        vehicle.receive(vehicle.message_factory.param_value_encode(
+            name.encode('ascii'), value, mavutil.mavlink.MAV_PARAM_TYPE_REAL32, 2, index))
+    loader.join(2)
+    assert handler.wait_ready('parameters', timeout=0)
+    assert handler.get_parameter_value('WPNAV_ACCEL') == 250.0
+
+
+def test_from_vehicle_marks_telemetry_received_before():
+    vehicle = FakeVehicle()
+    vehicle.last_heartbeat = 0.0
+    vehicle.location.global_frame.lat = 47.0
+    vehicle.first_position_time = time.monotonic() - 1.0
+    handler = MAVHandler.from_vehicle(vehicle, connect_start=vehicle.first_position_time - 2.0)
+    assert handler.wait_ready('heartbeat', 'position', timeout=0)
+    assert not handler.wait_ready('attitude', timeout=0)
+    assert abs(handler.time_to_first_telemetry - 2.0) < 0.01
@@ -0,0 +1,51 @@
+"""
+VehiclePool against the local mock vehicle.
+
+Run with: python -m pytest test_vehicle_pool.py
+"""
+
+import time
+
+from mock_vehicle import MockVehicle
+from vehicle_pool import VehiclePool
+
+
+def test_latest_setpoint_delivered_under_overload():
+    mock = MockVehicle("127.0.0.1:14650", trajectory="hover")
+    mock.start()
+    pool = VehiclePool("udpin:127.0.0.1:14650", send_rate_hz=50)
+    try:
+        handler = pool.handler(1, timeout=30)
+        mock.take_commands()
+
+        # Far more setpoints than the link's 50 msg/s; vx carries the sequence number
+        n_sent = 2000
+        for seq in range(n_sent):
+            handler.set_velocity_body(float(seq), 0.0, 0.0)
+        time.sleep(1.0)
+
+        received = [msg for _, msg in mock.take_commands()
+                    if msg.get_type() == 'SET_POSITION_TARGET_LOCAL_NED']
+        assert received
+        assert int(received[-1].vx) == n_sent - 1
+        # Superseded setpoints were replaced, not queued behind the rate limit
+        assert len(received) < n_sent // 10
+        assert pool.dropped > 0
+    finally:
+        pool.close()
+        mock.close()
+
+
+def test_pooled_handler_readiness():
+    mock = MockVehicle("127.0.0.1:14651", trajectory="hover")
+    mock.start()
+    pool = VehiclePool("udpin:127.0.0.1:14651")
+    try:
+        handler = pool.handler(1, timeout=30)
+        assert handler.wait_ready(timeout=10)
+        assert 0 < handler.time_to_first_telemetry < 5
+        assert handler.get_parameter_value('WPNAV_SPEED') == 500.0
+        assert pool.handler(1) is handler
+    finally:
+        pool.close()
+        mock.close()
@@ -0,0 +1,455 @@
+from dronekit import VehicleMode, LocationGlobal, LocationGlobalRelative, Attitude
+from pymavlink import mavutil
+from collections import OrderedDict
+import itertools
+import threading
+import time
+import types
+
+from mav_handler import MAVHandler
+
+
+# Setpoints supersede each other: only the newest per (target system, message id) is queued
+SETPOINT_MSGIDS = frozenset((
+    mavutil.mavlink.MAVLINK_MSG_ID_SET_POSITION_TARGET_LOCAL_NED,
+    mavutil.mavlink.MAVLINK_MSG_ID_SET_POSITION_TARGET_GLOBAL_INT,
+    mavutil.mavlink.MAVLINK_MSG_ID_SET_ATTITUDE_TARGET,
+))
+
+# Other messages waiting for the writer beyond this are dropped, oldest first
+SEND_QUEUE_MAX = 1000
+
+
+class PooledVehicle:
+    """
+    Lightweight per-vehicle view of a VehiclePool connection.
+
+    Tracks the state of one system id from the messages the pool hands it and
+    exposes the subset of the dronekit.Vehicle interface MAVHandler uses, so a
+    MAVHandler can be built on top of it with MAVHandler.from_vehicle().
+    """
+
+    def __init__(self, pool, sysid, heartbeat):
+        self._pool = pool
+        self.sysid = sysid
+        self.message_factory = pool.master.mav
+        self._master = types.SimpleNamespace(target_system=sysid, target_component=mavutil.mavlink.MAV_COMP_ID_AUTOPILOT1)
+
+        self._message_listeners = {}
+        self._attribute_listeners = {}
+        self._listener_lock = threading.Lock()
+
+        self._mav_type = heartbeat.type
+        self._mode_name = None
+        self._armed = False
+        self._gps_fix = 0
+        self._ekf_ok = False
+        self.joined_at = time.monotonic()  # When the pool got the vehicle's first heartbeat
+        self.last_heartbeat = None
+        self.first_position_time = None
+
+        self.location = types.SimpleNamespace(
+            global_frame=LocationGlobal(None, None, None),
+            global_relative_frame=LocationGlobalRelative(None, None, None))
+        self.attitude = Attitude(None, None, None)
+        self.velocity = [None, None, None]
+        self.heading = None
+        self.airspeed = None
+        self.groundspeed_measured = None
+        self.gps_0 = types.SimpleNamespace(fix_type=None, satellites_visible=None, eph=None, epv=None)
+        self.parameters = {}
+
+        self._handlers = {
+            'HEARTBEAT': self._on_heartbeat,
+            'GLOBAL_POSITION_INT': self._on_global_position_int,
+            'ATTITUDE': self._on_attitude,
+            'VFR_HUD': self._on_vfr_hud,
+            'GPS_RAW_INT': self._on_gps_raw_int,
+            'EKF_STATUS_REPORT': self._on_ekf_status_report,
+            'PARAM_VALUE': self._on_param_value,
+        }
+
+    # ---- Listener interface (same callback signatures as DroneKit) ----
+
+    def add_message_listener(self, name, fn):
+        with self._listener_lock:
+            self._message_listeners.setdefault(name, []).append(fn)
+
+    def remove_message_listener(self, name, fn):
+        with self._listener_lock:
+            listeners = self._message_listeners.get(name, [])
+            if fn in listeners:
+                listeners.remove(fn)
+
+    def add_attribute_listener(self, name, fn):
+        with self._listener_lock:
+            self._attribute_listeners.setdefault(name, []).append(fn)
+
+    def remove_attribute_listener(self, name, fn):
+        with self._listener_lock:
+            listeners = self._attribute_listeners.get(name, [])
+            if fn in listeners:
+                listeners.remove(fn)
+
+    def _notify_attribute(self, name, value):
+        with self._listener_lock:
+            listeners = list(self._attribute_listeners.get(name, ())) + list(self._attribute_listeners.get('*', ()))
+        for fn in listeners:
+            fn(self, name, value)
+
+    def _handle_message(self, msg):
+        msg_type = msg.get_type()
+        handler = self._handlers.get(msg_type)
+        if handler is not None:
+            handler(msg)
+
+        with self._listener_lock:
+            listeners = list(self._message_listeners.get(msg_type, ())) + list(self._message_listeners.get('*', ()))
+        for fn in listeners:
+            fn(self, msg_type, msg)
+
+    # ---- State updates ----
+
+    def _on_heartbeat(self, msg):
+        if msg.get_srcComponent() != self._master.target_component:
+            return
+        self.last_heartbeat = time.monotonic()
+        self._mav_type = msg.type
+
+        mode_name = mavutil.mode_string_v10(msg)
+        if mode_name != self._mode_name:
+            self._mode_name = mode_name
+            self._notify_attribute('mode', self.mode)
+
+        armed = bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
+        if armed != self._armed:
+            self._armed = armed
+            self._notify_attribute('armed', armed)
+
+    def _on_global_position_int(self, msg):
+        if self.first_position_time is None:
+            self.first_position_time = time.monotonic()
+        lat = msg.lat / 1.0e7
+        lon = msg.lon / 1.0e7
+        self.location.global_frame = LocationGlobal(lat, lon, msg.alt / 1000.0)
+        self.location.global_relative_frame = LocationGlobalRelative(lat, lon, msg.relative_alt / 1000.0)
+        self.velocity = [msg.vx / 100.0, msg.vy / 100.0, msg.vz / 100.0]
+        self._notify_attribute('location.global_frame', self.location.global_frame)
+        self._notify_attribute('location.global_relative_frame', self.location.global_relative_frame)
+        self._notify_attribute('velocity', self.velocity)
+
+    def _on_attitude(self, msg):
+        self.attitude = Attitude(msg.pitch, msg.yaw, msg.roll)
+        self._notify_attribute('attitude', self.attitude)
+
+    def _on_vfr_hud(self, msg):
+        self.heading = msg.heading
+        self.airspeed = msg.airspeed
+        self.groundspeed_measured = msg.groundspeed
+        self._notify_attribute('heading', self.heading)
+
+    def _on_gps_raw_int(self, msg):
+        self.gps_0 = types.SimpleNamespace(fix_type=msg.fix_type, satellites_visible=msg.satellites_visible,
+                                           eph=msg.eph, epv=msg.epv)
+        self._gps_fix = msg.fix_type
+        self._notify_attribute('gps_0', self.gps_0)
+
+    def _on_ekf_status_report(self, msg):
+        ekf_ok = bool(msg.flags & mavutil.mavlink.EKF_PRED_POS_HORIZ_ABS)
+        if ekf_ok != self._ekf_ok:
+            self._ekf_ok = ekf_ok
+            self._notify_attribute('ekf_ok', ekf_ok)
+
+    def _on_param_value(self, msg):
+        self.parameters[msg.param_id] = msg.param_value
+
+    # ---- Vehicle interface used by MAVHandler ----
+
+    @property
+    def mode(self):
+        return VehicleMode(self._mode_name)
+
+    @mode.setter
+    def mode(self, value):
+        mode_map = mavutil.mode_mapping_byname(self._mav_type)
+        self.send_mavlink(self.message_factory.set_mode_encode(
+            self.sysid, mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, mode_map[value.name]))
+
+    @property
+    def armed(self):
+        return self._armed
+
+    @armed.setter
+    def armed(self, value):
+        self._command_long(mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 1 if value else 0)
+
+    @property
+    def is_armable(self):
+        return self._mode_name not in (None, 'INITIALISING') and self._gps_fix > 1 and self._ekf_ok
+
+    @property
+    def ekf_ok(self):
+        return self._ekf_ok
+
+    @property
+    def groundspeed(self):
+        return self.groundspeed_measured
+
+    @groundspeed.setter
+    def groundspeed(self, speed):
+        self._command_long(mavutil.mavlink.MAV_CMD_DO_CHANGE_SPEED, 1, speed, -1)
+
+    def simple_takeoff(self, alt):
+        self._command_long(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, 0, 0, 0, 0, 0, 0, alt)
+
+    def simple_goto(self, location):
+        frame = mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT
+        if isinstance(location, LocationGlobal) and not isinstance(location, LocationGlobalRelative):
+            frame = mavutil.mavlink.MAV_FRAME_GLOBAL_INT
+        self.send_mavlink(self.message_factory.set_position_target_global_int_encode(
+            0, self.sysid, self._master.target_component, frame,
+            0b0000111111111000,  # type_mask (only positions enabled)
+            int(location.lat * 1e7), int(location.lon * 1e7), location.alt,
+            0, 0, 0, 0, 0, 0, 0, 0))
+
+    def wait_ready(self, *attributes, timeout=None, raise_exception=True):
+        """
+        Wait until the given attributes have been received, like
+        dronekit.Vehicle.wait_ready. The pool never downloads the parameter list,
+        so 'parameters' is never ready; request it through the ParameterCache.
+
+        :return: True if every attribute is ready.
+        """
+        received = {
+            'mode': lambda: self._mode_name is not None,
+            'armed': lambda: self.last_heartbeat is not None,
+            'attitude': lambda: self.attitude.pitch is not None,
+            'gps_0': lambda: self.gps_0.fix_type is not None,
+            'location.global_frame': lambda: self.location.global_frame.lat is not None,
+            'location.global_relative_frame': lambda: self.location.global_relative_frame.lat is not None,
+            'heading': lambda: self.heading is not None,
+        }
+
+        def ready():
+            return all(name in received and received[name]() for name in attributes)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while 'parameters' not in attributes and not ready():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+        if ready():
+            return True
+        if raise_exception:
+            raise TimeoutError(f"Timed out waiting for {', '.join(attributes)}")
+        return False
+
+    def _command_long(self, command, *params):
+        params = (list(params) + [0] * 7)[:7]
+        self.send_mavlink(self.message_factory.command_long_encode(
+            self.sysid, self._master.target_component, command, 0, *params))
+
+    def send_mavlink(self, message):
+        # A broadcast target would reach every vehicle on the shared link
+        if getattr(message, 'target_system', None) == 0:
+            message.target_system = self.sysid
+        if getattr(message, 'target_component', None) == 0:
+            message.target_component = self._master.target_component
+        self._pool.send(message)
+
+    def flush(self):
+        # The pool writer sends as soon as the rate limit allows
+        pass
+
+    def close(self):
+        with self._listener_lock:
+            self._message_listeners.clear()
+            self._attribute_listeners.clear()
+
+
+class VehiclePool:
+    """
+    Several vehicles behind one MAVLink connection.
+
+    A single reader thread parses the link and dispatches every message by source
+    system id to a PooledVehicle. All outgoing messages are packed by the caller and
+    written by one rate-limited writer thread, so any number of vehicles share one
+    socket (or serial port), one parser and one writer.
+
+    When callers send faster than send_rate_hz, a queued setpoint is replaced by a
+    newer one for the same vehicle and message type, so the vehicle always gets
+    the latest setpoint rather than a growing backlog. Other messages are kept up
+    to SEND_QUEUE_MAX, dropping the oldest; `dropped` counts both.
+
+    Outgoing messages are addressed by target system id, not by socket: with a
+    'udpin:' link pymavlink replies to the last sender, so UDP vehicles should
+    reach the pool through a single router endpoint (e.g. mavlink-routerd).
+    """
+
+    def __init__(self, connection_string, baud_rate=57600, send_rate_hz=500, stream_rate_hz=100,
+                 source_system=255):
+        """
+        :param connection_string: The address string for the shared link
+                                  (e.g., '/dev/ttyAMA0', 'udpin:0.0.0.0:14550', etc.)
+        :param baud_rate: Baud rate for serial connection (ignored for UDP/TCP connections).
+        :param send_rate_hz: Maximum number of outgoing messages per second on the link.
+        :param stream_rate_hz: Telemetry rate requested from every vehicle that appears.
+        :param source_system: MAVLink system id of this ground station.
+        """
+        print(f"Opening shared vehicle link on: {connection_string}")
+        self.master = mavutil.mavlink_connection(connection_string, baud=baud_rate, source_system=source_system)
+        self.send_rate_hz = send_rate_hz
+        self.stream_rate_hz = stream_rate_hz
+
+        self._vehicles = {}
+        self._handlers = {}
+        self._vehicles_changed = threading.Condition()
+        self._pack_lock = threading.Lock()
+        self._outbox = OrderedDict()  # key -> packed message, oldest first
+        self._outbox_changed = threading.Condition()
+        self._message_keys = itertools.count()
+        self.dropped = 0
+        self._stop_event = threading.Event()
+
+        self._reader = threading.Thread(target=self._read_loop, name="VehiclePoolReader")
+        self._reader.daemon = True
+        self._writer = threading.Thread(target=self._write_loop, name="VehiclePoolWriter")
+        self._writer.daemon = True
+        self._reader.start()
+        self._writer.start()
+
+    def sysids(self):
+        """
+        System ids of all vehicles seen so far.
+        """
+        with self._vehicles_changed:
+            return sorted(self._vehicles)
+
+    def handler(self, sysid, timeout=None):
+        """
+        Get the MAVHandler for a vehicle, waiting for its first heartbeat if needed.
+
+        The handler's readiness stages and time_to_first_telemetry work as after a
+        fast start, timed from the vehicle's first heartbeat on the link. The
+        parameter list is requested in the background.
+
+        :param sysid: MAVLink system id of the vehicle.
+        :param timeout: Maximum time to wait for the vehicle, or None to wait forever.
+        :return: A MAVHandler bound to that vehicle.
+        """
+        with self._vehicles_changed:
+            if not self._vehicles_changed.wait_for(lambda: sysid in self._vehicles, timeout):
+                raise TimeoutError(f"No heartbeat from system {sysid}")
+            if sysid not in self._handlers:
+                vehicle = self._vehicles[sysid]
+                self._handlers[sysid] = MAVHandler.from_vehicle(vehicle, connect_start=vehicle.joined_at,
+                                                                load_in_background=True)
+            return self._handlers[sysid]
+
+    def send(self, message):
+        """
+        Pack a message now and queue it for the writer thread.
+
+        Packing happens in the calling thread so the message object can be reused
+        right away (MAVHandler's setpoint templates rely on this). A setpoint still
+        waiting for the same vehicle and message type is replaced in its queue slot.
+        """
+        mav = self.master.mav
+        with self._pack_lock:
+            buf = message.pack(mav)
+            mav.seq = (mav.seq + 1) % 256
+            mav.total_packets_sent += 1
+            mav.total_bytes_sent += len(buf)
+
+        msgid = message.get_msgId()
+        if msgid in SETPOINT_MSGIDS:
+            key = (getattr(message, 'target_system', 0), msgid)
+        else:
+            key = next(self._message_keys)
+        with self._outbox_changed:
+            if key in self._outbox:
+                self.dropped += 1
+            elif len(self._outbox) >= SEND_QUEUE_MAX:
+                self._outbox.popitem(last=False)
+                self.dropped += 1
+            self._outbox[key] = buf
+            self._outbox_changed.notify()
+
+    def close(self):
+        print("Closing shared vehicle link...")
+        self._stop_event.set()
+        with self._outbox_changed:
+            self._outbox_changed.notify_all()
+        self._reader.join()
+        self._writer.join()
+        for vehicle in self._vehicles.values():
+            vehicle.close()
+        self.master.close()
+        print("Link closed.")
+
+    def _add_vehicle(self, sysid, heartbeat):
+        vehicle = PooledVehicle(self, sysid, heartbeat)
+        with self._vehicles_changed:
+            self._vehicles[sysid] = vehicle
+            self._vehicles_changed.notify_all()
+        print(f"Vehicle {sysid} joined the pool.")
+        self.send(self.master.mav.request_data_stream_encode(
+            sysid, mavutil.mavlink.MAV_COMP_ID_AUTOPILOT1,
+            mavutil.mavlink.MAV_DATA_STREAM_ALL, self.stream_rate_hz, 1))
+        return vehicle
+
+    def _read_loop(self):
+        while not self._stop_event.is_set():
+            msg = self.master.recv_match(blocking=True, timeout=0.5)
+            if msg is None or msg.get_type() == 'BAD_DATA':
+                continue
+
+            sysid = msg.get_srcSystem()
+            with self._vehicles_changed:
+                vehicle = self._vehicles.get(sysid)
+            if vehicle is None:
+                # Only an autopilot heartbeat makes a new vehicle; ignore GCSs and companions
+                if (msg.get_type() != 'HEARTBEAT'
+                        or msg.autopilot == mavutil.mavlink.MAV_AUTOPILOT_INVALID
+                        or msg.get_srcComponent() != mavutil.mavlink.MAV_COMP_ID_AUTOPILOT1):
+                    continue
+                vehicle = self._add_vehicle(sysid, msg)
+            vehicle._handle_message(msg)
+
+    def _write_loop(self):
+        # Token bucket: at most send_rate_hz messages per second, bursts up to a tenth of that
+        burst = max(1.0, self.send_rate_hz / 10.0)
+        tokens = burst
+        last = time.monotonic()
+        while True:
+            with self._outbox_changed:
+                self._outbox_changed.wait_for(lambda: self._outbox or self._stop_event.is_set())
+                if self._stop_event.is_set():
+                    return
+
+            now = time.monotonic()
+            tokens = min(burst, tokens + (now - last) * self.send_rate_hz)
+            last = now
+            if tokens < 1.0:
+                time.sleep((1.0 - tokens) / self.send_rate_hz)
+                tokens = 1.0
+                last = time.monotonic()
+
+            # Take the message only now, so setpoints replaced while waiting go out newest
+            with self._outbox_changed:
+                if self._stop_event.is_set():
+                    return
+                _, buf = self._outbox.popitem(last=False)
+            tokens -= 1.0
+            self.master.write(buf)
+
+
+# Example usage:
+if __name__ == "__main__":
+    pool = VehiclePool("udpin:0.0.0.0:14550")
+    target = pool.handler(1)
+    chaser = pool.handler(2)
+
+    while True:
+        print(f"Target: {target.get_location()}  Chaser: {chaser.get_location()}")
+        time.sleep(1)
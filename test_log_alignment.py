@@ -0,0 +1,109 @@
+"""
+Tests for resampling and aligning session channels.
+
+Run with: python -m pytest test_log_alignment.py
+"""
+
+import numpy as np
+import pytest
+
+from bench_log_parser import generate_log
+from log_alignment import SessionAligner, relative_position_error, resample, uniform_base
+from log_parser import LogParser
+
+TIMES = np.array([0.0, 0.5, 0.75, 2.0, 3.5])
+VALUES = np.array([1.0, 3.0, -1.0, 4.0, 0.0])
+BASE = np.array([-0.1, 0.0, 0.2, 0.5, 0.7, 1.9, 2.5, 3.5, 3.6])
+
+
+def _reference(times, values, base, method):
+    """One base time at a time, with the definitions from the module docstring."""
+    result = []
+    for t in base:
+        if t < times[0] or t > times[-1]:
+            result.append(np.nan)
+        elif method == "nearest":
+            result.append(values[np.argmin(np.abs(times - t))])
+        elif method == "zoh":
+            result.append(values[times <= t][-1])
+        else:
+            result.append(np.interp(t, times, values))
+    return np.array(result)
+
+
+@pytest.mark.parametrize("method", ["nearest", "linear", "zoh"])
+def test_resample_matches_reference(method):
+    np.testing.assert_array_equal(resample(TIMES, VALUES, BASE, method),
+                                  _reference(TIMES, VALUES, BASE, method))
+
+
+@pytest.mark.parametrize("method", ["nearest", "linear", "zoh"])
+def test_resample_drops_nan_times_and_sorts(method):
+    order = np.array([3, 0, 4, 1, 2])
+    times = np.append(TIMES[order], np.nan)
+    values = np.append(VALUES[order], 100.0)
+    np.testing.assert_array_equal(resample(times, values, BASE, method),
+                                  _reference(TIMES, VALUES, BASE, method))
+
+
+def test_resample_columns_and_fields():
+    columns = np.column_stack((VALUES, 2 * VALUES)).astype(np.int64)
+    result = resample(TIMES, columns, BASE, "zoh")
+    assert result.shape == (len(BASE), 2) and result.dtype == np.float64
+    np.testing.assert_array_equal(result[:, 1], 2 * _reference(TIMES, VALUES, BASE, "zoh"))
+
+    records = np.zeros(len(TIMES), dtype=[("roll", np.float32), ("pitch", np.float32)])
+    records["pitch"] = VALUES
+    result = resample(TIMES, records, BASE)
+    assert result.dtype.names == ("roll", "pitch")
+    np.testing.assert_array_equal(result["pitch"], _reference(TIMES, VALUES, BASE, "linear"))
+
+
+def test_resample_without_records():
+    assert np.isnan(resample([], [], BASE)).all()
+    assert np.isnan(resample([np.nan], [1.0], BASE)).all()
+    with pytest.raises(ValueError):
+        resample(TIMES, VALUES, BASE, "cubic")
+
+
+def test_uniform_base_covers_common_span():
+    session = {"a_time": np.array([0.0, 1.0, 2.0, np.nan]), "b_time": np.array([0.5, 2.5])}
+    np.testing.assert_allclose(uniform_base(session, ["a", "b"], 4), [0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0])
+    session["b_time"] = np.array([3.0])
+    assert len(uniform_base(session, ["a", "b"], 4)) == 0
+
+
+def test_aligner_caches_until_channel_grows():
+    session = {"a": VALUES, "a_time": TIMES, "b": VALUES[:3], "b_time": TIMES[:3] + 0.1}
+    aligner = SessionAligner(max_frames=2)
+    frame = aligner.align(session, ("a", "b"))
+    np.testing.assert_array_equal(frame["time"], TIMES)
+    np.testing.assert_array_equal(frame["b"], resample(TIMES[:3] + 0.1, VALUES[:3], TIMES))
+    assert aligner.align(session, ("a", "b")) is frame
+
+    # A followed session grows in place: the frame is recomputed
+    session["b"], session["b_time"] = VALUES, TIMES + 0.1
+    grown = aligner.align(session, ("a", "b"))
+    assert grown is not frame
+    np.testing.assert_array_equal(grown["b"], resample(TIMES + 0.1, VALUES, TIMES))
+
+    # Least recently used frames are dropped beyond max_frames
+    aligner.align(session, ("a", "b"), base=2.0)
+    aligner.align(session, ("b",))
+    assert aligner.align(session, ("a", "b")) is not grown
+
+
+def test_relative_position_error_on_parsed_session(tmp_path):
+    path = tmp_path / "guidance.log"
+    generate_log(str(path), 0.1, frames_per_session=100)
+    session = LogParser.parse_log_file(str(path))[0]
+    times, error = relative_position_error(session)
+
+    interceptor = session["interceptor_location"]
+    assert np.isfinite(error).all(axis=1).sum() > len(times) // 2
+    np.testing.assert_array_equal(times, session["interceptor_location_time"])
+    target = np.column_stack([np.interp(times, session["target_location_time"], session["target_location"][:, i],
+                                        left=np.nan, right=np.nan) for i in range(3)])
+    np.testing.assert_allclose(error[:, 2], target[:, 2] - interceptor[:, 2])
+    north = np.radians(target[:, 0] - interceptor[:, 0]) * 6378137.0
+    np.testing.assert_allclose(error[:, 0], north)
@@ -0,0 +1,37 @@
+"""
+Tests for log_corpus session listings.
+
+Run with: python -m pytest test_log_corpus.py
+"""
+
+import os
+import time
+
+import pytest
+
+from log_corpus import format_summary
+from log_parser import parse_timestamps
+
+
+@pytest.fixture
+def pinned_tz():
+    """Run in a timezone far from UTC, restoring the original afterwards."""
+    original = os.environ.get("TZ")
+    os.environ["TZ"] = "America/Los_Angeles"
+    time.tzset()
+    yield
+    if original is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = original
+    time.tzset()
+
+
+def test_format_summary_shows_log_time(pinned_tz):
+    row = {
+        "path": "/logs/flight.log", "session": 0, "start_offset": 0, "end_offset": 100,
+        "start_time": float(parse_timestamps(["2025-06-01 12:00:00,000"])[0]),
+        "duration_s": 10.0, "frames": 5, "min_distance": 1.5,
+        "rms_altitude_error": 0.25, "max_speed": 3.0, "channels": "altitude",
+    }
+    assert format_summary(row).startswith("flight.log test 1: 2025-06-01 12:00:00, 10.0 s")
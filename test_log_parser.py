@@ -0,0 +1,297 @@
+"""
+Tests for the bulk log parser against the line parser.
+
+Run with: python -m pytest test_log_parser.py
+"""
+
+import multiprocessing
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import log_parser
+from bench_log_parser import generate_log
+from log_parser import CHANNELS, SESSION_KEYS, LogIndex, LogLoader, LogParser, parse_timestamps
+
+_PREFIX = "2025-06-01 12:00:01,000 - INFO - "
+
+# Lines with a marker away from the message head or with several markers, and the
+# channel and row the original if/elif parser read from each (None: no data)
+EDGE_CASES = [
+    (_PREFIX + "Speed: 3.0, Altitude: 7.0", "altitude", 7.0),
+    (_PREFIX + "Current Altitude: 5.5", "altitude", 5.5),
+    (_PREFIX + "Altitude: 5.0, Target Altitude: 6.0", "target_altitude", 6.0),
+    (_PREFIX + "Target Location: (4.0, 5.0, 6.0), Interceptor Location: (1.0, 2.0, 3.0)",
+     "interceptor_location", [4.0, 5.0, 6.0]),
+    (_PREFIX + "Relative Altitude: 9.0", None, None),
+    (_PREFIX + "Distance to target: 2.5, Speed: 1.5", "distance_to_target", 2.5),
+    (_PREFIX + "Speed: 1.0 - Frame Number: 12", "frame_number", 12),
+    ("Altitude: 4.0", None, None),
+    (_PREFIX + "Velocity: [1.0, 2.0, 3.0] Angular Velocity: [4.0, 5.0, 6.0]",
+     "angular_velocity", [1.0, 2.0, 3.0]),
+    (_PREFIX + "Virtual Pixel errors: (1.0, 2.0)", "virtual_pixel_errors", [1.0, 2.0]),
+    (_PREFIX + "Control Commands - Pitch: 1.0, Yaw: 2.0, Roll: 3.0, Thrust: 0.5",
+     "control_commands", [1.0, 2.0, 3.0, 0.5]),
+    (_PREFIX + "Altitude: 8.0", "altitude", 8.0),
+]
+
+
+def _write_log(path):
+    lines = ["2025-06-01 12:00:00,000 - Drone Mode: GUIDED"]
+    for i in range(200):
+        stamp = f"2025-06-01 12:00:{i % 60:02d},{i % 1000:03d}"
+        lines += [f"{stamp} - Frame Number: {2 * i}",
+                  f"Frame Number: {2 * i + 1}",  # Printed without the logging prefix
+                  f"{stamp} - Speed: {i}.5"]
+    lines.append("2025-06-01 12:01:00,000 - Drone Mode: LOITER")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _write_edge_case_log(path):
+    lines = ([_PREFIX + "Drone Mode: GUIDED"] + [line for line, _, _ in EDGE_CASES]
+             + [_PREFIX + "Drone Mode: LOITER"])
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _write_mixed_log(path):
+    """Edge-case lines among regular ones, some of which have a marker inside another word."""
+    lines = [_PREFIX + "Drone Mode: GUIDED"]
+    for i, (line, _, _) in enumerate(EDGE_CASES * 5):
+        lines += [line, f"{_PREFIX}Frame Number: {i}", f"{_PREFIX}Relative Altitude: {i}.5",
+                  f"{_PREFIX}Target Altitude: {i}.25", f"{_PREFIX}Altitude: {i}.75"]
+    lines.append(_PREFIX + "Drone Mode: LOITER")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def _assert_same(expected, actual):
+    for key in SESSION_KEYS:
+        np.testing.assert_array_equal(np.asarray(actual[key]), np.asarray(expected[key]), err_msg=key)
+
+
+def _assert_identical(expected, actual):
+    """Same values and dtypes in every session column."""
+    _assert_same(expected, actual)
+    for key in SESSION_KEYS:
+        assert np.asarray(actual[key]).dtype == np.asarray(expected[key]).dtype, key
+
+
+def test_bulk_keeps_untimestamped_lines(tmp_path):
+    path = tmp_path / "guidance.log"
+    _write_log(path)
+    [expected] = LogParser.parse_log_file(str(path))
+    assert len(expected["frame_number"]) == 400
+    assert len(expected["timestamps"]) == 200
+
+    [bulk] = LogParser.parse_log_file(str(path), bulk=True)
+    _assert_same(expected, bulk)
+
+    log_index = LogIndex(str(path))
+    try:
+        _assert_same(expected, log_index.sessions[0])
+    finally:
+        log_index.close()
+
+
+def test_several_markers_follow_old_priority(tmp_path):
+    path = tmp_path / "guidance.log"
+    _write_edge_case_log(path)
+    [session] = LogParser.parse_log_file(str(path))
+    for channel in CHANNELS:
+        expected = [row for _, name, row in EDGE_CASES if name == channel]
+        assert session[channel].tolist() == expected, channel
+
+
+def test_bulk_and_index_fall_back_to_line_parser(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_parser, "INDEX_BLOCK_BYTES", 256)  # Lines cross index blocks
+    path = tmp_path / "guidance.log"
+    _write_mixed_log(path)
+    [expected] = LogParser.parse_log_file(str(path))
+    assert len(expected["altitude"]) == 5 * 3 + 60
+
+    [bulk] = LogParser.parse_log_file(str(path), bulk=True)
+    _assert_same(expected, bulk)
+
+    log_index = LogIndex(str(path))
+    try:
+        marked = {name for _, name, _ in EDGE_CASES if name} | {"frame_number", "altitude", "target_altitude"}
+        assert set(log_index.sessions[0].marked_channels()) == marked
+        _assert_same(expected, log_index.sessions[0])
+    finally:
+        log_index.close()
+
+    loader = LogLoader(str(path), workers=1)
+    deadline = time.monotonic() + 60
+    while not loader.done:
+        assert time.monotonic() < deadline, "log did not load"
+        time.sleep(0.01)
+        loader.poll()
+    _assert_same(expected, loader.sessions[0])
+
+
+def _write_sessions_log(path):
+    """Several generated sessions followed by one with the edge-case lines."""
+    generate_log(str(path), 0.2, frames_per_session=20)
+    edge = path.with_suffix(".edge")
+    _write_mixed_log(edge)
+    with open(path, "a") as f:
+        f.write(edge.read_text())
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_parallel_matches_serial(tmp_path, monkeypatch, bulk):
+    path = tmp_path / "guidance.log"
+    _write_sessions_log(path)
+    expected = LogParser.parse_log_file(str(path), bulk=bulk)
+    assert len(expected) > 3
+
+    # Chunks of a few kB, so sessions are split across several chunks and workers
+    monkeypatch.setattr(log_parser, "PARALLEL_MIN_BYTES", 4096)
+    monkeypatch.setattr(log_parser, "PARALLEL_MIN_BYTES_BULK", 4096)
+    split = LogParser.split_session_ranges
+    chunks = []
+    monkeypatch.setattr(LogParser, "split_session_ranges",
+                        staticmethod(lambda *args: chunks.extend(split(*args)) or chunks))
+    parallel = LogParser.parse_log_file(str(path), workers=4, bulk=bulk)
+    assert len(chunks) > 2 * len(expected)
+
+    assert len(parallel) == len(expected)
+    for expected_session, session in zip(expected, parallel):
+        _assert_identical(expected_session, session)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize("content", ["", "2025-06-01 12:00:00,000 - Speed: 1.0\n"])
+def test_parallel_without_sessions(tmp_path, monkeypatch, bulk, content):
+    path = tmp_path / "guidance.log"
+    path.write_text(content)
+    monkeypatch.setattr(log_parser, "PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(log_parser, "PARALLEL_MIN_BYTES_BULK", 0)
+    assert LogParser.parse_log_file(str(path), bulk=bulk) == []
+    assert LogParser.parse_log_file(str(path), workers=4, bulk=bulk) == []
+
+
+def test_loader_cancel_stops_workers(tmp_path):
+    path = tmp_path / "guidance.log"
+    generate_log(str(path), 2, frames_per_session=200)
+    loader = LogLoader(str(path), workers=2, chunk_bytes=64 * 1024)
+    assert multiprocessing.active_children()
+    loader.cancel()
+    assert loader.done and loader.cancelled
+    assert loader.poll() == []
+    assert not multiprocessing.active_children()
+
+
+def test_index_matches_parse_log_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_parser, "INDEX_BLOCK_BYTES", 4096)
+    path = tmp_path / "guidance.log"
+    _write_sessions_log(path)
+    expected = LogParser.parse_log_file(str(path))
+
+    log_index = LogIndex(str(path))
+    try:
+        assert [(session.start, session.end) for session in log_index.sessions] == \
+            LogParser.find_session_ranges(str(path))
+        assert len(log_index.sessions) == len(expected)
+        for expected_session, session in zip(expected, log_index.sessions):
+            _assert_identical(expected_session, session)
+            lines = path.read_bytes()[session.start:session.end].count(b"\n")
+            assert session.n_lines == lines
+    finally:
+        log_index.close()
+
+
+def test_index_parses_only_the_channels_read(tmp_path):
+    path = tmp_path / "guidance.log"
+    _write_sessions_log(path)
+    log_index = LogIndex(str(path))
+    try:
+        session = log_index.sessions[1]
+        assert not session.loaded and log_index.nbytes == 0
+        session["target_velocity"]
+        assert session.loaded
+        assert set(session._channels) == {"target_velocity", "target_velocity_time"}
+        assert all(not other.loaded for other in log_index.sessions if other is not session)
+    finally:
+        log_index.close()
+
+
+def test_index_of_empty_log(tmp_path):
+    path = tmp_path / "guidance.log"
+    path.write_text("")
+    log_index = LogIndex(str(path))
+    assert log_index.sessions == []
+    log_index.close()
+
+
+def test_lazy_sessions_unload_least_recently_used(tmp_path):
+    path = tmp_path / "guidance.log"
+    _write_sessions_log(path)
+    expected = LogParser.parse_log_file(str(path))
+    log_index = LogIndex(str(path))
+    try:
+        first, second, third = log_index.sessions[:3]
+        first["altitude"]
+        log_index.max_bytes = first.nbytes + 1  # Room for about one session
+        second["altitude"]
+        assert not first.loaded and second.loaded
+        assert log_index.nbytes == second.nbytes
+
+        # Reading keeps a session most recently used; the other one goes
+        third["altitude"]
+        assert third.loaded and not second.loaded
+        # An unloaded session is parsed again when read
+        np.testing.assert_array_equal(first["altitude"], expected[0]["altitude"])
+        assert first.loaded and not third.loaded
+
+        # The session being read stays even if it alone is over budget
+        log_index.max_bytes = 0
+        first["speed"]
+        assert first.loaded
+        assert log_index.nbytes == first.nbytes
+        _assert_identical(expected[0], first)
+    finally:
+        log_index.close()
+    assert log_index.nbytes == 0 and not first.loaded
+
+
+def _posix(stamp):
+    parsed = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S,%f").replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def test_parse_timestamps_matches_strptime():
+    rng = np.random.default_rng(0)
+    stamps = ["1970-01-01 00:00:00,000", "2024-02-29 23:59:59,999", "2025-12-31 00:00:00,001",
+              "2100-03-01 12:34:56,789"]
+    seconds = rng.integers(0, 100 * 365 * 86400, 200) + 946684800
+    millis = rng.integers(0, 1000, 200)
+    stamps += [datetime.fromtimestamp(s, timezone.utc).strftime("%Y-%m-%d %H:%M:%S") + f",{ms:03d}"
+               for s, ms in zip(seconds.tolist(), millis.tolist())]
+    expected = [_posix(stamp) for stamp in stamps]
+    np.testing.assert_allclose(parse_timestamps(stamps), expected, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(parse_timestamps([stamp.encode() for stamp in stamps]), expected, rtol=0, atol=1e-6)
+
+
+def test_parse_timestamps_malformed_are_nan():
+    stamps = ["", "Speed: 1.0", "2025-06-01 12:00:01.000", "2025-06-01 12:00:01,00", "2025-06-01T12:00:01,000",
+              "2025-06-01 12:00:01,00x", "2025-06-01 12:00:01,000", "2025-06-01 12:00:0é,000"]
+    times = parse_timestamps(stamps)
+    assert times.dtype == np.float64
+    assert np.isnan(times).tolist() == [True] * 6 + [False, True]
+    assert times[6] == _posix("2025-06-01 12:00:01,000")
+    assert parse_timestamps([]).shape == (0,)
+
+
+def test_channel_times_follow_line_prefixes(tmp_path):
+    path = tmp_path / "guidance.log"
+    _write_log(path)
+    [session] = LogParser.parse_log_file(str(path))
+    stamps = [line.partition(" - ")[0] for line in path.read_text().splitlines()]
+    assert session["start_time"] == _posix(stamps[0])
+    frame_times = session["frame_number_time"]
+    # Frame numbers printed without the logging prefix have no time
+    assert np.isnan(frame_times[1::2]).all()
+    np.testing.assert_allclose(frame_times[::2], [_posix(stamp) for stamp in stamps[1:-1:3]])
+    np.testing.assert_allclose(session["speed_time"], [_posix(stamp) for stamp in stamps[3:-1:3]])
@@ -0,0 +1,327 @@
+"""
+Tests for PlotterApp and SessionPlotter, headless: the Tk widgets are replaced
+by stand-ins and the figure is drawn on an Agg canvas.
+
+Run with: python -m pytest test_plot.py
+"""
+
+import os
+import time
+from types import SimpleNamespace
+
+import matplotlib.image
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from bench_log_parser import generate_log
+from plot import (LOD_BLOCK, LOD_MIN_POINTS, SESSION_KEYS, LogParser, MinMaxPyramid, PlotterApp, SessionCache,
+                  SessionPlotter, _export_file_name, export_figures)
+
+
+class _Var:
+    def __init__(self, value):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class _Widget:
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **options):
+        self.options.update(options)
+
+    def pack(self, **options):
+        pass
+
+    def pack_forget(self):
+        pass
+
+
+class _Combo:
+    def __init__(self):
+        self.index = 0
+
+    def current(self, index=None):
+        if index is not None:
+            self.index = index
+        return self.index
+
+
+class _Root:
+    """Tk root stand-in: after() and after_idle() jobs run when run_jobs() is called."""
+
+    def __init__(self):
+        self.jobs = {}
+        self._next_job = 0
+
+    def title(self, text):
+        pass
+
+    def geometry(self, size):
+        pass
+
+    def update(self):
+        pass
+
+    def after(self, ms, callback):
+        self._next_job += 1
+        self.jobs[self._next_job] = callback
+        return self._next_job
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_jobs(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+class HeadlessApp(PlotterApp):
+    """PlotterApp on an Agg canvas, caching parsed sessions in cache_dir."""
+
+    def __init__(self, log_file_path, cache_dir):
+        self._cache_dir = str(cache_dir)
+        super().__init__(_Root(), log_file_path)
+
+    def _setup_ui(self):
+        self.session_cache.cache_dir = self._cache_dir
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.toolbar = SimpleNamespace(update=lambda: None)
+        self.show_all_tests = _Var(False)
+        self.follow_log = _Var(False)
+        self.file_label, self.test_label, self.status_label = _Widget(), _Widget(), _Widget()
+        self.load_progress, self.cancel_button = _Widget(), _Widget()
+        self.plot_combo = _Combo()
+
+    def wait_loaded(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while self.loader is not None:
+            assert time.monotonic() < deadline, "log did not load"
+            time.sleep(0.02)
+            self.root.run_jobs()
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "guidance.log"
+    generate_log(str(path), 0.3, frames_per_session=60)
+    return str(path)
+
+
+@pytest.fixture
+def app(log_path, tmp_path):
+    app = HeadlessApp(log_path, tmp_path / "cache")
+    app.wait_loaded()
+    yield app
+    app._stop_load()
+
+
+def _image(canvas):
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def _reference_image(app):
+    """The current view drawn from scratch on a new figure."""
+    fig = Figure(figsize=app.fig.get_size_inches(), dpi=app.fig.dpi)
+    canvas = FigureCanvasAgg(fig)
+    SessionPlotter(fig).draw_figure(app.sessions, app.current_plot_index, app.current_test_index)
+    canvas.draw()
+    return _image(canvas)
+
+
+def _swap_in_copies(app):
+    """Replace the sessions with equal copies, as the background loader does."""
+    app.sessions[:] = [{name: np.copy(values) for name, values in session.items()}
+                       for session in app.sessions]
+
+
+def test_blit_matches_full_draw(app):
+    app.current_plot_index = 1  # Altitude: one axes, two lines and a legend
+    app._update_plot()
+    _swap_in_copies(app)
+    app._draw_plot()
+    np.testing.assert_array_equal(_image(app.canvas), _reference_image(app))
+
+
+@pytest.mark.parametrize("fmt", ["svg", "pdf", "png"])
+def test_save_after_navigating(app, tmp_path, fmt):
+    app._next_test()
+    app._next_plot()
+    _swap_in_copies(app)
+    app._draw_plot()
+    backgrounds = dict(app._backgrounds)
+
+    path = tmp_path / f"figure.{fmt}"
+    app.fig.savefig(path, format=fmt)
+
+    assert path.stat().st_size > 0
+    assert app._backgrounds == backgrounds
+    # The figure still draws and blits on screen afterwards
+    _swap_in_copies(app)
+    app._draw_plot()
+    np.testing.assert_array_equal(_image(app.canvas), _reference_image(app))
+
+
+def test_follow_reads_log_in_background(app, log_path):
+    expected = LogParser.parse_log_file(log_path)
+    shown = app.sessions
+    app.follow_log.set(True)
+    app._toggle_follow()
+    assert app.sessions is shown  # Still the loaded sessions until the follower caught up
+
+    deadline = time.monotonic() + 60
+    while app.sessions is shown:
+        assert time.monotonic() < deadline, "follower did not catch up"
+        time.sleep(0.02)
+        app.root.run_jobs()
+    assert app.sessions is app.follower.sessions
+    assert app.current_test_index == len(expected) - 1
+    for expected_session, session in zip(expected, app.sessions):
+        for key in SESSION_KEYS:
+            np.testing.assert_array_equal(session[key], expected_session[key], err_msg=key)
+
+    with open(log_path, "a") as f:
+        f.write("2025-01-01 13:00:00,000 - INFO - Drone Mode: GUIDED\n"
+                "2025-01-01 13:00:00,004 - INFO - Frame Number: 7\n")
+    app.root.run_jobs()
+    assert len(app.sessions) == len(expected) + 1
+    assert app.sessions[-1]["frame_number"].tolist() == [7]
+    app._stop_follow()
+
+
+def test_swapped_in_sessions_get_new_versions(log_path, tmp_path):
+    app = HeadlessApp(log_path, tmp_path / "cache")
+    try:
+        assert app.loader is not None
+        app.wait_loaded()
+        assert sorted(app._session_versions) == list(range(len(app.sessions)))
+    finally:
+        app._stop_load()
+
+
+def test_prefetch_waits_for_navigation_to_pause(app, monkeypatch):
+    rendered = []
+    monkeypatch.setattr(app, "_prerender", lambda test, plot: rendered.append((test, plot)))
+    app.root.run_jobs()
+    rendered.clear()
+
+    app._next_plot()
+    app._next_plot()
+    app._next_test()
+    assert rendered == []  # Nothing is rendered while stepping
+    while app.root.jobs:
+        app.root.run_jobs()
+    expected = [(0, 2), (1, 1), (1, 3)] + ([(2, 2)] if len(app.sessions) > 2 else [])
+    assert sorted(rendered) == expected
+
+
+def test_session_search_runs_off_the_tk_thread(log_path, tmp_path, monkeypatch):
+    import sqlite3
+    import log_corpus
+    from plot import _in_background, _search_sessions
+    monkeypatch.setattr(log_corpus, "DEFAULT_CORPUS_DB", str(tmp_path / "corpus.sqlite"))
+    search = _in_background(_search_sessions, [str(tmp_path)], "frames > ?")
+    with pytest.raises(sqlite3.Error):
+        search.result(timeout=60)  # Errors reach the Tk thread through the Future
+    rows = _in_background(_search_sessions, [str(tmp_path)], "frames > 0").result(timeout=60)
+    assert len(rows) == len(LogParser.parse_log_file(log_path))
+    assert {row["path"] for row in rows} == {log_path}
+
+
+def _spiky_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = rng.normal(size=n)
+    spikes = rng.choice(n, 50, replace=False)
+    y[spikes] = rng.choice([-1, 1], 50) * rng.uniform(10, 100, 50)
+    y[rng.choice(n, 200, replace=False)] = np.nan
+    y[1000:1100] = np.nan  # Whole blocks of NaN
+    return x, y
+
+
+def test_pyramid_keeps_every_block_extreme():
+    x, y = _spiky_series(100_003)
+    pyramid = MinMaxPyramid(x, y)
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        x_min, x_max = np.sort(rng.uniform(x[0] - 10, x[-1] + 10, 2))
+        width = int(rng.integers(50, 2000))
+        dx, dy = pyramid.decimate(x_min, x_max, width)
+
+        first = max(int(np.searchsorted(x, x_min)) - 1, 0)
+        last = min(int(np.searchsorted(x, x_max, side='right')) + 1, len(x))
+        index = np.searchsorted(x, dx)
+        # Only real samples, in order, covering both ends of the view
+        np.testing.assert_array_equal(x[index], dx)
+        np.testing.assert_array_equal(y[index], dy)
+        assert np.all(np.diff(dx) > 0)
+        assert index[0] == first and index[-1] == last - 1
+        if last - first <= LOD_BLOCK * width:
+            assert len(dx) == last - first
+            continue
+
+        block = next(block for block, _, _ in pyramid.levels if block * width >= last - first)
+        assert len(dx) <= 2 * width + 6
+        for start in range(first // block * block, last, block):
+            start, end = max(start, first), min(start + block, last)
+            values = y[start:end]
+            if np.isnan(values).all():
+                continue
+            chosen = dy[(index >= start) & (index < end)]
+            assert np.nanmax(values) == np.nanmax(chosen)
+            assert np.nanmin(values) == np.nanmin(chosen)
+
+
+def test_pyramid_only_for_long_sorted_series():
+    x, y = _spiky_series(LOD_MIN_POINTS)
+    assert MinMaxPyramid.accepts(x, y)
+    assert not MinMaxPyramid.accepts(x[:-1], y[:-1])
+    assert not MinMaxPyramid.accepts(x[::-1], y)
+
+
+def test_export_matches_direct_render_and_skips_up_to_date(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    log_path = log_dir / "flight.log"
+    generate_log(str(log_path), 0.05, frames_per_session=100)
+    (log_dir / "idle.log").write_text("2025-01-01 12:00:00,000 - INFO - Drone Mode: LOITER\n")
+    sessions = LogParser.parse_log_file(str(log_path))
+    assert sessions
+    n_figures = len(sessions) * len(SessionPlotter.PLOT_TYPES)
+    out_dir = tmp_path / "figures"
+    cache = SessionCache(str(tmp_path / "cache"))
+
+    assert export_figures([str(log_dir)], str(out_dir), workers=2, session_cache=cache) == (n_figures, 0)
+    figure_dir = out_dir / "flight"
+    assert len(list(figure_dir.glob("*.png"))) == n_figures
+    assert not list(out_dir.rglob("*.tmp"))
+    index = (out_dir / "index.html").read_text()
+    assert index.count("<figure>") == n_figures
+    assert "idle.log" in index and "No GUIDED mode sessions" in index
+
+    # Same pixels as drawing the serial parser's sessions directly
+    plot_index = 1
+    plotter = SessionPlotter(Figure(figsize=(14, 8), dpi=100))
+    FigureCanvasAgg(plotter.fig)
+    plotter.draw_figure(sessions, plot_index, len(sessions) - 1)
+    direct = tmp_path / "direct.png"
+    plotter.fig.savefig(direct, format="png")
+    exported = figure_dir / _export_file_name(len(sessions) - 1, plot_index, "png")
+    np.testing.assert_array_equal(matplotlib.image.imread(exported), matplotlib.image.imread(direct))
+
+    assert export_figures([str(log_dir)], str(out_dir), workers=1, session_cache=cache) == (0, n_figures)
+    # A log written after its figures is exported again
+    os.utime(log_path, (time.time() + 10, time.time() + 10))
+    assert export_figures([str(log_path)], str(out_dir), workers=1, session_cache=cache) == (n_figures, 0)